@@ -0,0 +1,81 @@
+"""
+Measure how many webhook events are parsed per second.
+
+The previous implementation of `HubspotEvent` (a regular class, eagerly parsing the messages
+through `getattr` dispatch) is kept below as a baseline.
+
+Usage: python benchmarks/bench_events.py [number of events]
+"""
+from datetime import datetime
+import json
+import sys
+import timeit
+
+import pytz
+
+from djhubspot.events import HubspotEvent
+
+
+class LegacyHubspotEvent:
+    MESSAGE_EVENT_TO_EVENT_TYPE = HubspotEvent.MESSAGE_EVENT_TO_EVENT_TYPE
+
+    def __init__(self, message):
+        self.message = message
+        self.event_type = self.MESSAGE_EVENT_TO_EVENT_TYPE[self.message.get('subscriptionType')]
+        try:
+            getattr(self, 'parse_%s_event' % self.event_type)()
+        except (AttributeError, TypeError):
+            pass
+
+    @property
+    def occurred_at(self):
+        return datetime.fromtimestamp(self.message['occurredAt'] / 1000.0, pytz.utc)
+
+    def parse_deal_updated_event(self):
+        self.deal_id = self.message.get('objectId')
+        self.updated_property_name = self.message.get('propertyName')
+        self.updated_property_value = self.message.get('propertyValue')
+
+
+def build_raw_body(size):
+    return json.dumps([
+        {
+            'objectId': 697680835 + i % 100,
+            'propertyName': 'dealstage',
+            'propertyValue': '1f4f1ec1-8174-49f3-a112-4eaa4748e38e',
+            'changeSource': 'CRM_UI',
+            'eventId': 802835955 + i,
+            'subscriptionId': 92894,
+            'portalId': 5799819,
+            'appId': 186886,
+            'occurredAt': 1556094637139 + i,
+            'subscriptionType': 'deal.propertyChange',
+            'attemptNumber': 0,
+        }
+        for i in range(size)
+    ]).encode()
+
+
+def parse_legacy(raw_body):
+    events = [LegacyHubspotEvent(message) for message in json.loads(raw_body.decode('utf-8'))]
+    for event in events:
+        event.deal_id, event.occurred_at, event.occurred_at
+    return events
+
+
+def parse(raw_body):
+    events = HubspotEvent.parse_batch(raw_body)
+    for event in events:
+        event.deal_id, event.occurred_at, event.occurred_at
+    return events
+
+
+def main(size=5000, repeat=5):
+    raw_body = build_raw_body(size)
+    for name, function in (('before', parse_legacy), ('after', parse)):
+        best = min(timeit.repeat(lambda: function(raw_body), number=1, repeat=repeat))
+        print(f'{name:>6}: {size / best:>10,.0f} events/s')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:2]))
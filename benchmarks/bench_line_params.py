@@ -0,0 +1,75 @@
+"""
+Check that the query string of the line items fetches stays the same size when many `Line`
+objects are instantiated, as `Deal.products` does for each deal.
+
+The previous implementation of `Line` (extending a list shared by all the instances on each
+instantiation) is kept below as a baseline.
+
+Usage: python benchmarks/bench_line_params.py [number of instantiations]
+"""
+import sys
+import timeit
+from urllib.parse import urlencode
+
+import django
+from django.conf import settings
+
+if not settings.configured:
+    settings.configure(HUBSPOT_API_KEY='__API_KEY__')
+    django.setup()
+
+from djhubspot.client import HubspotClient  # noqa: E402
+from djhubspot.helpers import Line  # noqa: E402
+
+EXTRA_PROPERTIES = ['quantity', 'discount', 'hs_product_id']
+
+
+class LegacyLine:
+    _properties = []
+
+    def __init__(self, extra_properties=None):
+        if extra_properties:
+            self._properties += extra_properties
+
+    def get_params(self):
+        return [('properties', property_name) for property_name in self._properties]
+
+
+def query_size(params):
+    return len(urlencode(params, doseq=True))
+
+
+def main(size=10000):
+    client = HubspotClient()
+    checkpoints = {1, size // 100, size // 10, size} - {0}
+
+    for name, build, get_params in (
+        ('before', lambda: LegacyLine(EXTRA_PROPERTIES), LegacyLine.get_params),
+        (
+            'after',
+            lambda: Line(1, fetch=False, hubspot_client=client, extra_properties=EXTRA_PROPERTIES),
+            Line._get_fetch_params,
+        ),
+    ):
+        sizes = []
+        for count in range(1, size + 1):
+            line = build()
+            if count in checkpoints:
+                sizes.append(f'{count}: {query_size(get_params(line))} B')
+        best = min(timeit.repeat(lambda: get_params(line), number=1000, repeat=5)) / 1000
+        print(f'{name:>6}: {", ".join(sizes)} ({best * 1e6:.1f} us per params)')
+
+    sizes = {
+        query_size(line._get_fetch_params())
+        for line in (
+            Line(1, fetch=False, hubspot_client=client, extra_properties=EXTRA_PROPERTIES)
+            for _ in range(size)
+        )
+    }
+    if len(sizes) != 1:
+        print("The size of the line items requests is growing!", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:2]))
@@ -0,0 +1,100 @@
+"""
+Measure the latency of the calls performed by a hubspot3 client against a local HTTPS stub,
+with a new connection per call (as hubspot3 does) and with the pooled connections of
+`HubspotTransport`.
+
+It requires the `openssl` command, in order to generate a self-signed certificate.
+
+Usage: python benchmarks/bench_transport.py [number of calls]
+"""
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import django
+from django.conf import settings
+
+if not settings.configured:
+    settings.configure(HUBSPOT_API_KEY='__API_KEY__')
+    django.setup()
+
+from hubspot3.companies import CompaniesClient  # noqa: E402
+
+from djhubspot.transport import HubspotTransport  # noqa: E402
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = json.dumps({'companyId': 1, 'properties': {}}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_https_stub(directory):
+    cert_file = os.path.join(directory, 'cert.pem')
+    key_file = os.path.join(directory, 'key.pem')
+    subprocess.run([
+        'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+        '-subj', '/CN=localhost', '-keyout', key_file, '-out', cert_file,
+    ], check=True, capture_output=True)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_file, key_file)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, cert_file
+
+
+def build_client(port, cert_file):
+    client = CompaniesClient(api_key='__API_KEY__', api_base=f'https://localhost:{port}')
+    context = ssl.create_default_context(cafile=cert_file)
+    client.options['connection_type'] = partial(
+        client.options['connection_type'], context=context,
+    )
+    return client
+
+
+def measure(client, calls):
+    started_at = time.perf_counter()
+    for _ in range(calls):
+        client.get(1)
+    return (time.perf_counter() - started_at) / calls
+
+
+def main(calls=200):
+    with tempfile.TemporaryDirectory() as directory:
+        server, cert_file = start_https_stub(directory)
+        port = server.server_address[1]
+
+        transport = HubspotTransport()
+        for name, client in (
+            ('before', build_client(port, cert_file)),
+            ('after', transport.install(build_client(port, cert_file))),
+        ):
+            latency = measure(client, calls)
+            print(f'{name:>6}: {latency * 1000:>7.2f} ms per call')
+
+        transport.close()
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:2]))
@@ -0,0 +1,573 @@
+"""
+Asynchronous (asyncio) variants of the `HubspotClient` and of the helpers.
+
+This module requires `aiohttp`.
+"""
+import asyncio
+import json
+import logging
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.functional import cached_property
+
+from hubspot3.error import (
+    HubspotBadRequest,
+    HubspotConflict,
+    HubspotNotFound,
+    HubspotServerError,
+    HubspotTimeout,
+    HubspotUnauthorized,
+)
+
+from .cache import get_object_cache
+from .client import HubspotClient
+from .helpers import Company, Contact, Deal, Owner
+from .ratelimit import get_rate_limiter
+from .utils import chunks, get_portal_key
+
+from . import constants
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+logger = logging.getLogger('vendors.dj_hubspot')
+
+
+# Cf: https://developers.hubspot.com/docs/methods/crm-associations/crm-associations-overview
+ASSOCIATION_CONTACT_TO_COMPANY = 1
+ASSOCIATION_COMPANY_TO_CONTACT = 2
+ASSOCIATION_COMPANY_TO_DEAL = 6
+ASSOCIATION_DEAL_TO_LINE_ITEM = 19
+
+
+class _Result:
+    """Mimic the `http.client.HTTPResponse` expected by the hubspot3 errors."""
+
+    def __init__(self, status, reason, body, headers):
+        self.status = status
+        self.reason = reason
+        self.msg = reason
+        self.body = body
+        self.headers = headers
+
+
+class AsyncHubspotClient:
+    """
+    Asynchronous counterpart of the `HubspotClient`.
+
+    All the calls share a single `aiohttp.ClientSession`, and so a single pool of connections, and
+    go through the same rate limiter as the `HubspotClient` targeting the same portal.
+
+    Example:
+    ```
+    async with AsyncHubspotClient() as client:
+        deal = await AsyncDeal.get(deal_id, hubspot_client=client)
+        company, contacts, products = await asyncio.gather(
+            deal.get_company(),
+            deal.get_contacts(),
+            deal.get_products(),
+        )
+    ```
+    """
+
+    API_BASE = 'https://api.hubapi.com'
+
+    def __init__(self, hubspot_api_key=None, api_base=None, timeout=10, pool_size=10):
+        """
+        Parameters
+        ----------
+        hubspot_api_key: str, optional
+            Defaults to the `HUBSPOT_API_KEY` setting.
+        api_base: str, optional
+            Could be used to target another server than the Hubspot API (ex: in tests).
+        timeout: int, optional
+            The timeout of each call, in seconds.
+        pool_size: int, optional
+            The maximum number of simultaneous connections to the API.
+        """
+        if aiohttp is None:
+            raise ImproperlyConfigured("`aiohttp` is required to use the `AsyncHubspotClient`.")
+
+        self.hubspot_api_key = hubspot_api_key or settings.HUBSPOT_API_KEY
+        self.api_base = (api_base or self.API_BASE).rstrip('/')
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._session = None
+
+    @property
+    def portal_key(self):
+        """Identify the portal targeted by the client without disclosing its api key."""
+        return get_portal_key(self.hubspot_api_key)
+
+    @property
+    def rate_limiter(self):
+        """The rate limiter shared by all the clients targeting the same portal."""
+        return get_rate_limiter(self.portal_key)
+
+    @property
+    def sync_client(self):
+        """The `HubspotClient` of the portal, shared by the whole process."""
+        return HubspotClient.for_portal(self.hubspot_api_key)
+
+    @property
+    def owner_directory(self):
+        """
+        See `HubspotClient.owner_directory`. It is loaded synchronously on first use, prefer the
+        coroutines of the helpers (ex: `AsyncDeal.get_owner`) from a running loop.
+        """
+        return self.sync_client.owner_directory
+
+    @property
+    def pipeline_registry(self):
+        """
+        See `HubspotClient.pipeline_registry`. It is loaded synchronously on first use, prefer the
+        coroutines of the helpers (ex: `AsyncDeal.get_deal_stage`) from a running loop.
+        """
+        return self.sync_client.pipeline_registry
+
+    @property
+    def session(self):
+        """The aiohttp session, created on first use as it has to be bound to a running loop."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'Accept-Encoding': 'gzip'},
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    @staticmethod
+    def _raise_for_status(result, request):
+        """Raise the same errors as hubspot3 depending on the status of the response."""
+        if result.status in (404, 410):
+            raise HubspotNotFound(result, request)
+        if result.status == 401:
+            raise HubspotUnauthorized(result, request)
+        if result.status == 409:
+            raise HubspotConflict(result, request)
+        if 400 <= result.status < 500 or result.status == 501:
+            raise HubspotBadRequest(result, request)
+        if result.status >= 500:
+            raise HubspotServerError(result, request)
+
+    async def _call(self, path, method='GET', params=None, data=None):
+        """
+        Perform a call to the Hubspot API.
+
+        Parameters
+        ----------
+        path: str
+            The path of the endpoint, ex: `companies/v2/companies/42`.
+        method: str, optional
+        params: dict or list of tuples, optional
+            The query string parameters. Lists are expanded, ex: `{'properties': ['a', 'b']}`.
+        data: optional
+            Will be sent as JSON.
+
+        Returns
+        -------
+        The decoded JSON response, or `None` if the response is empty.
+        """
+        await self.rate_limiter.acquire_async()
+
+        params = list(params.items() if isinstance(params, dict) else params or [])
+        params.append(('hapikey', self.hubspot_api_key))
+        url = f'{self.api_base}/{path}?{urlencode(params, doseq=True)}'
+        body = json.dumps(data) if data is not None else None
+        headers = {'Content-Type': 'application/json'}
+
+        request = {
+            'method': method,
+            'host': self.api_base,
+            'url': url,
+            'data': body,
+            'headers': headers,
+            'timeout': self.timeout,
+        }
+
+        try:
+            async with self.session.request(method, url, data=body, headers=headers) as response:
+                response_body = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise HubspotTimeout(None, request, e)
+
+        result = _Result(response.status, response.reason, response_body, response.headers)
+        self._raise_for_status(result, request)
+
+        if not response_body:
+            return None
+        return json.loads(response_body)
+
+    @staticmethod
+    def _properties_payload(data, name_key='name'):
+        return {
+            'properties': [
+                {
+                    name_key: name,
+                    'value': value,
+                }
+                for name, value in data.items()
+            ]
+        }
+
+    # Associations
+
+    async def get_associations(self, object_id, definition_id):
+        """
+        Retrieve the ids of the objects associated to an object.
+
+        Cf: https://developers.hubspot.com/docs/methods/crm-associations/get-associations
+        """
+        ids = []
+        offset = None
+        while True:
+            params = {'limit': 100}
+            if offset:
+                params['offset'] = offset
+            response = await self._call(
+                f'crm-associations/v1/associations/{object_id}/HUBSPOT_DEFINED/{definition_id}',
+                params=params,
+            )
+            ids.extend(response['results'])
+            if not response.get('hasMore'):
+                return ids
+            offset = response['offset']
+
+    async def create_association(self, from_object_id, to_object_id, definition_id):
+        return await self._call(
+            'crm-associations/v1/associations',
+            method='PUT',
+            data={
+                'fromObjectId': from_object_id,
+                'toObjectId': to_object_id,
+                'category': 'HUBSPOT_DEFINED',
+                'definitionId': definition_id,
+            },
+        )
+
+    # Company-related methods
+
+    async def get_company_data(self, company_id, params=None):
+        """Retrieve company data from a company id."""
+        return await self._call(f'companies/v2/companies/{company_id}', params=params)
+
+    async def create_company(self, company_data):
+        return await self._call(
+            'companies/v2/companies',
+            method='POST',
+            data=self._properties_payload(company_data),
+        )
+
+    async def update_company(self, company_id, company_data):
+        """Update a company on hubspot."""
+        return await self._call(
+            f'companies/v2/companies/{company_id}',
+            method='PUT',
+            data=self._properties_payload(company_data),
+        )
+
+    async def get_company_contacts(self, company_id):
+        """Retrieve the ids of the contacts related to a company."""
+        return await self.get_associations(company_id, ASSOCIATION_COMPANY_TO_CONTACT)
+
+    async def get_company_deals(self, company_id):
+        """Retrieve the ids of the deals related to a company."""
+        return await self.get_associations(company_id, ASSOCIATION_COMPANY_TO_DEAL)
+
+    # Contact-related methods
+
+    async def get_contact_data(self, contact_id, params=None):
+        """Retrieve contact data from a contact vid."""
+        return await self._call(f'contacts/v1/contact/vid/{contact_id}/profile', params=params)
+
+    async def get_contact_by_email(self, email):
+        """Retrieve a contact by its email address."""
+        return await self._call(f'contacts/v1/contact/email/{email}/profile')
+
+    async def create_contact(self, contact_data):
+        return await self._call(
+            'contacts/v1/contact',
+            method='POST',
+            data=self._properties_payload(contact_data, name_key='property'),
+        )
+
+    async def update_contact(self, contact_id, contact_data):
+        """Update a contact on hubspot."""
+        return await self._call(
+            f'contacts/v1/contact/vid/{contact_id}/profile',
+            method='POST',
+            data=self._properties_payload(contact_data, name_key='property'),
+        )
+
+    async def link_contact_to_company(self, contact_id, company_id):
+        return await self.create_association(
+            contact_id, company_id, ASSOCIATION_CONTACT_TO_COMPANY,
+        )
+
+    # Deal-related methods
+
+    async def get_deal_data(self, deal_id, params=None):
+        """Retrieve deal data from a deal id."""
+        return await self._call(f'deals/v1/deal/{deal_id}', params=params)
+
+    async def create_deal(self, deal_data, company_ids=None, contact_ids=None):
+        """Create a new deal on hubspot, see `HubspotClient.create_deal`."""
+        payload = self._properties_payload(deal_data)
+        payload['associations'] = {
+            'associatedCompanyIds': company_ids or [],
+            'associatedVids': contact_ids or [],
+        }
+        return await self._call('deals/v1/deal', method='POST', data=payload)
+
+    async def update_deal(self, deal_id, deal_data):
+        """Update a deal on hubspot."""
+        return await self._call(
+            f'deals/v1/deal/{deal_id}',
+            method='PUT',
+            data=self._properties_payload(deal_data),
+        )
+
+    async def get_deal_line_items(self, deal_id):
+        """Retrieve the ids of the line items related to a deal."""
+        return await self.get_associations(deal_id, ASSOCIATION_DEAL_TO_LINE_ITEM)
+
+    # Line items methods
+
+    async def get_line_items_batch(self, line_item_ids, properties=None):
+        """
+        Retrieve many line items at once, see `HubspotClient.get_line_items_batch`.
+
+        The chunks of line items are read concurrently.
+        """
+        responses = await asyncio.gather(*(
+            self._call(
+                'crm-objects/v1/objects/line_items/batch-read',
+                method='POST',
+                params={'properties': properties or []},
+                data={'ids': line_item_ids_chunk},
+            )
+            for line_item_ids_chunk in chunks(line_item_ids, constants.BATCH_READ_MAX_SIZE)
+        ))
+
+        line_items = {}
+        for response in responses:
+            line_items.update({
+                str(line_item_id): line_item
+                for line_item_id, line_item in (response or {}).items()
+            })
+        return line_items
+
+
+class AsyncHubspotAPIObject:
+    """
+    Make a helper fetchable with an `AsyncHubspotClient`.
+
+    Async helpers are never fetched on instantiation, use `await cls.get(...)` or
+    `await api_object.fetch_async()` instead. Once fetched, the accessors reading the properties
+    of the helpers (`name`, `email`, ...) are available as usual. The accessors of the related
+    objects (`company`, `contacts`, `products`, `owner`, ...) are available once fetched by the
+    matching coroutine (`get_company`, `get_contacts`, `get_products`, `get_owner`, ...).
+    """
+
+    def __init__(self, hubspot_id, fetch=False, hubspot_client=None, **kwargs):
+        if not isinstance(hubspot_client, AsyncHubspotClient):
+            raise TypeError(
+                f"A {self.__class__.__name__} requires an `AsyncHubspotClient`."
+            )
+        super().__init__(hubspot_id, fetch=False, hubspot_client=hubspot_client, **kwargs)
+
+    @classmethod
+    async def get(cls, hubspot_id, hubspot_client, **kwargs):
+        """Instantiate and fetch the api object."""
+        api_object = cls(hubspot_id, hubspot_client=hubspot_client, **kwargs)
+        await api_object.fetch_async()
+        return api_object
+
+    async def fetch_async(self, use_cache=True, properties=None, include_history=None):
+        """Same as `HubspotAPIObject.fetch`, using the asynchronous client."""
+        self._set_projection(properties, include_history)
+        object_cache = get_object_cache()
+
+        if use_cache and object_cache is not None:
+            api_object_content = object_cache.get(self.cache_key)
+            if api_object_content is not None:
+                self.api_object_content = api_object_content
+                return
+
+        logger.debug(
+            f"Fetching Hubspot API object of type '{self.__class__}' "
+            f"with id: {self.hubspot_id} ..."
+        )
+        try:
+            self.api_object_content = await self._fetch_api_object_async()
+        except HubspotNotFound:
+            raise ValueError(
+                f"Unable to find a {self.__class__} with Hubspot ID: {self.hubspot_id}"
+            )
+
+        if object_cache is not None:
+            object_cache.set(self.cache_key, self.api_object_content)
+
+    async def _fetch_api_object_async(self):
+        raise NotImplementedError
+
+    def fetch(self, use_cache=True, properties=None, include_history=None):
+        raise TypeError(f"Use `await {self.__class__.__name__}.fetch_async()` instead.")
+
+
+class AsyncContact(AsyncHubspotAPIObject, Contact):
+
+    async def _fetch_api_object_async(self):
+        return await self.client.get_contact_data(
+            self.hubspot_id, params=self._get_fetch_params(),
+        )
+
+
+class AsyncCompany(AsyncHubspotAPIObject, Company):
+
+    async def get_parent_company(self):
+        """
+        Fetch the parent of the company if it has one. It is then also available as
+        `parent_company`.
+        """
+        hs_parent_id = self._get_property_value('hs_parent_company_id')
+        parent_company = None
+        if hs_parent_id:
+            parent_company = await AsyncCompany.get(hs_parent_id, hubspot_client=self.client)
+
+        self.__dict__['parent_company'] = parent_company
+        return parent_company
+
+    async def get_contacts(self):
+        """
+        Fetch the contacts related to the company, concurrently. They are then also available
+        as `contacts`.
+        """
+        contacts_vids = await self.client.get_company_contacts(self.hubspot_id)
+        contacts = list(await asyncio.gather(*(
+            AsyncContact.get(vid, hubspot_client=self.client)
+            for vid in contacts_vids
+        )))
+
+        self.__dict__['contacts'] = contacts
+        return contacts
+
+    async def _fetch_api_object_async(self):
+        return await self.client.get_company_data(
+            self.hubspot_id, params=self._get_fetch_params(),
+        )
+
+
+class AsyncDeal(AsyncHubspotAPIObject, Deal):
+
+    async def get_company(self):
+        """Fetch the company linked to the deal. It is then also available as `company`."""
+        try:
+            company_id = self.api_object_content['associations']['associatedCompanyIds'][0]
+        except (KeyError, IndexError):
+            logger.error(
+                'Cannot retrieve a company id from the deal.',
+                extra={
+                    'hubspot_id': self.hubspot_id,
+                    'api_object_content': self.api_object_content,
+                }
+            )
+            company = None
+        else:
+            company = await AsyncCompany.get(company_id, hubspot_client=self.client)
+
+        self.__dict__['company'] = company
+        return company
+
+    async def get_contacts(self):
+        """
+        Fetch the contacts related to the deal, concurrently. They are then also available as
+        `contacts`.
+        """
+        try:
+            contacts_vids = self.api_object_content['associations']['associatedVids']
+        except KeyError:
+            logger.error(
+                'Cannot retrieve a contact visitor ids from the deal.',
+                extra={
+                    'hubspot_id': self.hubspot_id,
+                    'api_object_content': self.api_object_content,
+                }
+            )
+            contacts = None
+        else:
+            contacts = list(await asyncio.gather(*(
+                AsyncContact.get(vid, hubspot_client=self.client)
+                for vid in contacts_vids
+            )))
+
+        self.__dict__['contacts'] = contacts
+        return contacts
+
+    async def get_products(self, extra_properties=None):
+        """
+        Fetch the products associated to the deal. They are then also available as `products`.
+
+        See `Deal.products`.
+        """
+        properties_to_retrieve = list(self.PRODUCT_PROPERTIES)
+        if extra_properties:
+            properties_to_retrieve.extend(extra_properties)
+
+        lines_ids = await self.client.get_deal_line_items(self.hubspot_id)
+        lines_contents = await self.client.get_line_items_batch(
+            lines_ids,
+            properties=properties_to_retrieve,
+        )
+        self._set_products_from_lines(lines_ids, lines_contents)
+        return self._products
+
+    @property
+    def products(self):
+        """See `Deal.products`. The products have to be fetched by `get_products` first."""
+        if self._products is None:
+            raise TypeError(f"Use `await {self.__class__.__name__}.get_products()` first.")
+        return self._products
+
+    @cached_property
+    def owner(self):
+        """See `Deal.owner`. The owner is read from the owner directory of the portal."""
+        owner_id = self._get_property_value('hubspot_owner_id')
+        if not owner_id:
+            return None
+        return Owner(owner_id, hubspot_client=self.client.sync_client)
+
+    async def get_owner(self):
+        """
+        Fetch the owner of the deal, loading the owner directory of the portal in a thread if
+        needed. It is then also available as `owner`.
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, lambda: self.owner)
+
+    async def get_deal_stage(self):
+        """
+        Fetch the stage of the deal, loading the pipelines of the portal in a thread if needed.
+        It is then also available as `deal_stage`, and `closed_won` can be used.
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, lambda: self.deal_stage)
+
+    async def _fetch_api_object_async(self):
+        return await self.client.get_deal_data(
+            self.hubspot_id, params=self._get_fetch_params(),
+        )
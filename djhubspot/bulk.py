@@ -0,0 +1,168 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import time
+
+from .retry import use_retry_budget
+
+logger = logging.getLogger('vendors.dj_hubspot')
+
+
+class BulkItemResult:
+    """The outcome of a single operation run by a `BulkExecutor`."""
+
+    def __init__(self, item, result=None, error=None):
+        """
+        Parameters
+        ----------
+        item:
+            The argument the operation has been called with (or the tuple of its arguments if
+            there are many).
+        result:
+            What the operation returned, if it succeeded.
+        error: Exception, optional
+            What the operation raised, if it failed.
+        """
+        self.item = item
+        self.result = result
+        self.error = error
+
+    @property
+    def succeeded(self):
+        return self.error is None
+
+    def __repr__(self):
+        status = 'succeeded' if self.succeeded else f'failed: {self.error!r}'
+        return f'<BulkItemResult {self.item!r} {status}>'
+
+
+class BulkSummary:
+    """The outcome of all the operations run by a `BulkExecutor`."""
+
+    def __init__(self, results, duration):
+        """
+        Parameters
+        ----------
+        results: list of BulkItemResult
+            In the order the operations have been submitted.
+        duration: float
+            In seconds.
+        """
+        self.results = results
+        self.duration = duration
+
+    @property
+    def succeeded(self):
+        return [result for result in self.results if result.succeeded]
+
+    @property
+    def failed(self):
+        return [result for result in self.results if not result.succeeded]
+
+    @property
+    def errors(self):
+        return [result.error for result in self.failed]
+
+    def __len__(self):
+        return len(self.results)
+
+    def __repr__(self):
+        return (
+            f'<BulkSummary {len(self.succeeded)} succeeded, {len(self.failed)} failed '
+            f'in {self.duration:.2f}s>'
+        )
+
+
+class BulkExecutor:
+    """
+    Run many operations against the Hubspot API on a bounded pool of threads.
+
+    The calls performed by the operations still go through the rate limiter of the client, the
+    pool only allows to wait for several responses at the same time.
+
+    Example:
+    ```
+    with client.bulk(max_workers=8) as bulk:
+        for company_data in companies_data:
+            bulk.submit(client.create_company, company_data)
+
+    logger.info(bulk.summary)
+    ```
+    """
+
+    def __init__(self, max_workers=4, retry_budget=None):
+        """
+        Parameters
+        ----------
+        max_workers: int, optional
+            The maximum number of operations running at the same time.
+        retry_budget: djhubspot.retry.RetryBudget, optional
+            The retries allowed to the calls of all the operations, unlimited by default.
+        """
+        self.max_workers = max_workers
+        self.retry_budget = retry_budget
+        self.summary = None
+        self._pool = None
+        self._submitted = []
+        self._started_at = None
+
+    def __enter__(self):
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._submitted = []
+        self._started_at = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.summary = self.wait()
+
+    @staticmethod
+    def _run(operation, item, args, kwargs, retry_budget=None):
+        try:
+            with use_retry_budget(retry_budget):
+                return BulkItemResult(item, result=operation(*args, **kwargs))
+        except Exception as e:
+            logger.warning(
+                f"Bulk operation '{getattr(operation, '__name__', operation)}' failed.",
+                exc_info=True,
+                extra={'bulk_item': item},
+            )
+            return BulkItemResult(item, error=e)
+
+    def submit(self, operation, *args, **kwargs):
+        """Schedule `operation(*args, **kwargs)`."""
+        if self._pool is None:
+            raise RuntimeError("`BulkExecutor.submit` should be called inside a `with` block.")
+        item = args[0] if len(args) == 1 and not kwargs else args
+        self._submitted.append(
+            self._pool.submit(self._run, operation, item, args, kwargs, self.retry_budget),
+        )
+
+    def wait(self):
+        """
+        Wait for all the submitted operations to be done.
+
+        Returns
+        -------
+        BulkSummary
+        """
+        self._pool.shutdown(wait=True)
+        self._pool = None
+
+        summary = BulkSummary(
+            [future.result() for future in self._submitted],
+            duration=time.monotonic() - self._started_at,
+        )
+        logger.debug(f"Bulk operations done: {summary}")
+        return summary
+
+    def map(self, operation, items):
+        """
+        Call `operation(item)` for each of the given `items`.
+
+        Returns
+        -------
+        BulkSummary
+        """
+        with self:
+            for item in items:
+                self.submit(operation, item)
+        return self.summary
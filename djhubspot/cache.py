@@ -0,0 +1,227 @@
+from collections import OrderedDict
+import copy
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger('vendors.dj_hubspot')
+
+
+class BaseObjectCache:
+    """
+    Cache of the api object contents fetched from the Hubspot API.
+
+    Keys are tuples made of the portal, the type of the object, its hubspot id and the list of
+    the properties which have been fetched (see `HubspotAPIObject.cache_key`).
+
+    Subclasses have to implement `_get`, `_set`, `_delete` and `clear`.
+    """
+
+    def __init__(self, ttl=300, **kwargs):
+        """
+        Parameters
+        ----------
+        ttl: int, optional
+            For how long (in seconds) an api object content is kept in the cache.
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._counters_lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached api object content for `key` or `None`."""
+        value = self._get(key)
+        with self._counters_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self._set(key, value)
+
+    def delete(self, key):
+        self._delete(key)
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self):
+        """
+        Returns
+        -------
+        dict
+            The number of hits and misses since the instantiation of the cache.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def _get(self, key):
+        raise NotImplementedError
+
+    def _set(self, key, value):
+        raise NotImplementedError
+
+    def _delete(self, key):
+        raise NotImplementedError
+
+
+class LocMemObjectCache(BaseObjectCache):
+    """
+    An in-memory cache, local to the process, with LRU eviction and a TTL.
+    """
+
+    def __init__(self, max_size=1000, ttl=300, **kwargs):
+        """
+        Parameters
+        ----------
+        max_size: int, optional
+            The maximum number of api object contents to keep. The least recently used ones are
+            evicted first.
+        ttl: int, optional
+        """
+        super().__init__(ttl=ttl, **kwargs)
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            try:
+                expires_at, value = self._entries[key]
+            except KeyError:
+                return None
+
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+
+        # Api object contents are mutable, we don't want the callers to alter the cached ones.
+        return copy.deepcopy(value)
+
+    def _set(self, key, value):
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DjangoObjectCache(BaseObjectCache):
+    """
+    A cache relying on one of the caches configured in the `CACHES` setting.
+
+    This allows to share the cached api object contents between processes, for instance by
+    using memcached or redis. Size and eviction are handled by the Django cache backend.
+    """
+
+    def __init__(self, alias='default', ttl=300, key_prefix='djhubspot:object', **kwargs):
+        """
+        Parameters
+        ----------
+        alias: str, optional
+            The alias of the Django cache to use.
+        ttl: int, optional
+        key_prefix: str, optional
+        """
+        super().__init__(ttl=ttl, **kwargs)
+        self.alias = alias
+        self.key_prefix = key_prefix
+
+    @property
+    def cache(self):
+        from django.core.cache import caches
+        return caches[self.alias]
+
+    def make_key(self, key):
+        # Keys are hashed as some backends (ex: memcached) restrict the allowed characters.
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return f'{self.key_prefix}:{digest}'
+
+    def _get(self, key):
+        return self.cache.get(self.make_key(key))
+
+    def _set(self, key, value):
+        self.cache.set(self.make_key(key), value, self.ttl)
+
+    def _delete(self, key):
+        self.cache.delete(self.make_key(key))
+
+    def clear(self):
+        # We cannot delete only our keys from a shared cache, they will expire by themselves.
+        logger.warning("Clearing a `DjangoObjectCache` is not supported, waiting for the TTL.")
+
+
+_object_cache = None
+_object_cache_lock = threading.Lock()
+
+
+def get_object_cache():
+    """
+    Return the process-wide object cache, as configured by the `HUBSPOT_OBJECT_CACHE` setting.
+
+    Example:
+    ```
+    HUBSPOT_OBJECT_CACHE = {
+        'BACKEND': 'djhubspot.cache.LocMemObjectCache',
+        'OPTIONS': {
+            'max_size': 5000,
+            'ttl': 600,
+        },
+    }
+    ```
+
+    Returns
+    -------
+    BaseObjectCache or None
+        `None` if the cache is not enabled.
+    """
+    global _object_cache
+
+    if _object_cache is None:
+        config = getattr(settings, 'HUBSPOT_OBJECT_CACHE', None)
+        if not config:
+            return None
+
+        with _object_cache_lock:
+            if _object_cache is None:
+                backend_class = import_string(config['BACKEND'])
+                _object_cache = backend_class(**config.get('OPTIONS', {}))
+
+    return _object_cache
+
+
+def set_object_cache(object_cache):
+    """
+    Replace the process-wide object cache.
+
+    Parameters
+    ----------
+    object_cache: BaseObjectCache or None
+        `None` resets the cache, which will be built again from the settings on next use.
+    """
+    global _object_cache
+    with _object_cache_lock:
+        _object_cache = object_cache
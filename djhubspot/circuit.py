@@ -0,0 +1,241 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+from hubspot3.error import HubspotError, HubspotServerError, HubspotTimeout
+
+from .errors import HubspotCircuitOpen
+from .utils import register_after_fork
+
+logger = logging.getLogger('vendors.dj_hubspot')
+
+
+class Circuit:
+    """The state of the circuit of an endpoint family."""
+
+    def __init__(self):
+        self.state = CircuitBreaker.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+
+class CircuitBreaker:
+    """
+    Stop calling the endpoints of the Hubspot API which keep failing, instead of waiting for each
+    of their calls to time out.
+
+    The endpoints are grouped by family (ex: `companies`, `crm/v3/objects`), each family having
+    its own circuit. Once `failure_threshold` consecutive calls of a family failed (server error,
+    timeout, socket error), its circuit opens: its calls fail immediately with
+    `HubspotCircuitOpen` for `recovery_timeout` seconds. A single call is then let through, the
+    probe: the circuit closes if it succeeds, and opens again otherwise.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    # Errors meaning that the API is unavailable. Other errors (ex: 404) mean that it responds.
+    # `OSError` covers the socket errors raised as is by `http.client` (connection errors,
+    # `socket.timeout`, `socket.gaierror`, ...).
+    FAILURE_ERRORS = (HubspotServerError, HubspotTimeout, OSError)
+
+    def __init__(
+        self, failure_threshold=5, recovery_timeout=30, family_thresholds=None,
+        clock=time.monotonic,
+    ):
+        """
+        Parameters
+        ----------
+        failure_threshold: int, optional
+            How many consecutive calls of a family should fail to open its circuit, `None` to
+            disable the circuit breaker.
+        recovery_timeout: float, optional
+            How many seconds a circuit stays open before a probe is let through.
+        family_thresholds: dict, optional
+            The failure threshold of some families, by family.
+        clock: callable, optional
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.family_thresholds = family_thresholds or {}
+        self.clock = clock
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_family(path):
+        """
+        Return the family of an endpoint: the first segment of its path (ex: `companies` for
+        `companies/v2/companies/42`), or its first three segments for the CRM API (ex:
+        `crm/v3/objects` for `crm/v3/objects/deals/batch/read`).
+        """
+        segments = path.strip('/').split('/')
+        if segments[0] == 'crm':
+            return '/'.join(segments[:3])
+        return segments[0]
+
+    def get_threshold(self, family):
+        return self.family_thresholds.get(family, self.failure_threshold)
+
+    def get_state(self, family):
+        """
+        Returns
+        -------
+        str
+            `closed`, `open` or `half_open`.
+        """
+        with self._lock:
+            circuit = self._circuits.get(family)
+            return circuit.state if circuit else self.CLOSED
+
+    def before_call(self, family):
+        """
+        Check whether a call of the given family could be performed.
+
+        Raises
+        ------
+        HubspotCircuitOpen
+            If the circuit of the family is open, or if its probe is in progress.
+        """
+        with self._lock:
+            circuit = self._circuits.setdefault(family, Circuit())
+            if circuit.state == self.CLOSED:
+                return
+
+            retry_in = max(0.0, circuit.opened_at + self.recovery_timeout - self.clock())
+            if circuit.state == self.OPEN and not retry_in:
+                logger.info(f"Probing the Hubspot '{family}' endpoints ...")
+                circuit.state = self.HALF_OPEN
+                circuit.probing = True
+                return
+        raise HubspotCircuitOpen(family, retry_in)
+
+    def record_success(self, family):
+        with self._lock:
+            circuit = self._circuits.setdefault(family, Circuit())
+            if circuit.state != self.CLOSED:
+                logger.info(f"The Hubspot '{family}' endpoints recovered, closing the circuit.")
+            circuit.state = self.CLOSED
+            circuit.failures = 0
+            circuit.probing = False
+
+    def record_failure(self, family):
+        with self._lock:
+            circuit = self._circuits.setdefault(family, Circuit())
+            circuit.failures += 1
+            if circuit.state == self.HALF_OPEN or (
+                circuit.state == self.CLOSED and circuit.failures >= self.get_threshold(family)
+            ):
+                logger.warning(
+                    f"{circuit.failures} consecutive call(s) to the Hubspot '{family}' endpoints "
+                    f"failed, opening the circuit for {self.recovery_timeout}s."
+                )
+                circuit.state = self.OPEN
+                circuit.opened_at = self.clock()
+                circuit.probing = False
+
+    def release_probe(self, family):
+        """Let another call probe the family, the probe did not reach the API."""
+        with self._lock:
+            circuit = self._circuits.setdefault(family, Circuit())
+            if circuit.probing:
+                circuit.state = self.OPEN
+                circuit.opened_at = self.clock() - self.recovery_timeout
+                circuit.probing = False
+
+    def protect(self, call, get_path, metrics=None):
+        """
+        Wrap `BaseClient._call_raw` in order to fail fast while the circuit of its endpoints is
+        open.
+
+        Parameters
+        ----------
+        call: callable
+        get_path: callable
+            Return the path of the endpoint of a call, from its subpath (`BaseClient._get_path`).
+        metrics: djhubspot.metrics.ClientMetrics, optional
+            Where the calls `rejected` by an open circuit are counted.
+
+        Returns
+        -------
+        callable
+        """
+        if self.failure_threshold is None:
+            return call
+
+        def protected_call(subpath, *args, **kwargs):
+            family = self.get_family(get_path(subpath))
+            try:
+                self.before_call(family)
+            except HubspotCircuitOpen:
+                if metrics is not None:
+                    metrics.increment('rejected')
+                raise
+
+            try:
+                result = call(subpath, *args, **kwargs)
+            except self.FAILURE_ERRORS:
+                self.record_failure(family)
+                raise
+            except HubspotError:
+                self.record_success(family)
+                raise
+            except Exception:
+                self.release_probe(family)
+                raise
+            self.record_success(family)
+            return result
+
+        return protected_call
+
+    def after_fork(self):
+        self._lock = threading.Lock()
+
+
+_circuit_breakers = {}
+_circuit_breakers_lock = threading.Lock()
+
+
+@register_after_fork
+def _reset_locks():
+    global _circuit_breakers_lock
+    _circuit_breakers_lock = threading.Lock()
+    for circuit_breaker in _circuit_breakers.values():
+        circuit_breaker.after_fork()
+
+
+def get_circuit_breaker(portal_key):
+    """
+    Return the circuit breaker of a portal, shared by the whole process.
+
+    The circuit breaker is configured by the `HUBSPOT_CIRCUIT_BREAKER` setting:
+    ```
+    HUBSPOT_CIRCUIT_BREAKER = {
+        'FAILURE_THRESHOLD': 5,
+        'RECOVERY_TIMEOUT': 30,
+        'FAMILY_THRESHOLDS': {'crm/v3/objects': 10},
+    }
+    ```
+
+    Parameters
+    ----------
+    portal_key: str
+        See `HubspotClient.portal_key`.
+
+    Returns
+    -------
+    CircuitBreaker
+    """
+    with _circuit_breakers_lock:
+        if portal_key not in _circuit_breakers:
+            config = getattr(settings, 'HUBSPOT_CIRCUIT_BREAKER', None) or {}
+            _circuit_breakers[portal_key] = CircuitBreaker(
+                failure_threshold=config.get('FAILURE_THRESHOLD', 5),
+                recovery_timeout=config.get('RECOVERY_TIMEOUT', 30),
+                family_thresholds=config.get('FAMILY_THRESHOLDS'),
+            )
+        return _circuit_breakers[portal_key]
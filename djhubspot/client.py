@@ -1,15 +1,18 @@
-from collections import defaultdict
 import logging
+import threading
 import time
+import warnings
 
 from django.conf import settings
 
 from hubspot3.associations import AssociationsClient
+from hubspot3.base import BaseClient
 from hubspot3.companies import CompaniesClient
 from hubspot3.contacts import ContactsClient
 from hubspot3.deals import DealsClient
 from hubspot3.engagements import EngagementsClient
 from hubspot3.error import HubspotBadRequest, HubspotServerError
+from hubspot3.globals import OBJECT_TYPE_COMPANIES, OBJECT_TYPE_CONTACTS, OBJECT_TYPE_DEALS
 from hubspot3.lines import LinesClient
 from hubspot3.owners import OwnersClient
 from hubspot3.pipelines import PipelinesClient
@@ -17,8 +20,71 @@ from hubspot3.products import ProductsClient
 from hubspot3.properties import PropertiesClient
 from hubspot3.property_groups import PropertyGroupsClient
 
+from .bulk import BulkExecutor
+from .circuit import get_circuit_breaker
+from .metrics import ClientMetrics
+from .owners import get_owner_directory
+from .paging import HubspotPager
+from .pipelines import get_pipeline_registry
+from .ratelimit import get_rate_limiter
+from .retry import get_retry_policy
+from .schemas import get_property_schema
+from .transport import get_transport
+from .upserts import BatchUpserter
+from .utils import chunks, get_portal_key, get_property_value, register_after_fork
+
+from . import constants
+
 logger = logging.getLogger('vendors.dj_hubspot')
 
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+@register_after_fork
+def _reset_clients():
+    # The clients are kept, their transports forget the connections of the parent process.
+    global _clients_lock
+    _clients_lock = threading.Lock()
+    for client in _clients.values():
+        client.metrics.after_fork()
+
+
+class _DeprecatedAttribute:
+    """A class attribute raising a `DeprecationWarning` when it is read."""
+
+    def __init__(self, value, message):
+        self.value = value
+        self.message = message
+
+    def __get__(self, instance, owner):
+        warnings.warn(self.message, DeprecationWarning, stacklevel=2)
+        return self.value
+
+
+class CRMObjectsClient(BaseClient):
+    """
+    hubspot3 does not provide any client for the v3 CRM objects API, which has the batch
+    endpoints.
+
+    Cf: https://developers.hubspot.com/docs/api/crm/understanding-the-crm
+    """
+
+    def _get_path(self, subpath):
+        return f'crm/v3/objects/{subpath}'
+
+
+class CRMAssociationsClient(BaseClient):
+    """
+    hubspot3 does not provide any client for the v3 CRM associations API, which reads the
+    associations of many objects at once.
+
+    Cf: https://developers.hubspot.com/docs/api/crm/associations
+    """
+
+    def _get_path(self, subpath):
+        return f'crm/v3/associations/{subpath}'
+
 
 class HubspotClient:
     """
@@ -26,15 +92,41 @@ class HubspotClient:
 
     - HUBSPOT_API_KEY
 
+    Optional settings:
+
+    - HUBSPOT_CIRCUIT_BREAKER (see `djhubspot.circuit.get_circuit_breaker`)
+    - HUBSPOT_RATE_LIMIT (see `djhubspot.ratelimit.get_rate_limiter`)
+    - HUBSPOT_RETRY (see `djhubspot.retry.get_retry_policy`)
+    - HUBSPOT_TRANSPORT (see `djhubspot.transport.get_transport`)
+
+    Use `HubspotClient.for_portal` to get the long-lived client of a portal, shared by the whole
+    process, instead of instantiating a new one for each operation.
     """
-    POST_REQUEST_DELAY = 1  # in seconds
+
+    # Deprecated: the calls are throttled by the `rate_limiter` of the client, see `wait`.
+    POST_REQUEST_DELAY = _DeprecatedAttribute(
+        1,
+        "`HubspotClient.POST_REQUEST_DELAY` is deprecated, calls are throttled by the rate "
+        "limiter.",
+    )
 
     def wait(self, delay=None):
-        time.sleep(delay or self.POST_REQUEST_DELAY)
+        """
+        Deprecated: the calls performed through the hubspot3 clients are throttled by the
+        `rate_limiter` of the client, there is no need to wait between them anymore.
+        """
+        warnings.warn(
+            "`HubspotClient.wait` is deprecated, calls are throttled by the rate limiter.",
+            DeprecationWarning,
+        )
+        if delay:
+            time.sleep(delay)
 
     _associations_client = None
     _companies_client = None
     _contacts_client = None
+    _crm_associations_client = None
+    _crm_objects_client = None
     _deals_client = None
     _engagements_client = None
     _lines_client = None
@@ -44,23 +136,7 @@ class HubspotClient:
     _property_groups_client = None
     _pipelines_client = None
 
-    _mappings = {
-        'companies': defaultdict(
-
-            # property names are at this level
-            lambda: defaultdict(
-
-                # property values are at this level
-                lambda: defaultdict(
-
-                    # company ids are at this level
-                    lambda: []
-                )
-            )
-        ),  # lets us do self._mappings['companies']['key']['value'].append(id) in one pass  # noqa
-    }
-
-    def __init__(self, hubspot_api_key=None):
+    def __init__(self, hubspot_api_key=None, retry_policy=None):
         """
         Instantiate the hubspot client.
 
@@ -68,66 +144,329 @@ class HubspotClient:
         ----------
         hubspot_api_key (optional)
             Could be used to instantiate the client by using a key different from the settings.
+        retry_policy: djhubspot.retry.RetryPolicy, optional
+            How the failed calls are retried, defaults to the `HUBSPOT_RETRY` setting.
         """
         self.hubspot_api_key = hubspot_api_key or settings.HUBSPOT_API_KEY
+        self.retry_policy = retry_policy or get_retry_policy()
+        self.metrics = ClientMetrics()
+
+    @classmethod
+    def for_portal(cls, hubspot_api_key=None):
+        """
+        Return the client of the portal targeted by the given api key, shared by the whole
+        process.
+
+        The client keeps its hubspot3 clients, and so its persistent connections and its caches,
+        between the operations, and counts all their calls in its `metrics`. It lives until it is
+        closed, see `close`.
+
+        Parameters
+        ----------
+        hubspot_api_key: str, optional
+            Defaults to the `HUBSPOT_API_KEY` setting.
+
+        Returns
+        -------
+        HubspotClient
+        """
+        key = (cls, hubspot_api_key or settings.HUBSPOT_API_KEY)
+        with _clients_lock:
+            if key not in _clients:
+                _clients[key] = cls(hubspot_api_key=key[1])
+            return _clients[key]
+
+    @classmethod
+    def close_all(cls):
+        """Close all the clients returned by `for_portal`."""
+        with _clients_lock:
+            clients = list(_clients.values())
+        for client in clients:
+            client.close()
+
+    def close(self):
+        """
+        Close the idle connections of the portal and drop the hubspot3 clients.
+
+        A client returned by `for_portal` is forgotten, the next call to `for_portal` returns a
+        new one.
+        """
+        with _clients_lock:
+            key = (self.__class__, self.hubspot_api_key)
+            if _clients.get(key) is self:
+                del _clients[key]
+
+        for name in list(vars(self)):
+            if name.startswith('_') and name.endswith('_client'):
+                delattr(self, name)
+        self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def portal_key(self):
+        """Identify the portal targeted by the client without disclosing its api key."""
+        return get_portal_key(self.hubspot_api_key)
+
+    @property
+    def rate_limiter(self):
+        """The rate limiter shared by all the clients targeting the same portal."""
+        return get_rate_limiter(self.portal_key)
+
+    @property
+    def circuit_breaker(self):
+        """The circuit breaker shared by all the clients targeting the same portal."""
+        return get_circuit_breaker(self.portal_key)
+
+    @property
+    def transport(self):
+        """The persistent connections shared by all the clients targeting the same portal."""
+        return get_transport(self.portal_key)
+
+    def _build_client(self, client_class):
+        """
+        Instantiate a hubspot3 client, making its calls go through the rate limiter, over the
+        persistent connections of the transport. The calls are counted in the `metrics`, and
+        retried according to the `retry_policy`. They fail fast while the `circuit_breaker` of
+        their endpoints is open.
+
+        All the hubspot3 clients perform their calls through `BaseClient._call_raw`, which is
+        wrapped at the instance level. Each attempt goes through the circuit breaker, then the
+        rate limiter.
+        """
+        client = self.transport.install(client_class(api_key=self.hubspot_api_key))
+        # The retries are left to the retry policy, hubspot3 would retry the GET calls on its own.
+        client.options['number_retries'] = 0
+        call = self.rate_limiter.throttle(self.metrics.instrument(client._call_raw))
+        call = self.circuit_breaker.protect(call, client._get_path, metrics=self.metrics)
+        client._call_raw = self.retry_policy.wrap(call, metrics=self.metrics)
+        return client
 
     # TODO: We could simplify the following lines by using @property instead of getters.
 
     def get_associations_client(self):
         if not self._associations_client:
-            self._associations_client = AssociationsClient(api_key=self.hubspot_api_key)
+            self._associations_client = self._build_client(AssociationsClient)
         return self._associations_client
 
     def get_property_groups_client(self):
         if not self._property_groups_client:
-            self._property_groups_client = PropertyGroupsClient(api_key=self.hubspot_api_key)
+            self._property_groups_client = self._build_client(PropertyGroupsClient)
         return self._property_groups_client
 
     def get_properties_client(self):
         if not self._properties_client:
-            self._properties_client = PropertiesClient(api_key=self.hubspot_api_key)
+            self._properties_client = self._build_client(PropertiesClient)
         return self._properties_client
 
+    def get_property_schema(self, object_type):
+        """
+        The definitions of the properties of the given type of object, shared by all the clients
+        targeting the same portal.
+
+        Parameters
+        ----------
+        object_type: str
+            One of `companies`, `contacts`, `deals`, `products`.
+
+        Returns
+        -------
+        djhubspot.schemas.PropertySchema
+        """
+        return get_property_schema(self, object_type)
+
+    def clean_properties(self, object_type, data, validate=None):
+        """
+        Check and convert the given property values against the property schema of the portal.
+
+        Parameters
+        ----------
+        object_type: str
+        data: dict
+            Values by property name.
+        validate: bool, optional
+            Whether to validate the data, defaults to the `HUBSPOT_VALIDATE_PROPERTIES` setting.
+
+        Returns
+        -------
+        dict
+
+        Raises
+        ------
+        djhubspot.errors.HubspotValidationError
+        """
+        if validate is None:
+            validate = getattr(settings, 'HUBSPOT_VALIDATE_PROPERTIES', False)
+        if not validate:
+            return data
+        return self.get_property_schema(object_type).clean(data)
+
     def get_products_client(self):
         if not self._products_client:
-            self._products_client = ProductsClient(api_key=self.hubspot_api_key)
+            self._products_client = self._build_client(ProductsClient)
         return self._products_client
 
     def get_companies_client(self):
         if not self._companies_client:
-            self._companies_client = CompaniesClient(api_key=self.hubspot_api_key)
+            self._companies_client = self._build_client(CompaniesClient)
         return self._companies_client
 
     def get_contacts_client(self):
         if not self._contacts_client:
-            self._contacts_client = ContactsClient(api_key=self.hubspot_api_key)
+            self._contacts_client = self._build_client(ContactsClient)
         return self._contacts_client
 
+    def get_crm_associations_client(self):
+        if not self._crm_associations_client:
+            self._crm_associations_client = self._build_client(CRMAssociationsClient)
+        return self._crm_associations_client
+
+    def get_crm_objects_client(self):
+        if not self._crm_objects_client:
+            self._crm_objects_client = self._build_client(CRMObjectsClient)
+        return self._crm_objects_client
+
     def get_deals_client(self):
         if not self._deals_client:
-            self._deals_client = DealsClient(api_key=self.hubspot_api_key)
+            self._deals_client = self._build_client(DealsClient)
         return self._deals_client
 
     def get_engagements_client(self):
         if not self._engagements_client:
-            self._engagements_client = EngagementsClient(api_key=self.hubspot_api_key)
+            self._engagements_client = self._build_client(EngagementsClient)
         return self._engagements_client
 
     def get_owners_client(self):
         if not self._owners_client:
-            self._owners_client = OwnersClient(api_key=self.hubspot_api_key)
+            self._owners_client = self._build_client(OwnersClient)
         return self._owners_client
 
     def get_lines_client(self):
         if not self._lines_client:
-            self._lines_client = LinesClient(api_key=self.hubspot_api_key)
+            self._lines_client = self._build_client(LinesClient)
         return self._lines_client
 
     def get_pipelines_client(self):
         if not self._pipelines_client:
-            self._pipelines_client = PipelinesClient(api_key=self.hubspot_api_key)
+            self._pipelines_client = self._build_client(PipelinesClient)
         return self._pipelines_client
 
+    @property
+    def owner_directory(self):
+        """
+        The owners of the portal, shared by all the clients targeting the same portal.
+
+        Returns
+        -------
+        djhubspot.owners.OwnerDirectory
+        """
+        return get_owner_directory(self)
+
+    @property
+    def pipeline_registry(self):
+        """
+        The deal pipelines of the portal and their stages, shared by all the clients targeting the
+        same portal.
+
+        Returns
+        -------
+        djhubspot.pipelines.DealPipelineRegistry
+        """
+        return get_pipeline_registry(self)
+
+    # Bulk operations
+
+    BULK_MAX_WORKERS = 4
+
+    def bulk(self, max_workers=None):
+        """
+        Return an executor running many operations concurrently, under the rate limit of the
+        portal. The retries of its calls are limited by the `BULK_BUDGET` of the retry policy.
+
+        Example:
+        ```
+        with client.bulk() as bulk:
+            for company_data in companies_data:
+                bulk.submit(client.create_company, company_data)
+        summary = bulk.summary
+        ```
+
+        Parameters
+        ----------
+        max_workers: int, optional
+            Defaults to `BULK_MAX_WORKERS`.
+
+        Returns
+        -------
+        djhubspot.bulk.BulkExecutor
+        """
+        return BulkExecutor(
+            max_workers=max_workers or self.BULK_MAX_WORKERS,
+            retry_budget=self.retry_policy.new_budget(),
+        )
+
+    def upsert_contacts(self, records, id_property='email', validate=None, retry_updates=False):
+        """
+        Create or update many contacts through the batch endpoints of the API.
+
+        Example:
+        ```
+        summary = client.upsert_contacts([
+            {'email': 'jane@acme.com', 'firstname': 'Jane'},
+            {'email': 'john@acme.com', 'firstname': 'John'},
+        ])
+        for result in summary.results:
+            print(result.item['email'], result.result or result.error)
+        ```
+
+        Parameters
+        ----------
+        records: iterable of dict
+            The property values of the contacts, by name.
+        id_property: str, optional
+            The unique property used to match the existing contacts. `None` in order to match
+            them on their hubspot id, given as `hs_object_id`.
+        validate: bool, optional
+            Check and convert the records locally, see `clean_properties`.
+        retry_updates: bool, optional
+            Retry the batch updates failing because of a transient error, see `BatchUpserter`.
+
+        Returns
+        -------
+        djhubspot.bulk.BulkSummary
+            The result of each record is the hubspot id of the contact, in the order of the
+            records.
+        """
+        return BatchUpserter(
+            self, OBJECT_TYPE_CONTACTS, id_property, validate, retry_updates=retry_updates,
+        ).upsert(records)
+
+    def upsert_companies(self, records, id_property=None, validate=None, retry_updates=False):
+        """
+        Create or update many companies through the batch endpoints of the API.
+
+        See `upsert_contacts`. By default, companies are matched on their hubspot id, given as
+        `hs_object_id`, the records without it being created.
+        """
+        return BatchUpserter(
+            self, OBJECT_TYPE_COMPANIES, id_property, validate, retry_updates=retry_updates,
+        ).upsert(records)
+
+    def upsert_deals(self, records, id_property=None, validate=None, retry_updates=False):
+        """
+        Create or update many deals through the batch endpoints of the API.
+
+        See `upsert_contacts`. By default, deals are matched on their hubspot id, given as
+        `hs_object_id`, the records without it being created.
+        """
+        return BatchUpserter(
+            self, OBJECT_TYPE_DEALS, id_property, validate, retry_updates=retry_updates,
+        ).upsert(records)
+
     # Property-related methods
 
     def _get_properties_raw_data(self, force_fetch=False):
@@ -191,14 +530,19 @@ class HubspotClient:
             })
 
         prop_client.create(**params)
+        self.get_property_schema(object_type).invalidate()
 
     def delete_property(self, object_type, code):
         prop_client = self.get_properties_client()
-        return prop_client.delete(object_type, code)
+        result = prop_client.delete(object_type, code)
+        self.get_property_schema(object_type).invalidate()
+        return result
 
     def delete_all_custom_properties(self, object_type):
         prop_client = self.get_properties_client()
-        return prop_client.delete_all_custom(object_type)
+        result = prop_client.delete_all_custom(object_type)
+        self.get_property_schema(object_type).invalidate()
+        return result
 
     def create_property_group(self, object_type, code, label):
         """
@@ -229,9 +573,50 @@ class HubspotClient:
 
     # FIXME: Allow to add property.
     def get_all_products(self):
+        """Retrieve all the products at once. Prefer `iter_products` for large portals."""
         product_client = self.get_products_client()
         return product_client.get_all()
 
+    def iter_products(self, properties=None, page_size=None, offset=None,
+                      include_deleted=False):
+        """
+        Iterate lazily over all the products of the portal.
+
+        Cf: https://developers.hubspot.com/docs/methods/products/get-all-products
+
+        Parameters
+        ----------
+        properties: list, optional
+            The names of the properties to retrieve for each product.
+        page_size: int, optional
+            Defaults to (and cannot exceed) `constants.PRODUCTS_PAGE_MAX_SIZE`.
+        offset: optional
+            Could be used to resume a previous iteration, see `HubspotPager`.
+        include_deleted: bool, optional
+
+        Returns
+        -------
+        djhubspot.paging.HubspotPager
+            Iterating over the api object contents of the products.
+        """
+        prod_client = self.get_products_client()
+        page_size = min(page_size or constants.PRODUCTS_PAGE_MAX_SIZE,
+                        constants.PRODUCTS_PAGE_MAX_SIZE)
+
+        def fetch_page(offset):
+            params = {'limit': page_size, 'properties': properties or []}
+            if offset:
+                params['offset'] = offset
+            batch = prod_client._call('paged', params=params, doseq=True)
+            products = [
+                product
+                for product in batch['objects']
+                if include_deleted or not product.get('isDeleted')
+            ]
+            return products, batch['offset'], batch['hasMore']
+
+        return HubspotPager(fetch_page, offset=offset)
+
     def create_product(self, name, description, price, custom_fields=None):
         prod_client = self.get_products_client()
         prod_data = {
@@ -258,32 +643,122 @@ class HubspotClient:
         return self.get_companies_client().get(company_id)
 
     def get_all_companies(self, extra_props=None):
+        """Retrieve all the companies at once. Prefer `iter_companies` for large portals."""
         comp_client = self.get_companies_client()
         return comp_client.get_all(extra_props=extra_props or [])
 
-    def _get_companies_mapping(self, prop_name, force_reindex=False):
-        if force_reindex or len(self._mappings['companies'][prop_name]) == 0:
+    def iter_companies(self, properties=None, page_size=None, offset=None,
+                       include_deleted=False):
+        """
+        Iterate lazily over all the companies of the portal.
 
-            print("/!\\ Indexing Hubspot companies on '%s' property" % prop_name, end='')
+        Cf: https://developers.hubspot.com/docs/methods/companies/get-all-companies
 
-            mapping = defaultdict(lambda: [])
-            all_companies = self.get_all_companies(extra_props=[prop_name])
-            for company in all_companies:
-                company_id = company.get('id')
-                prop_value = company.get(prop_name)
-                if company_id and prop_value:
-                    mapping[prop_value].append(company_id)
+        Parameters
+        ----------
+        properties: list, optional
+            The names of the properties to retrieve for each company.
+        page_size: int, optional
+            Defaults to (and cannot exceed) `constants.COMPANIES_PAGE_MAX_SIZE`.
+        offset: optional
+            Could be used to resume a previous iteration, see `HubspotPager`.
+        include_deleted: bool, optional
 
-                    print(".", end='')
+        Returns
+        -------
+        djhubspot.paging.HubspotPager
+            Iterating over the api object contents of the companies.
+        """
+        comp_client = self.get_companies_client()
+        page_size = min(page_size or constants.COMPANIES_PAGE_MAX_SIZE,
+                        constants.COMPANIES_PAGE_MAX_SIZE)
+
+        def fetch_page(offset):
+            params = {'limit': page_size, 'properties': properties or []}
+            if offset:
+                params['offset'] = offset
+            batch = comp_client._call('companies/paged', params=params, doseq=True)
+            companies = [
+                company
+                for company in batch['companies']
+                if include_deleted or not company.get('isDeleted')
+            ]
+            return companies, batch['offset'], batch['has-more']
 
-            print("Indexing completed /!\\")
+        return HubspotPager(fetch_page, offset=offset)
+
+    def get_recently_modified_companies(self, since):
+        """
+        Retrieve the companies modified since the given hubspot timestamp.
 
-            self._mappings['companies'][prop_name] = mapping
-        return self._mappings['companies'][prop_name]
+        Cf: https://developers.hubspot.com/docs/methods/companies/get_companies_modified
+
+        Notes: Hubspot only returns the companies modified during the last 30 days.
+
+        Parameters
+        ----------
+        since: int
+            An hubspot timestamp (in milliseconds).
+
+        Returns
+        -------
+        list of dict
+            The api object contents of the companies, including the deleted ones.
+        """
+        return list(self.iter_recently_modified_companies(since))
+
+    def iter_recently_modified_companies(self, since, properties=None):
+        """
+        Iterate lazily over the companies modified since the given hubspot timestamp, see
+        `get_recently_modified_companies`.
+
+        Parameters
+        ----------
+        since: int
+            An hubspot timestamp (in milliseconds).
+        properties: list, optional
+            Unused: this endpoint always returns all the properties of the companies.
+
+        Returns
+        -------
+        djhubspot.paging.HubspotPager
+        """
+        comp_client = self.get_companies_client()
+
+        def fetch_page(offset):
+            batch = comp_client._call('companies/recent/modified', params={
+                'count': constants.RECENTLY_MODIFIED_PAGE_MAX_SIZE,
+                'offset': offset or 0,
+                'since': since,
+            })
+            return batch['results'], batch['offset'], batch['hasMore']
+
+        return HubspotPager(fetch_page)
+
+    @property
+    def company_index(self):
+        """
+        The persistent index of the companies of the portal by property value.
+
+        Returns
+        -------
+        djhubspot.indexes.CompanyPropertyIndex
+        """
+        # The index relies on models, which cannot be imported before the apps are loaded.
+        from .indexes import CompanyPropertyIndex
+        return CompanyPropertyIndex(self)
+
+    def reindex_companies(self, prop_name):
+        """Rebuild the index of the companies on the given property from scratch."""
+        self.company_index.build(prop_name)
 
     def filter_companies(self, prop_name, prop_value):
-        mapping = self._get_companies_mapping(prop_name)
-        return mapping.get(prop_value, mapping.get(str(prop_value)))
+        """
+        Return the ids of the companies having the given value for the given property.
+
+        See `djhubspot.indexes.CompanyPropertyIndex.lookup`.
+        """
+        return self.company_index.lookup(prop_name, prop_value)
 
     def get_company_id_by_property_value(self, prop_name, prop_value):
         try:
@@ -291,7 +766,17 @@ class HubspotClient:
         except (TypeError, IndexError):
             return None
 
-    def create_company(self, company_data, **options):
+    def create_company(self, company_data, validate=None, **options):
+        """
+        Create a company on hubspot.
+
+        Parameters
+        ----------
+        company_data: dict
+        validate: bool, optional
+            Check and convert the data locally, see `clean_properties`.
+        """
+        company_data = self.clean_properties(OBJECT_TYPE_COMPANIES, company_data, validate)
         payload = {
             'properties': [
                 {
@@ -304,8 +789,18 @@ class HubspotClient:
         comp_client = self.get_companies_client()
         return comp_client.create(payload, **options)
 
-    def update_company(self, company_id, company_data, **options):
-        """Update a company on hubspot."""
+    def update_company(self, company_id, company_data, validate=None, **options):
+        """
+        Update a company on hubspot.
+
+        Parameters
+        ----------
+        company_id: int
+        company_data: dict
+        validate: bool, optional
+            Check and convert the data locally, see `clean_properties`.
+        """
+        company_data = self.clean_properties(OBJECT_TYPE_COMPANIES, company_data, validate)
         payload = {
             'properties': [
                 {
@@ -333,7 +828,15 @@ class HubspotClient:
         note_client = self.get_engagements_client()
         return note_client.create(payload, **options)
 
-    def delete_all_companies(self, having=None):
+    def delete_all_companies(self, having=None, max_workers=None):
+        """
+        Delete all the companies, or only those `having` the given property values.
+
+        Returns
+        -------
+        djhubspot.bulk.BulkSummary or None
+            The outcome of the deletions when filtering the companies.
+        """
         comp_client = self.get_companies_client()
 
         # No filter, delete everything.
@@ -342,21 +845,20 @@ class HubspotClient:
 
         # Otherwise, we have to filter the list.
         # First, we make sure to fetch the properties we want to filter upon...
-        all_companies = self.get_all_companies(extra_props=having.keys())
+        all_companies = self.iter_companies(properties=list(having.keys()))
 
         # Then, we build the filtered list...
-        companies_to_delete = [
-            company
+        company_ids_to_delete = [
+            company['companyId']
             for company in all_companies
             if all([
-                company.get(key) == value
+                get_property_value(company, key) == value
                 for key, value in having.items()
             ])
         ]
 
         # And finally, we can delete _only_ those companies.
-        for company in companies_to_delete:
-            comp_client.delete(company['id'])
+        return self.bulk(max_workers).map(comp_client.delete, company_ids_to_delete)
 
     def get_company_deals(self, company_id):
         """Retrieve the deals related to a company."""
@@ -368,7 +870,88 @@ class HubspotClient:
     def get_contact_data(self, contact_id):
         pass
 
-    def create_contact(self, contact_data):
+    def iter_contacts(self, properties=None, page_size=None, offset=None):
+        """
+        Iterate lazily over all the contacts of the portal.
+
+        Cf: https://developers.hubspot.com/docs/methods/contacts/get_contacts
+
+        Parameters
+        ----------
+        properties: list, optional
+            The names of the properties to retrieve for each contact.
+        page_size: int, optional
+            Defaults to (and cannot exceed) `constants.CONTACTS_PAGE_MAX_SIZE`.
+        offset: optional
+            Could be used to resume a previous iteration, see `HubspotPager`.
+
+        Returns
+        -------
+        djhubspot.paging.HubspotPager
+            Iterating over the api object contents of the contacts.
+        """
+        cont_client = self.get_contacts_client()
+        page_size = min(page_size or constants.CONTACTS_PAGE_MAX_SIZE,
+                        constants.CONTACTS_PAGE_MAX_SIZE)
+
+        def fetch_page(offset):
+            params = {'count': page_size, 'property': properties or []}
+            if offset:
+                params['vidOffset'] = offset
+            batch = cont_client._call('lists/all/contacts/all', params=params, doseq=True)
+            return batch['contacts'], batch['vid-offset'], batch['has-more']
+
+        return HubspotPager(fetch_page, offset=offset)
+
+    def iter_recently_modified_contacts(self, since, properties=None):
+        """
+        Iterate lazily over the contacts modified since the given hubspot timestamp.
+
+        Cf: https://developers.hubspot.com/docs/methods/contacts/get_recently_updated_contacts
+
+        Notes: Hubspot only returns the contacts modified during the last 30 days.
+
+        Parameters
+        ----------
+        since: int
+            An hubspot timestamp (in milliseconds).
+        properties: list, optional
+            The names of the properties to retrieve for each contact.
+
+        Returns
+        -------
+        djhubspot.paging.HubspotPager
+        """
+        cont_client = self.get_contacts_client()
+
+        def fetch_page(offset):
+            params = {
+                'count': constants.RECENTLY_MODIFIED_PAGE_MAX_SIZE,
+                'property': properties or [],
+            }
+            if offset:
+                params['vidOffset'], params['timeOffset'] = offset
+            batch = cont_client._call(
+                'lists/recently_updated/contacts/recent', params=params, doseq=True,
+            )
+            # The most recently modified contacts come first.
+            contacts = [contact for contact in batch['contacts'] if contact['addedAt'] >= since]
+            has_more = batch['has-more'] and batch['time-offset'] >= since
+            return contacts, (batch['vid-offset'], batch['time-offset']), has_more
+
+        return HubspotPager(fetch_page)
+
+    def create_contact(self, contact_data, validate=None):
+        """
+        Create a contact on hubspot.
+
+        Parameters
+        ----------
+        contact_data: dict
+        validate: bool, optional
+            Check and convert the data locally, see `clean_properties`.
+        """
+        contact_data = self.clean_properties(OBJECT_TYPE_CONTACTS, contact_data, validate)
         payload = {
             'properties': [
                 {
@@ -381,8 +964,18 @@ class HubspotClient:
         cont_client = self.get_contacts_client()
         return cont_client.create(payload)
 
-    def update_contact(self, contact_id, contact_data):
-        """Update a contact on hubspot."""
+    def update_contact(self, contact_id, contact_data, validate=None):
+        """
+        Update a contact on hubspot.
+
+        Parameters
+        ----------
+        contact_id: int
+        contact_data: dict
+        validate: bool, optional
+            Check and convert the data locally, see `clean_properties`.
+        """
+        contact_data = self.clean_properties(OBJECT_TYPE_CONTACTS, contact_data, validate)
         payload = {
             'properties': [
                 {
@@ -422,10 +1015,25 @@ class HubspotClient:
         cont_client = self.get_contacts_client()
         return cont_client.link_contact_to_company(contact_id, company_id)
 
-    def link_owner_to_company(self, owner_id, company_id):
-        """Associate an owner to a company."""
+    def link_owner_to_company(self, owner, company_id):
+        """
+        Associate an owner to a company.
+
+        Parameters
+        ----------
+        owner: int or str
+            The id or the email of the owner.
+        company_id: int
+        """
+        owner_data = (
+            self.owner_directory.get_by_email(owner)
+            if '@' in str(owner) else self.owner_directory.get_by_id(owner)
+        )
+        if owner_data is None:
+            raise ValueError(f"Unable to find a Hubspot owner matching: {owner}")
+
         owners_client = self.get_owners_client()
-        return owners_client.link_owner_to_company(owner_id, company_id)
+        return owners_client.link_owner_to_company(owner_data['ownerId'], company_id)
 
     def create_contact_note(self, contact_id, note_body):
         payload = {
@@ -442,7 +1050,15 @@ class HubspotClient:
         note_client = self.get_engagements_client()
         return note_client.create(payload)
 
-    def delete_all_contacts(self, having=None):
+    def delete_all_contacts(self, having=None, max_workers=None):
+        """
+        Delete all the contacts, or only those `having` the given property values.
+
+        Returns
+        -------
+        djhubspot.bulk.BulkSummary or None
+            The outcome of the deletions when filtering the contacts.
+        """
         cont_client = self.get_contacts_client()
 
         # No filter, delete everything.
@@ -451,28 +1067,98 @@ class HubspotClient:
 
         # Otherwise, we have to filter the list.
         # First, we make sure to fetch the properties we want to filter upon...
-        all_contacts = cont_client.get_all(extra_props=having.keys())
+        all_contacts = self.iter_contacts(properties=list(having.keys()))
 
         # Then, we build the filtered list...
-        contacts_to_delete = [
-            contact
+        contact_ids_to_delete = [
+            contact['vid']
             for contact in all_contacts
             if all([
-                contact.get(key) == value
+                get_property_value(contact, key) == value
                 for key, value in having.items()
             ])
         ]
 
         # And finally, we can delete _only_ those contacts.
-        for contact in contacts_to_delete:
-            cont_client.delete(contact['id'])
+        return self.bulk(max_workers).map(cont_client.delete, contact_ids_to_delete)
 
     # Deal-related methods
 
     def get_deal_data(self, deal_id):
         pass
 
-    def create_deal(self, deal_data, company_ids=None, contact_ids=None):
+    def iter_deals(self, properties=None, page_size=None, offset=None,
+                   include_associations=False):
+        """
+        Iterate lazily over all the deals of the portal.
+
+        Cf: https://developers.hubspot.com/docs/methods/deals/get-all-deals
+
+        Parameters
+        ----------
+        properties: list, optional
+            The names of the properties to retrieve for each deal.
+        page_size: int, optional
+            Defaults to (and cannot exceed) `constants.DEALS_PAGE_MAX_SIZE`.
+        offset: optional
+            Could be used to resume a previous iteration, see `HubspotPager`.
+        include_associations: bool, optional
+            Include the ids of the companies and of the contacts associated to the deals.
+
+        Returns
+        -------
+        djhubspot.paging.HubspotPager
+            Iterating over the api object contents of the deals.
+        """
+        deals_client = self.get_deals_client()
+        page_size = min(page_size or constants.DEALS_PAGE_MAX_SIZE, constants.DEALS_PAGE_MAX_SIZE)
+
+        def fetch_page(offset):
+            params = {
+                'limit': page_size,
+                'properties': properties or [],
+                'includeAssociations': 'true' if include_associations else 'false',
+            }
+            if offset:
+                params['offset'] = offset
+            batch = deals_client._call('deal/paged', params=params, doseq=True)
+            deals = [deal for deal in batch['deals'] if not deal.get('isDeleted')]
+            return deals, batch['offset'], batch['hasMore']
+
+        return HubspotPager(fetch_page, offset=offset)
+
+    def iter_recently_modified_deals(self, since, properties=None):
+        """
+        Iterate lazily over the deals modified since the given hubspot timestamp.
+
+        Cf: https://developers.hubspot.com/docs/methods/deals/get_deals_modified
+
+        Notes: Hubspot only returns the deals modified during the last 30 days.
+
+        Parameters
+        ----------
+        since: int
+            An hubspot timestamp (in milliseconds).
+        properties: list, optional
+            Unused: this endpoint always returns all the properties of the deals.
+
+        Returns
+        -------
+        djhubspot.paging.HubspotPager
+        """
+        deals_client = self.get_deals_client()
+
+        def fetch_page(offset):
+            batch = deals_client._call('deal/recent/modified', params={
+                'count': constants.RECENTLY_MODIFIED_PAGE_MAX_SIZE,
+                'offset': offset or 0,
+                'since': since,
+            })
+            return batch['results'], batch['offset'], batch['hasMore']
+
+        return HubspotPager(fetch_page)
+
+    def create_deal(self, deal_data, company_ids=None, contact_ids=None, validate=None):
         """
         Create a new deal on hubspot.
 
@@ -483,7 +1169,10 @@ class HubspotClient:
             The hubspot ids of the companies to be linked to the deal.
         contact_ids:
             The hubspot ids of the contacts to be linked to the deal.
+        validate: bool, optional
+            Check and convert the data locally, see `clean_properties`.
         """
+        deal_data = self.clean_properties(OBJECT_TYPE_DEALS, deal_data, validate)
         company_ids = company_ids or []
         contact_ids = contact_ids or []
 
@@ -527,6 +1216,84 @@ class HubspotClient:
         lines_client = self.get_lines_client()
         return lines_client.create(data=payload)
 
+    def get_line_items_batch(self, line_item_ids, properties=None):
+        """
+        Retrieve many line items at once by using the batch-read endpoint of the lines API.
+
+        Cf: https://developers.hubspot.com/docs/methods/line-items/batch-get-line-items
+
+        The ids are split into chunks of `constants.BATCH_READ_MAX_SIZE`, meaning that reading
+        `n` line items costs `ceil(n / BATCH_READ_MAX_SIZE)` calls to the API.
+
+        Parameters
+        ----------
+        line_item_ids: iterable
+            The hubspot ids of the line items to retrieve.
+        properties: list, optional
+            The properties to retrieve for each line item.
+
+        Returns
+        -------
+        dict
+            The line items api object contents, indexed by their hubspot id (as a string).
+            Line items which could not be found are missing from the result.
+        """
+        lines_client = self.get_lines_client()
+
+        line_items = {}
+        for line_item_ids_chunk in chunks(line_item_ids, constants.BATCH_READ_MAX_SIZE):
+            response = lines_client._call(
+                'batch-read',
+                method='POST',
+                data={'ids': line_item_ids_chunk},
+                params={'properties': properties or []},
+                doseq=True,
+            )
+            line_items.update({
+                str(line_item_id): line_item
+                for line_item_id, line_item in (response or {}).items()
+            })
+
+        return line_items
+
+    def get_associations_batch(self, from_object_type, to_object_type, object_ids):
+        """
+        Retrieve the ids of the objects associated to many objects at once.
+
+        The ids are split into chunks of `constants.BATCH_READ_MAX_SIZE`, as for
+        `get_line_items_batch`.
+
+        Parameters
+        ----------
+        from_object_type: str
+            Ex: `companies`.
+        to_object_type: str
+            Ex: `contacts`.
+        object_ids: iterable
+            The hubspot ids of the objects of type `from_object_type`.
+
+        Returns
+        -------
+        dict
+            The ids of the associated objects (as strings), indexed by the id of each object (as
+            a string). Objects without associations are missing from the result.
+        """
+        associations_client = self.get_crm_associations_client()
+
+        associated_ids = {}
+        for object_ids_chunk in chunks(object_ids, constants.BATCH_READ_MAX_SIZE):
+            response = associations_client._call(
+                f'{from_object_type}/{to_object_type}/batch/read',
+                method='POST',
+                data={'inputs': [{'id': str(object_id)} for object_id in object_ids_chunk]},
+            )
+            for result in (response or {}).get('results', []):
+                associated_ids[str(result['from']['id'])] = [
+                    str(associated['id']) for associated in result['to']
+                ]
+
+        return associated_ids
+
     def link_line_item_to_deal(self, line_item_id, deal_id):
         lines_client = self.get_lines_client()
         return lines_client.link_line_item_to_deal(line_item_id, deal_id)
@@ -31,3 +31,18 @@ HTTP_401_UNAUTHORIZED = 401
 
 
 OBJECT_TYPE_PRODUCT = 'PRODUCT'
+
+# The maximum number of objects which could be read at once through the batch-read endpoints of
+# the CRM objects API.
+# Cf: https://developers.hubspot.com/docs/methods/line-items/batch-get-line-items
+BATCH_READ_MAX_SIZE = 100
+
+# The maximum number of objects created or updated at once through the batch endpoints.
+BATCH_WRITE_MAX_SIZE = 100
+
+# The maximum number of objects per page of the paginated endpoints.
+COMPANIES_PAGE_MAX_SIZE = 250
+CONTACTS_PAGE_MAX_SIZE = 100
+DEALS_PAGE_MAX_SIZE = 250
+PRODUCTS_PAGE_MAX_SIZE = 100
+RECENTLY_MODIFIED_PAGE_MAX_SIZE = 100
@@ -15,3 +15,50 @@ class HubspotEventError(DJHubspotError):
     Error related to hubspot events.
     """
     pass
+
+
+class HubspotCircuitOpen(DJHubspotError):
+    """
+    The calls to a family of endpoints are suspended, they keep failing (see
+    `djhubspot.circuit.CircuitBreaker`).
+    """
+
+    def __init__(self, family, retry_in):
+        """
+        Parameters
+        ----------
+        family: str
+            The family of the endpoints (ex: `companies`).
+        retry_in: float
+            The number of seconds before the calls are attempted again.
+        """
+        self.family = family
+        self.retry_in = retry_in
+        super().__init__(
+            f"The calls to the Hubspot '{family}' endpoints are suspended for {retry_in:.1f}s."
+        )
+
+
+class HubspotQuotaExceeded(DJHubspotError):
+    """
+    The daily quota of calls to the Hubspot API has been reached.
+    """
+    pass
+
+
+class HubspotValidationError(DJHubspotError):
+    """
+    The data sent to Hubspot does not match the properties defined on the portal.
+    """
+
+    def __init__(self, errors):
+        """
+        Parameters
+        ----------
+        errors: dict
+            The error messages by property name.
+        """
+        self.errors = errors
+        super().__init__(
+            '; '.join(f'{name}: {message}' for name, message in sorted(errors.items()))
+        )
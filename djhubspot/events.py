@@ -1,5 +1,10 @@
+from collections import OrderedDict
 from datetime import datetime
+import json
 import logging
+import threading
+import time
+
 import pytz
 
 from .errors import HubspotEventError
@@ -9,7 +14,12 @@ logger = logging.getLogger('vendors.dj_hubspot')
 
 
 class HubspotEvent:
-    """Represent an hubspot webhook event."""
+    """
+    Represent an hubspot webhook event.
+
+    Webhook requests could contain thousands of events: events are slotted, and their fields are
+    only extracted from the message when they are accessed.
+    """
 
     EVENT_TYPE_COMPANY_CREATED = 'company_created'
     EVENT_TYPE_COMPANY_DELETED = 'company_deleted'
@@ -21,20 +31,42 @@ class HubspotEvent:
     EVENT_TYPE_DEAL_DELETED = 'deal_deleted'
     EVENT_TYPE_DEAL_UPDATED = 'deal_updated'
 
+    OBJECT_TYPE_COMPANY = 'company'
+    OBJECT_TYPE_CONTACT = 'contact'
+    OBJECT_TYPE_DEAL = 'deal'
+
     MESSAGE_EVENT_TO_EVENT_TYPE = {
-        'contact.creation': EVENT_TYPE_COMPANY_CREATED,
-        'contact.deletion': EVENT_TYPE_COMPANY_DELETED,
-        'contact.propertyChange': EVENT_TYPE_COMPANY_UPDATED,
-        'company.creation': EVENT_TYPE_CONTACT_CREATED,
-        'company.deletion': EVENT_TYPE_CONTACT_DELETED,
-        'company.propertyChange': EVENT_TYPE_CONTACT_UPDATED,
+        'company.creation': EVENT_TYPE_COMPANY_CREATED,
+        'company.deletion': EVENT_TYPE_COMPANY_DELETED,
+        'company.propertyChange': EVENT_TYPE_COMPANY_UPDATED,
+        'contact.creation': EVENT_TYPE_CONTACT_CREATED,
+        'contact.deletion': EVENT_TYPE_CONTACT_DELETED,
+        'contact.propertyChange': EVENT_TYPE_CONTACT_UPDATED,
         'deal.creation': EVENT_TYPE_DEAL_CREATED,
         'deal.deletion': EVENT_TYPE_DEAL_DELETED,
         'deal.propertyChange': EVENT_TYPE_DEAL_UPDATED,
     }
 
-    message = None
-    event_type = None
+    # The event type, object type and whether it is a property change, by subscription type.
+    SUBSCRIPTION_TYPES = {
+        subscription_type: (
+            event_type,
+            subscription_type.split('.')[0],
+            subscription_type.endswith('.propertyChange'),
+        )
+        for subscription_type, event_type in MESSAGE_EVENT_TO_EVENT_TYPE.items()
+    }
+
+    __slots__ = (
+        'message',
+        'event_type',
+        'object_type',
+        'is_property_change',
+        # The ids of the events merged into this one by `coalesce_events`.
+        'merged_event_ids',
+        '_occurred_at',
+        '_changed_properties',
+    )
 
     def __init__(self, message, **kwargs):
         """
@@ -43,17 +75,65 @@ class HubspotEvent:
         ----------
         message: dict
         """
-        self.message = message
-
-        raw_event_type = self.message.get('subscriptionType')
         try:
-            self.event_type = self.MESSAGE_EVENT_TO_EVENT_TYPE[raw_event_type]
-        except KeyError:
-            error_message = "Unrecognized Hubspot event type: ", raw_event_type
+            self.event_type, self.object_type, self.is_property_change = (
+                self.SUBSCRIPTION_TYPES[message.get('subscriptionType')]
+            )
+        except (KeyError, AttributeError):
+            error_message = f"Unrecognized Hubspot event: {message}"
             logger.warning(error_message)
             raise HubspotEventError(error_message)
-        else:
-            self.parse_event()
+
+        self.message = message
+        self.merged_event_ids = ()
+        self._occurred_at = None
+        self._changed_properties = None
+
+    @classmethod
+    def from_messages(cls, messages):
+        """
+        Build the events of a webhook request, invalid events being logged and ignored.
+
+        Parameters
+        ----------
+        messages: list of dict
+
+        Returns
+        -------
+        list of HubspotEvent
+        """
+        subscription_types = cls.SUBSCRIPTION_TYPES
+        events = []
+        for message in messages:
+            if isinstance(message, dict) and message.get('subscriptionType') in subscription_types:
+                events.append(cls(message))
+            else:
+                logger.warning('Invalid event received from hubspot.', extra={'event': message})
+        return events
+
+    @classmethod
+    def parse_batch(cls, raw_body):
+        """
+        Build the events of a webhook request from its raw body.
+
+        Parameters
+        ----------
+        raw_body: bytes or str
+
+        Returns
+        -------
+        list of HubspotEvent
+        """
+        try:
+            messages = json.loads(raw_body)
+        except (json.JSONDecodeError, TypeError, UnicodeDecodeError) as e:
+            raise HubspotEventError(f"Invalid body of a webhook request: {e}")
+        if not isinstance(messages, list):
+            raise HubspotEventError("The body of a webhook request should be a list of events.")
+        return cls.from_messages(messages)
+
+    def __repr__(self):
+        return f'<HubspotEvent {self.event_type} {self.message.get("objectId")}>'
 
     # Common event properties
     # ------------------------------------------------------------------------------
@@ -72,40 +152,227 @@ class HubspotEvent:
         -------
         datetime
         """
-        ms = self.message['occurredAt']
-        # FIXME: not sure about the timezone yet.
-        return datetime.fromtimestamp(ms / 1000.0, pytz.utc)
+        if self._occurred_at is None:
+            ms = self.message['occurredAt']
+            # FIXME: not sure about the timezone yet.
+            self._occurred_at = datetime.fromtimestamp(ms / 1000.0, pytz.utc)
+        return self._occurred_at
 
-    def parse_event(self):
-        try:
-            getattr(self, 'parse_%s_event' % self.event_type)()
-        except (AttributeError, TypeError):
-            logger.warning("Unable to parse Hubspot event of type: ", self.event_type)
+    @property
+    def object_key(self):
+        """
+        Identify the Hubspot object this event is about.
 
-    def _parse_company_event(self):
-        self.company_id = self.message.get('objectId')
+        Returns
+        -------
+        tuple
+            The type of the object (ex: 'deal') and its id.
+        """
+        return self.object_type, self.message.get('objectId')
+
+    def _get_object_id(self, object_type):
+        if self.object_type != object_type:
+            raise AttributeError(f"A {self.event_type} event is not about a {object_type}.")
+        return self.message.get('objectId')
 
-    def _parse_contact_event(self):
-        self.contact_id = self.message.get('objectId')
+    @property
+    def company_id(self):
+        return self._get_object_id(self.OBJECT_TYPE_COMPANY)
 
-    def _parse_deal_event(self):
-        self.deal_id = self.message.get('objectId')
+    @property
+    def contact_id(self):
+        return self._get_object_id(self.OBJECT_TYPE_CONTACT)
 
-    def _parse_updated_event(self):
-        self.updated_property_name = self.message.get('propertyName')
-        self.updated_property_value = self.message.get('propertyValue')
+    @property
+    def deal_id(self):
+        return self._get_object_id(self.OBJECT_TYPE_DEAL)
 
-    def parse_company_updated_event(self):
-        self._parse_company_event()
-        self._parse_updated_event()
+    # Property change events
+    # ------------------------------------------------------------------------------
 
-    def parse_contact_created_event(self):
-        self._parse_contact_event()
+    def _get_property_change_field(self, field_name):
+        if not self.is_property_change:
+            raise AttributeError(f"A {self.event_type} event is not a property change.")
+        return self.message.get(field_name)
 
-    def parse_contact_updated_event(self):
-        self._parse_contact_event()
-        self._parse_updated_event()
+    @property
+    def updated_property_name(self):
+        return self._get_property_change_field('propertyName')
+
+    @property
+    def updated_property_value(self):
+        return self._get_property_change_field('propertyValue')
+
+    @property
+    def changed_properties(self):
+        """
+        All the properties changed, by name, when events have been merged by `coalesce_events`.
+
+        Returns
+        -------
+        dict
+        """
+        if self._changed_properties is None:
+            self._changed_properties = {self.updated_property_name: self.updated_property_value}
+        return self._changed_properties
+
+    @changed_properties.setter
+    def changed_properties(self, changed_properties):
+        self._changed_properties = changed_properties
+
+
+class EventDeduplicator:
+    """
+    Drop the events which have already been processed.
+
+    Hubspot delivers the same event again (with an `attemptNumber` greater than 0) when it did not
+    get a response in time. The ids of the processed events are remembered during `ttl` seconds,
+    up to `max_size` ids, the oldest ones being forgotten first.
+
+    The ids are kept in the memory of the process: the events should be received, or processed
+    (see `WebhookView.queue_events`), by a single process to be deduplicated reliably.
+    """
+
+    def __init__(self, max_size=10000, ttl=3600, clock=time.monotonic):
+        """
+        Parameters
+        ----------
+        max_size: int, optional
+            How many event ids are remembered at most.
+        ttl: int, optional
+            For how many seconds an event id is remembered.
+        clock: callable, optional
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._seen = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._seen)
+
+    def _forget_expired(self, now):
+        # Ids are stored in the order they expire.
+        while self._seen:
+            event_id, expires_at = next(iter(self._seen.items()))
+            if expires_at > now:
+                break
+            del self._seen[event_id]
+
+    def filter(self, events):
+        """
+        Return the events which have not been seen yet, each event being returned only once.
+
+        Parameters
+        ----------
+        events: list of HubspotEvent
+
+        Returns
+        -------
+        list of HubspotEvent
+        """
+        unseen_events = []
+        event_ids = set()
+        with self._lock:
+            self._forget_expired(self.clock())
+            for event in events:
+                event_id = event.message.get('eventId')
+                if event_id in self._seen or event_id in event_ids:
+                    logger.debug(f"Hubspot event {event_id} already seen, skipping it.")
+                    continue
+                if event_id is not None:
+                    event_ids.add(event_id)
+                unseen_events.append(event)
+        return unseen_events
+
+    def mark_seen(self, events):
+        """
+        Remember the given events, once they have been processed.
+
+        Parameters
+        ----------
+        events: list of HubspotEvent
+        """
+        with self._lock:
+            expires_at = self.clock() + self.ttl
+            for event in events:
+                for event_id in (event.message.get('eventId'),) + tuple(event.merged_event_ids):
+                    if event_id is None:
+                        continue
+                    self._seen.pop(event_id, None)
+                    self._seen[event_id] = expires_at
+            while len(self._seen) > self.max_size:
+                self._seen.popitem(last=False)
+
+
+def merge_property_changes(events):
+    """
+    Merge property change events about the same object into a single event.
+
+    The merged event is built from the most recent event (by `occurredAt`), and its
+    `changed_properties` holds the most recent value of each of the properties changed.
+
+    Parameters
+    ----------
+    events: list of HubspotEvent
+
+    Returns
+    -------
+    HubspotEvent
+    """
+    if len(events) == 1:
+        return events[0]
+
+    events = sorted(events, key=lambda event: event.message.get('occurredAt') or 0)
+    merged_event = HubspotEvent(dict(events[-1].message))
+    merged_event.changed_properties = {}
+    for event in events:
+        merged_event.changed_properties.update(event.changed_properties)
+    merged_event.merged_event_ids = tuple(
+        event_id
+        for event in events
+        for event_id in (event.message.get('eventId'),) + tuple(event.merged_event_ids)
+        if event_id is not None
+    )
+    return merged_event
+
+
+def coalesce_events(events):
+    """
+    Merge the property change events following each other about the same object.
+
+    Events about a given object stay in the same order: property changes are only merged between
+    the other events about the object (creation, deletion, ...).
+
+    Parameters
+    ----------
+    events: list of HubspotEvent
+
+    Returns
+    -------
+    list of HubspotEvent
+        Merged events take the place of the first event they have been merged from.
+    """
+    # Runs of property changes being merged, by object.
+    pending_runs = {}
+    # Either events, or runs of property changes to merge.
+    coalesced = []
+
+    for event in events:
+        object_key = event.object_key
+        if event.is_property_change:
+            run = pending_runs.get(object_key)
+            if run is None:
+                run = pending_runs[object_key] = []
+                coalesced.append(run)
+            run.append(event)
+        else:
+            # The next property changes should not be merged with the previous ones.
+            pending_runs.pop(object_key, None)
+            coalesced.append(event)
 
-    def parse_deal_updated_event(self):
-        self._parse_deal_event()
-        self._parse_updated_event()
+    return [
+        merge_property_changes(item) if isinstance(item, list) else item
+        for item in coalesced
+    ]
@@ -1,10 +1,11 @@
+from functools import lru_cache
 import logging
 from _decimal import InvalidOperation
 
-from django.conf import settings
 from django.utils.functional import cached_property
 
-from djhubspot.utils import hubspot_timestamp_to_datetime
+from djhubspot.cache import get_object_cache
+from djhubspot.utils import chunks, hubspot_timestamp_to_datetime
 from hubspot3.error import HubspotNotFound
 from hubspot3.globals import (
     OBJECT_TYPE_COMPANIES,
@@ -12,7 +13,6 @@ from hubspot3.globals import (
     OBJECT_TYPE_DEALS,
     OBJECT_TYPE_PRODUCTS,
 )
-from hubspot3.owners import OwnersClient
 from money.currency import Currency
 from money.money import Money
 
@@ -23,11 +23,52 @@ from . import constants
 
 logger = logging.getLogger('vendors.dj_hubspot')
 
+# Fetch all the properties defined in the portal with `fetch_many`.
+ALL_PROPERTIES = '__all__'
+
+
+# The properties could be given per call: the cache is bounded so that arbitrary sets of
+# properties do not accumulate in memory.
+@lru_cache(maxsize=256)
+def _freeze_fetch_params(history_params, properties_param, properties):
+    """
+    Build the query parameters of a fetch once per distinct set of properties.
+
+    Returns
+    -------
+    tuple
+        The (name, value) pairs of the parameters.
+    """
+    params = history_params
+    if properties is not None:
+        params += ((properties_param, properties),)
+    return params
+
 
 class HubspotAPIObject:
 
     api_object_content = None
 
+    # The names of the properties to fetch, `None` to fetch all of them. Could be overridden for
+    # an object with the `properties` argument.
+    fetched_properties = None
+
+    # Whether to fetch the history of the property values (their `versions`) along with them.
+    include_history = False
+
+    # The query parameter filtering the fetched properties.
+    PROPERTIES_PARAM = 'properties'
+
+    # The type of the objects in the CRM objects API, used by `fetch_many`.
+    CRM_OBJECT_TYPE = None
+
+    # The key holding the hubspot id in the api object content.
+    ID_KEY = 'objectId'
+
+    # The properties read by the accessors, fetched by `fetch_many` when no other property is
+    # given.
+    ACCESSOR_PROPERTIES = None
+
     _associations_client = None
     _companies_client = None
     _contacts_client = None
@@ -40,7 +81,8 @@ class HubspotAPIObject:
     _properties_client = None
     _property_groups_client = None
 
-    def __init__(self, hubspot_id, fetch=True, hubspot_client=None, **kwargs):
+    def __init__(self, hubspot_id, fetch=True, hubspot_client=None, properties=None,
+                 include_history=None, **kwargs):
         """
         Parameters
         ----------
@@ -49,17 +91,54 @@ class HubspotAPIObject:
         hubspot_client: HubspotClient, optional
             Could be used to connect to hubspot when using credentials which are different than the one defined in
             the settings.
+        properties: list, optional
+            The names of the properties to fetch, defaults to `fetched_properties`.
+        include_history: bool, optional
+            Whether to fetch the history of the properties, defaults to `include_history`.
         """
         self.api_object_content = {}
         self.hubspot_id = hubspot_id
 
-        self.client = hubspot_client or HubspotClient()
+        self.client = hubspot_client or HubspotClient.for_portal()
+        self._set_projection(properties, include_history)
 
         if fetch:
             self.fetch()
 
-    def fetch(self):
-        """Fetch the api object content and put it into `api_object_content`."""
+    def _set_projection(self, properties=None, include_history=None):
+        if properties is not None:
+            self.fetched_properties = tuple(sorted(set(properties)))
+        if include_history is not None:
+            self.include_history = include_history
+
+    def fetch(self, use_cache=True, properties=None, include_history=None):
+        """
+        Fetch the api object content and put it into `api_object_content`.
+
+        Parameters
+        ----------
+        use_cache: bool, optional
+            If the object cache is enabled (see `djhubspot.cache.get_object_cache`), read the
+            api object content from it when available. Set to `False` in order to force a call to
+            the API. The cache is updated in both cases.
+        properties: list, optional
+            The names of the properties to fetch, see `fetched_properties`.
+        include_history: bool, optional
+            Whether to fetch the history of the properties, see `include_history`.
+        """
+        self._set_projection(properties, include_history)
+        object_cache = get_object_cache()
+
+        if use_cache and object_cache is not None:
+            api_object_content = object_cache.get(self.cache_key)
+            if api_object_content is not None:
+                logger.debug(
+                    f"Hubspot API object of type '{self.__class__}' with id: {self.hubspot_id} "
+                    f"retrieved from the cache."
+                )
+                self.api_object_content = api_object_content
+                return
+
         logger.debug(
             f"Fetching Hubspot API object of type '{self.__class__}' "
             f"with id: {self.hubspot_id} ..."
@@ -71,18 +150,178 @@ class HubspotAPIObject:
                 f"Unable to find a {self.__class__} with Hubspot ID: {self.hubspot_id}"
             )
 
+        if object_cache is not None:
+            object_cache.set(self.cache_key, self.api_object_content)
+
+    @property
+    def cache_key(self):
+        """
+        The key of the object into the object cache.
+
+        Returns
+        -------
+        tuple
+            (portal, object type, hubspot id, fetched properties, with history)
+        """
+        return (
+            self.client.portal_key,
+            self.__class__.__name__,
+            str(self.hubspot_id),
+            tuple(self._get_fetched_properties()),
+            self.include_history,
+        )
+
+    def invalidate_cache(self):
+        """Remove the object from the object cache, typically after an update."""
+        object_cache = get_object_cache()
+        if object_cache is not None:
+            object_cache.delete(self.cache_key)
+
+    def _get_fetched_properties(self):
+        """The names of the properties asked to the API when fetching the object (if any)."""
+        return list(self.fetched_properties or [])
+
+    def _get_history_params(self):
+        return (('includePropertyVersions', 'true' if self.include_history else 'false'),)
+
+    def _get_fetch_params(self):
+        """
+        The query parameters of the fetch, restricting the properties returned by the API.
+
+        They are built once per distinct set of properties, and copied since the hubspot3 clients
+        add the credentials to them.
+
+        Returns
+        -------
+        dict
+        """
+        properties = self.fetched_properties
+        return dict(_freeze_fetch_params(
+            self._get_history_params(),
+            self.PROPERTIES_PARAM,
+            tuple(properties) if properties is not None else None,
+        ))
+
     @classmethod
-    def from_api_object_content(cls, hubspot_id, api_object_content):
+    def from_api_object_content(cls, hubspot_id, api_object_content, hubspot_client=None):
         """Instantiate the api object from an API response payload.
 
         This is useful to prevent to avoid performing too many requests
         to the Hubspot API.
 
         """
-        api_object = cls(hubspot_id, fetch=False)
+        api_object = cls(hubspot_id, fetch=False, hubspot_client=hubspot_client)
         api_object.api_object_content = api_object_content
         return api_object
 
+    @classmethod
+    def _from_crm_object(cls, crm_object):
+        """
+        Convert an object returned by the CRM objects API to the api object content read by the
+        accessors, where each property is a dict holding its `value`.
+        """
+        return {
+            cls.ID_KEY: int(crm_object['id']),
+            'properties': {
+                name: {'value': value}
+                for name, value in crm_object.get('properties', {}).items()
+            },
+            'isDeleted': crm_object.get('archived', False),
+        }
+
+    @classmethod
+    def fetch_many(cls, ids, properties=None, hubspot_client=None, max_workers=None):
+        """
+        Fetch many objects at once, through the batch read endpoint of the CRM objects API.
+
+        The ids are read by chunks of `constants.BATCH_READ_MAX_SIZE`: hydrating 1,000 objects
+        costs 10 calls. The fetched objects are not put into the object cache: their content is
+        converted from the CRM objects API, it lacks what `fetch` returns (ex: the history of the
+        values) and must not be read in its place.
+
+        Notes: the associations of the objects are not fetched (ex: `Deal.company`).
+
+        Parameters
+        ----------
+        ids: iterable
+            The hubspot ids of the objects.
+        properties: list, optional
+            The names of the properties to fetch, defaults to `fetched_properties`, then to
+            `ACCESSOR_PROPERTIES`. When none is given, Hubspot only returns a few default
+            properties. `ALL_PROPERTIES` fetches all the properties of the property schema of the
+            portal (see `HubspotClient.get_property_schema`), as fetching a single object does.
+        hubspot_client: HubspotClient, optional
+        max_workers: int, optional
+            How many chunks could be fetched at the same time, they are fetched one after the
+            other by default.
+
+        Returns
+        -------
+        tuple
+            The fetched objects indexed by their hubspot id (as a string), and the list of the
+            ids which could not be found.
+        """
+        if cls.CRM_OBJECT_TYPE is None:
+            raise NotImplementedError(f"{cls.__name__} objects cannot be fetched in batches.")
+
+        client = hubspot_client or HubspotClient.for_portal()
+        crm_objects_client = client.get_crm_objects_client()
+        ids = list(dict.fromkeys(str(hubspot_id) for hubspot_id in ids))
+        for default_properties in (cls.fetched_properties, cls.ACCESSOR_PROPERTIES):
+            if properties is None:
+                properties = default_properties
+        projection = properties
+        if properties == ALL_PROPERTIES:
+            # The batch read endpoint only returns the properties it is given.
+            properties = [
+                prop['name'] for prop in client.get_property_schema(cls.CRM_OBJECT_TYPE).properties
+            ]
+            projection = None
+
+        def fetch_chunk(ids_chunk):
+            data = {'inputs': [{'id': hubspot_id} for hubspot_id in ids_chunk]}
+            if properties is not None:
+                data['properties'] = list(properties)
+            response = crm_objects_client._call(
+                f'{cls.CRM_OBJECT_TYPE}/batch/read', method='POST', data=data,
+            )
+            return (response or {}).get('results', [])
+
+        ids_chunks = list(chunks(ids, constants.BATCH_READ_MAX_SIZE))
+        if max_workers and len(ids_chunks) > 1:
+            summary = client.bulk(max_workers=max_workers).map(fetch_chunk, ids_chunks)
+            if summary.failed:
+                raise summary.errors[0]
+            results = [result.result for result in summary.results]
+        else:
+            results = [fetch_chunk(ids_chunk) for ids_chunk in ids_chunks]
+
+        objects = {}
+        for crm_object in (result for chunk_results in results for result in chunk_results):
+            api_object = cls.from_api_object_content(
+                crm_object['id'], cls._from_crm_object(crm_object), hubspot_client=client,
+            )
+            api_object._set_projection(projection)
+            objects[str(crm_object['id'])] = api_object
+
+        missing_ids = [hubspot_id for hubspot_id in ids if hubspot_id not in objects]
+        if missing_ids:
+            logger.warning(f"{len(missing_ids)} {cls.__name__} object(s) could not be found.")
+        return objects, missing_ids
+
+    @classmethod
+    def fetch_list(cls, ids, hubspot_client=None, **kwargs):
+        """
+        Same as `fetch_many`, returning the objects found in the order of the given ids.
+
+        Returns
+        -------
+        list
+        """
+        ids = list(ids)
+        objects, _missing_ids = cls.fetch_many(ids, hubspot_client=hubspot_client, **kwargs)
+        return [objects[str(hubspot_id)] for hubspot_id in ids if str(hubspot_id) in objects]
+
     def _fetch_api_object(self):
         """Perform a call to the API to fetch the API object."""
         raise NotImplementedError
@@ -164,6 +403,13 @@ class HubspotAPIObject:
 class Company(HubspotAPIObject):
     """Help to manipulate companies through the Hubspot API."""
 
+    CRM_OBJECT_TYPE = OBJECT_TYPE_COMPANIES
+    ID_KEY = 'companyId'
+    ACCESSOR_PROPERTIES = (
+        'name', 'website', 'address', 'address2', 'country', 'city', 'zip',
+        'hs_parent_company_id',
+    )
+
     @property
     def name(self):
         """The name of the company."""
@@ -216,20 +462,23 @@ class Company(HubspotAPIObject):
 
     @cached_property
     def contacts(self):
-        """The contacts related to the company."""
-        contacts_vids = self.associations_client.get_company_to_contacts(self.hubspot_id)
-
-        contacts = []
-        for vid in contacts_vids:
-            contact = Contact(vid, hubspot_client=self.client)
-            contacts.append(contact)
+        """
+        The contacts related to the company.
 
-        return contacts
+        They are fetched in batches (see `fetch_many`) with all their properties, use
+        `djhubspot.prefetch.prefetch` to fetch the contacts of many companies at once.
+        """
+        contacts_vids = self.associations_client.get_company_to_contacts(self.hubspot_id)
+        return Contact.fetch_list(
+            contacts_vids, hubspot_client=self.client, properties=ALL_PROPERTIES,
+        )
 
     def _fetch_api_object(self):
         """Fetch the api object by using the companies client."""
         return self.companies_client.get(
             self.hubspot_id,
+            params=self._get_fetch_params(),
+            doseq=True,
         )
 
     def update(self, data):
@@ -248,10 +497,19 @@ class Company(HubspotAPIObject):
             self.hubspot_id,
             data,
         )
+        self.invalidate_cache()
 
 
 class Contact(HubspotAPIObject):
 
+    PROPERTIES_PARAM = 'property'
+    CRM_OBJECT_TYPE = OBJECT_TYPE_CONTACTS
+    ID_KEY = 'vid'
+    ACCESSOR_PROPERTIES = (
+        'associatedcompanyid', 'lastname', 'firstname', 'email', 'phone',
+        'hs_calculated_phone_number_country_code',
+    )
+
     @property
     def associated_company_id(self):
         """The id of the company associated to the contact (if there is one)."""
@@ -296,20 +554,58 @@ class Contact(HubspotAPIObject):
 
         Notes: contacts are retrieved by using a `vid`, acronym for 'Visitor ID'.
         """
-        return self.contacts_client.get_contact_by_id(self.hubspot_id)
+        return self.contacts_client.get_contact_by_id(
+            self.hubspot_id,
+            params=self._get_fetch_params(),
+            doseq=True,
+        )
+
+    def _get_history_params(self):
+        return (
+            ('propertyMode', 'value_and_history' if self.include_history else 'value_only'),
+            ('showListMemberships', 'false'),
+            ('formSubmissionMode', 'none'),
+        )
 
     def update(self, data):
         pass
 
 
-class Line(HubspotAPIObject):
-
-    _properties = []
+class _CRMObject(HubspotAPIObject):
+    """
+    An object of the CRM objects API (line items, products), whose extra properties could be
+    given on instantiation.
+    """
 
-    def __init__(self, hubspot_id, fetch=True, hubspot_client=None, extra_properties=None):
+    def __init__(self, hubspot_id=None, fetch=True, hubspot_client=None, extra_properties=None,
+                 properties=None, **kwargs):
+        """
+        Parameters
+        ----------
+        extra_properties: list, optional
+            The names of properties to fetch along with `fetched_properties`.
+        """
         if extra_properties:
-            self._properties += extra_properties
-        super().__init__(hubspot_id, fetch, hubspot_client)
+            properties = [*(properties or self.fetched_properties or ()), *extra_properties]
+        super().__init__(
+            hubspot_id=hubspot_id,
+            fetch=fetch,
+            hubspot_client=hubspot_client,
+            properties=properties,
+            **kwargs,
+        )
+
+    def _get_history_params(self):
+        # The history of the properties is only returned for the properties listed in
+        # `propertiesWithHistory`.
+        if self.include_history and self.fetched_properties is not None:
+            return (('propertiesWithHistory', self.fetched_properties),)
+        return ()
+
+
+class Line(_CRMObject):
+
+    CRM_OBJECT_TYPE = 'line_items'
 
     @property
     def is_product(self):
@@ -362,37 +658,21 @@ class Line(HubspotAPIObject):
         """Fetch the api object by using the lines client."""
         return self.lines_client.get(
             self.hubspot_id,
-            params=[('properties', property_name) for property_name in self._properties],
+            params=self._get_fetch_params(),
+            doseq=True,
         )
 
     def update(self, data):
         pass
 
 
-class Product(HubspotAPIObject):
+class Product(_CRMObject):
     """Help to manipulate products through the Hubspot API."""
 
-    _properties = ['name', 'price']
+    fetched_properties = ('name', 'price')
+    CRM_OBJECT_TYPE = OBJECT_TYPE_PRODUCTS
     _line_item_hubspot_id = None
 
-    def __init__(
-        self,
-        hubspot_id=None,
-        fetch=True,
-        hubspot_client=None,
-        extra_properties=None,
-        **kwargs
-    ):
-        if extra_properties:
-            self._properties += extra_properties
-
-        super().__init__(
-            hubspot_id=hubspot_id,
-            fetch=fetch,
-            hubspot_client=hubspot_client,
-            **kwargs,
-        )
-
     @property
     def name(self):
         return self._get_property_value('name')
@@ -463,7 +743,8 @@ class Product(HubspotAPIObject):
     def _fetch_api_object(self):
         return self.products_client.get_product_by_id(
             self.hubspot_id,
-            params=[('properties', property_name) for property_name in self._properties],
+            params=self._get_fetch_params(),
+            doseq=True,
         )
 
     def update(self, data):
@@ -489,7 +770,7 @@ class Owner(HubspotAPIObject):
         return self.api_object_content['email']
 
     @classmethod
-    def from_owner_email(cls, owner_email, hubspot_api_key=None):
+    def from_owner_email(cls, owner_email, hubspot_api_key=None, hubspot_client=None):
         """
 
         Parameters
@@ -498,12 +779,57 @@ class Owner(HubspotAPIObject):
         hubspot_api_key: str (optional)
             Could be used to target an hubspot portal different than the one defined in the
             settings.
+        hubspot_client: HubspotClient (optional)
         """
-        owners_client = OwnersClient(api_key=hubspot_api_key or settings.HUBSPOT_API_KEY)
-        hs_owner_data = owners_client.get_owner_by_email(owner_email)
+        hubspot_client = hubspot_client or HubspotClient.for_portal(hubspot_api_key)
+        hs_owner_data = hubspot_client.owner_directory.get_by_email(owner_email)
         if not hs_owner_data:
             return None
-        return cls.from_api_object_content(hs_owner_data['ownerId'], hs_owner_data)
+        return cls.from_api_object_content(
+            hs_owner_data['ownerId'], hs_owner_data, hubspot_client=hubspot_client,
+        )
+
+    def fetch(self, use_cache=True):
+        """
+        Read the owner from the owner directory of the portal (see
+        `HubspotClient.owner_directory`), which loads all the owners at once.
+
+        Parameters
+        ----------
+        use_cache: bool, optional
+            Set to `False` in order to reload the owner directory.
+        """
+        owner_directory = self.client.owner_directory
+        if not use_cache:
+            owner_directory.refresh()
+
+        api_object_content = owner_directory.get_by_id(self.hubspot_id)
+        if api_object_content is None:
+            raise ValueError(
+                f"Unable to find a {self.__class__} with Hubspot ID: {self.hubspot_id}"
+            )
+        self.api_object_content = api_object_content
+
+    @classmethod
+    def fetch_many(cls, ids, properties=None, hubspot_client=None, max_workers=None):
+        """
+        Same as `HubspotAPIObject.fetch_many`, reading the owners from the owner directory of the
+        portal (see `HubspotClient.owner_directory`): it costs one call at most.
+        """
+        client = hubspot_client or HubspotClient.for_portal()
+        owner_directory = client.owner_directory
+
+        objects = {}
+        missing_ids = []
+        for hubspot_id in dict.fromkeys(str(hubspot_id) for hubspot_id in ids):
+            api_object_content = owner_directory.get_by_id(hubspot_id)
+            if api_object_content is None:
+                missing_ids.append(hubspot_id)
+            else:
+                objects[hubspot_id] = cls.from_api_object_content(
+                    hubspot_id, api_object_content, hubspot_client=client,
+                )
+        return objects, missing_ids
 
     def _fetch_api_object(self):
         return self.owners_client.get_owner_by_id(self.hubspot_id)
@@ -515,7 +841,15 @@ class Owner(HubspotAPIObject):
 class Deal(HubspotAPIObject):
     """Help to manipulate deals through the Hubspot API."""
 
-    _products = []
+    CRM_OBJECT_TYPE = OBJECT_TYPE_DEALS
+    ID_KEY = 'dealId'
+    ACCESSOR_PROPERTIES = (
+        'dealname', 'deal_currency_code', 'amount_in_home_currency', 'hubspot_owner_id',
+        'pipeline', 'dealstage', 'closedate', 'payment_mode',
+    )
+
+    # `None` until the products of the deal are fetched.
+    _products = None
 
     @property
     def name(self):
@@ -552,12 +886,9 @@ class Deal(HubspotAPIObject):
             )
             return None
 
-        contacts = []
-        for contact_vid in contacts_vids:
-            contact = Contact(contact_vid, hubspot_client=self.client)
-            contacts.append(contact)
-
-        return contacts
+        return Contact.fetch_list(
+            contacts_vids, hubspot_client=self.client, properties=ALL_PROPERTIES,
+        )
 
     @cached_property
     def company(self):
@@ -582,14 +913,15 @@ class Deal(HubspotAPIObject):
         owner_id = self._get_property_value('hubspot_owner_id')
         if not owner_id:
             return None
-        return Owner(owner_id)
+        return Owner(owner_id, hubspot_client=self.client)
 
     @cached_property
     def _pipeline(self):
         """
         The pipeline related to the deal.
 
-        This method will fetch the pipeline from the hubspot API. It cost one API call.
+        Pipelines are loaded once for all the deals of the portal (see
+        `HubspotClient.pipeline_registry`).
 
         Returns
         -------
@@ -611,13 +943,16 @@ class Deal(HubspotAPIObject):
             )
             return None
         else:
-            return self.pipelines_client.get_deals_pipeline_by_id(pipeline_id)
+            return self.client.pipeline_registry.get_pipeline(pipeline_id)
 
     @cached_property
     def deal_stage(self):
         """
         The current stage of the deal.
 
+        Stages are looked up in the pipelines loaded once for all the deals of the portal (see
+        `HubspotClient.pipeline_registry`).
+
         Returns
         -------
         dict
@@ -640,10 +975,6 @@ class Deal(HubspotAPIObject):
         """
         # TODO: At the moment, we dont use any DealStage helper. We'll see later if it could be
         # TODO: usefull.
-        pipeline = self._pipeline
-        if not pipeline:
-            return None
-
         try:
             # We first retrieve the deal stage id from the properties of our deal.
             deal_stage_id = self.api_object_content['properties']['dealstage']['value']
@@ -659,24 +990,8 @@ class Deal(HubspotAPIObject):
             )
             return None
 
-        # We then retrieve all the stages for the pipeline associated to the deal ...
-        stages = pipeline.get('stages', [])
-        if not stages:
-            logger.warning(
-                "Pipeline for deal dont have any stage!",
-                extra={
-                    'hubspot_id': self.hubspot_id,
-                    'api_object_content': self.api_object_content,
-                    'pipeline_object_content': pipeline,
-                }
-            )
-
-        # ... we looks in the pipeline for a deal stage matching the `deal_stage_id`
-        deal_stage = None
-        for stage in stages:
-            if stage['stageId'] == deal_stage_id:
-                deal_stage = stage
-                break
+        # ... we looks in the pipelines for a deal stage matching the `deal_stage_id`
+        deal_stage = self.client.pipeline_registry.get_stage(deal_stage_id)
 
         if not deal_stage:
             # This should not happen. At the moment we just log an error in order to be warned of
@@ -686,7 +1001,6 @@ class Deal(HubspotAPIObject):
                 extra={
                     'hubspot_id': self.hubspot_id,
                     'api_object_content': self.api_object_content,
-                    'pipeline_object_content': pipeline,
                     'deal_stage_id': deal_stage_id,
                 }
             )
@@ -733,12 +1047,14 @@ class Deal(HubspotAPIObject):
     def payment_mode(self):
         return self._get_property_value('payment_mode')
 
-    # FIXME: Change to `cached_property`?
+    # Properties of the line items to retrieve in order to build the products of a deal.
+    PRODUCT_PROPERTIES = [
+        'name', 'price', 'quantity',
+        'discount', 'hs_discount_percentage',
+    ]
 
-    # TODO: This cost few queries and should be explained. Also, the product-batch endpoint seems
-    # TODO: not working at the moment ...
     @property
-    def products(self, extra_properties=None):
+    def products(self):
         """
         Get the products associated to the deal.
 
@@ -749,39 +1065,104 @@ class Deal(HubspotAPIObject):
         Notes
         -----
         This method will perform the following calls to the Hubspot API:
-            - One call to the associations API.
-            - A call per line item to the lines API.
+            - One batch-read call to the associations API.
+            - One batch-read call to the lines API per `constants.BATCH_READ_MAX_SIZE` line items.
         Lines are directly converted to product in order to avoid to perform an extra call to the
         product API.
         TODO: Is it safer to perform an extra call to products?
         """
-        if self._products:
+        if self._products is not None:
             # We already fetched the products API.
             return self._products
 
-        logger.debug(f"Processing products for deal with hubspot_id: {self.hubspot_id} ...")
+        self.load_products([self], hubspot_client=self.client)
+        return self._products
 
-        products = []
+    @classmethod
+    def load_products(cls, deals, extra_properties=None, hubspot_client=None):
+        """
+        Fetch the products of many deals at once and store them into each deal.
+
+        The line items of all the deals are read together through the batch-read endpoint of the
+        lines API, so the number of calls does not depend on the number of line items per deal.
+
+        Parameters
+        ----------
+        deals: list of Deal
+            The deals should all belong to the same hubspot portal.
+        extra_properties: list, optional
+            Extra line item properties to retrieve along with `PRODUCT_PROPERTIES`.
+        hubspot_client: HubspotClient, optional
+            Defaults to the client of the first deal.
+
+        Returns
+        -------
+        dict
+            The list of products of each deal, indexed by the hubspot id of the deal.
+        """
+        deals = list(deals)
+        if not deals:
+            return {}
 
-        # We have to use the association client in order to retrieve the lines of type product
-        # associated to our deal.
+        client = hubspot_client or deals[0].client
 
-        properties_to_retrieve = [
-            'name', 'price', 'quantity',
-            'discount', 'hs_discount_percentage',
-        ]
+        properties_to_retrieve = list(cls.PRODUCT_PROPERTIES)
         if extra_properties:
             properties_to_retrieve.extend(extra_properties)
 
-        lines_ids = self.associations_client.get_deal_to_lines_items(self.hubspot_id)
+        # We have to read the associations of the deals in order to retrieve their lines of type
+        # product ...
+        associated_ids = client.get_associations_batch(
+            OBJECT_TYPE_DEALS, 'line_items', [deal.hubspot_id for deal in deals],
+        )
+        lines_ids_by_deal = {
+            deal.hubspot_id: associated_ids.get(str(deal.hubspot_id), []) for deal in deals
+        }
+
+        # ... we then retrieve all those lines at once by using the `LinesClient` ...
+        lines_contents = client.get_line_items_batch(
+            [
+                line_id
+                for lines_ids in lines_ids_by_deal.values()
+                for line_id in lines_ids
+            ],
+            properties=properties_to_retrieve,
+        )
+
+        products_by_deal = {}
+        for deal in deals:
+            deal._set_products_from_lines(lines_ids_by_deal[deal.hubspot_id], lines_contents)
+            products_by_deal[deal.hubspot_id] = deal._products
+
+        return products_by_deal
+
+    def _set_products_from_lines(self, lines_ids, lines_contents):
+        """
+        Convert the line items of the deal into products and store them into the deal.
+
+        Parameters
+        ----------
+        lines_ids: list
+            The hubspot ids of the line items associated to the deal.
+        lines_contents: dict
+            The api object contents of the line items, indexed by their hubspot id (as a string).
+        """
+        products = []
         for line_id in lines_ids:
-            # We first retrieve the line by using the `LinesClient` ...
-            line = Line(
-                hubspot_id=line_id,
-                # We explicitly ask for the name and for the price of the product.
-                extra_properties=properties_to_retrieve,
-            )
-            # ... we then convert it into a product (if possible) ...
+            try:
+                line_content = lines_contents[str(line_id)]
+            except KeyError:
+                logger.warning(
+                    "Cannot retrieve the line item associated to the deal.",
+                    extra={
+                        'hubspot_id': line_id,
+                        'deal_hubspot_id': self.hubspot_id,
+                    },
+                )
+                continue
+
+            line = Line.from_api_object_content(line_id, line_content, hubspot_client=self.client)
+            # ... we then convert each line into a product (if possible) ...
             try:
                 product = Product.from_line_item(line, hubspot_client=self.client)
             except ValueError:
@@ -804,11 +1185,13 @@ class Deal(HubspotAPIObject):
             f"Successfully processed products for deal with hubspot_id: {self.hubspot_id}."
         )
 
-        return self._products
-
     def _fetch_api_object(self):
         """Fetch the deal from the API."""
-        return self.deals_client.get(deal_id=self.hubspot_id)
+        return self.deals_client.get(
+            deal_id=self.hubspot_id,
+            params=self._get_fetch_params(),
+            doseq=True,
+        )
 
     def update(self, data):
         """
@@ -826,6 +1209,7 @@ class Deal(HubspotAPIObject):
             self.hubspot_id,
             data,
         )
+        self.invalidate_cache()
 
 
 class HubspotProperty:
@@ -903,8 +1287,6 @@ class HubspotProperties(HubspotAPIObject):
     https://developers.hubspot.com/docs/methods/companies/get_company_properties
     """
 
-    _properties = []
-
     def __init__(self, object_type, fetch=True, hubspot_client=None, **kwargs):
         """
         Parameters
@@ -930,17 +1312,29 @@ class HubspotProperties(HubspotAPIObject):
             **kwargs,
         )
 
+    def fetch(self, use_cache=True):
+        """
+        Read the properties from the property schema of the portal (see
+        `HubspotClient.get_property_schema`), which is loaded once for all the instances.
+
+        Parameters
+        ----------
+        use_cache: bool, optional
+            Set to `False` in order to reload the property schema.
+        """
+        property_schema = self.client.get_property_schema(self.hubspot_id)
+        if not use_cache:
+            property_schema.refresh()
+        self.api_object_content = property_schema.properties
+        self.__dict__.pop('properties', None)
+
     def _fetch_api_object(self):
         return self.properties_client.get_all(object_type=self.hubspot_id)
 
-    @property
+    @cached_property
     def properties(self):
         """Retrieve properties as helper classes."""
-        if not self._properties:
-            for property_data in self.api_object_content:
-                self._properties.append(HubspotProperty(property_data))
-
-        return self._properties
+        return [HubspotProperty(property_data) for property_data in self.api_object_content]
 
     def update(self, data):
         raise NotImplementedError
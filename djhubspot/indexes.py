@@ -0,0 +1,245 @@
+from datetime import timedelta
+import logging
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import HubspotCompanyPropertyValue, HubspotWatermark
+from .utils import chunks, get_property_value
+
+logger = logging.getLogger('vendors.dj_hubspot')
+
+
+def now_as_hubspot_timestamp():
+    """The current time as an hubspot timestamp (in milliseconds)."""
+    return int(time.time() * 1000)
+
+
+class CompanyPropertyIndex:
+    """
+    A persistent index of the companies of a portal by property value, stored in the database.
+
+    The index of a property is built once by crawling all the companies of the portal. It is then
+    kept current by refreshing it incrementally with the recently modified companies, and by
+    applying the `company.propertyChange` events received by the `WebhookView`.
+
+    Optional settings:
+
+    - HUBSPOT_COMPANY_INDEX_MAX_AGE: after how many seconds a lookup triggers an incremental
+      refresh of the index. `None` disables the automatic refresh. Defaults to 300.
+    """
+
+    WATERMARK_PREFIX = 'company_index:'
+
+    # Hubspot only returns the companies modified during the last 30 days. Older indexes have to
+    # be rebuilt.
+    RECENTLY_MODIFIED_MAX_AGE = timedelta(days=30)
+
+    # Values longer than this cannot be indexed (see `HubspotCompanyPropertyValue`).
+    MAX_VALUE_LENGTH = 255
+
+    def __init__(self, hubspot_client):
+        """
+        Parameters
+        ----------
+        hubspot_client: HubspotClient
+        """
+        self.client = hubspot_client
+        self.portal_key = hubspot_client.portal_key
+
+    @property
+    def max_age(self):
+        return getattr(settings, 'HUBSPOT_COMPANY_INDEX_MAX_AGE', 300)
+
+    def _watermarks(self):
+        return HubspotWatermark.objects.filter(
+            portal_key=self.portal_key,
+            name__startswith=self.WATERMARK_PREFIX,
+        )
+
+    def _get_watermark(self, prop_name):
+        return self._watermarks().filter(name=self.WATERMARK_PREFIX + prop_name).first()
+
+    def _set_watermark(self, prop_name, timestamp):
+        HubspotWatermark.objects.update_or_create(
+            portal_key=self.portal_key,
+            name=self.WATERMARK_PREFIX + prop_name,
+            defaults={'timestamp': timestamp},
+        )
+
+    @property
+    def indexed_properties(self):
+        """The names of the properties which are indexed for the portal."""
+        return [
+            name[len(self.WATERMARK_PREFIX):]
+            for name in self._watermarks().values_list('name', flat=True)
+        ]
+
+    def _index_value(self, prop_name, company_id, prop_value):
+        """Store (or remove, if it is empty) the value of a property of a company."""
+        values = HubspotCompanyPropertyValue.objects.filter(
+            portal_key=self.portal_key,
+            property_name=prop_name,
+            company_id=company_id,
+        )
+
+        prop_value = '' if prop_value is None else str(prop_value)
+        if not prop_value or len(prop_value) > self.MAX_VALUE_LENGTH:
+            values.delete()
+            return
+
+        updated = values.update(property_value=prop_value)
+        if not updated:
+            HubspotCompanyPropertyValue.objects.create(
+                portal_key=self.portal_key,
+                property_name=prop_name,
+                property_value=prop_value,
+                company_id=company_id,
+            )
+
+    def build(self, prop_name):
+        """
+        Index all the companies of the portal on the given property.
+
+        This crawls all the companies of the portal, it should be done only once per property.
+        The companies are indexed under a temporary property name, swapped with the previous
+        index once the crawl is completed: the previous index stays available meanwhile, and no
+        transaction is held open during the crawl.
+        """
+        logger.info(f"Indexing Hubspot companies on '{prop_name}' property ...")
+
+        # Hubspot property names cannot contain a colon.
+        building_name = f'{prop_name}:building'
+        HubspotCompanyPropertyValue.objects.filter(
+            portal_key=self.portal_key,
+            property_name=building_name,
+        ).delete()
+
+        # Changes performed during the crawl will be caught by the next refresh.
+        started_at = now_as_hubspot_timestamp()
+        all_companies = self.client.iter_companies(properties=[prop_name])
+
+        # Companies are streamed page by page and written by chunks, so that the whole portal is
+        # never loaded in memory.
+        values = (
+            HubspotCompanyPropertyValue(
+                portal_key=self.portal_key,
+                property_name=building_name,
+                property_value=str(prop_value),
+                company_id=company['companyId'],
+            )
+            for company, prop_value in (
+                (company, get_property_value(company, prop_name))
+                for company in all_companies
+            )
+            if prop_value and len(str(prop_value)) <= self.MAX_VALUE_LENGTH
+        )
+        for values_chunk in chunks(values, 1000):
+            HubspotCompanyPropertyValue.objects.bulk_create(values_chunk)
+
+        with transaction.atomic():
+            HubspotCompanyPropertyValue.objects.filter(
+                portal_key=self.portal_key,
+                property_name=prop_name,
+            ).delete()
+            HubspotCompanyPropertyValue.objects.filter(
+                portal_key=self.portal_key,
+                property_name=building_name,
+            ).update(property_name=prop_name)
+
+            self._set_watermark(prop_name, started_at)
+
+        logger.info(f"Indexing of Hubspot companies on '{prop_name}' property completed.")
+
+    def refresh(self):
+        """
+        Update the indexes of the portal with the companies modified since their last refresh.
+        """
+        watermarks = list(self._watermarks())
+        if not watermarks:
+            return
+
+        started_at = now_as_hubspot_timestamp()
+        oldest_allowed = started_at - self.RECENTLY_MODIFIED_MAX_AGE.total_seconds() * 1000
+
+        to_refresh = []
+        for watermark in watermarks:
+            prop_name = watermark.name[len(self.WATERMARK_PREFIX):]
+            if watermark.timestamp < oldest_allowed:
+                self.build(prop_name)
+            else:
+                to_refresh.append((prop_name, watermark.timestamp))
+
+        if not to_refresh:
+            return
+
+        since = min(timestamp for _prop_name, timestamp in to_refresh)
+        modified_companies = self.client.get_recently_modified_companies(since=since)
+
+        with transaction.atomic():
+            for company in modified_companies:
+                company_id = company['companyId']
+                for prop_name, _timestamp in to_refresh:
+                    if company.get('isDeleted'):
+                        prop_value = None
+                    else:
+                        prop_value = get_property_value(company, prop_name)
+                    self._index_value(prop_name, company_id, prop_value)
+
+            for prop_name, _timestamp in to_refresh:
+                self._set_watermark(prop_name, started_at)
+
+        logger.debug(f"{len(modified_companies)} company(ies) refreshed in the index.")
+
+    def apply_event(self, event):
+        """
+        Keep the index current with a webhook event.
+
+        Parameters
+        ----------
+        event: HubspotEvent
+        """
+        subscription_type = event.message.get('subscriptionType')
+        company_id = event.message.get('objectId')
+
+        if subscription_type == 'company.deletion':
+            self.remove_company(company_id)
+        elif subscription_type == 'company.propertyChange':
+            indexed_properties = self.indexed_properties
+            # Events could have been merged (see `coalesce_events`).
+            for prop_name, prop_value in event.changed_properties.items():
+                if prop_name in indexed_properties:
+                    self._index_value(prop_name, company_id, prop_value)
+
+    def remove_company(self, company_id):
+        HubspotCompanyPropertyValue.objects.filter(
+            portal_key=self.portal_key,
+            company_id=company_id,
+        ).delete()
+
+    def lookup(self, prop_name, prop_value):
+        """
+        Return the ids of the companies having the given value for the given property.
+
+        The index of the property is built on first use, and refreshed if it is older than
+        `HUBSPOT_COMPANY_INDEX_MAX_AGE`.
+
+        Returns
+        -------
+        list of int
+        """
+        watermark = self._get_watermark(prop_name)
+        if watermark is None:
+            self.build(prop_name)
+        elif self.max_age is not None:
+            if watermark.timestamp < now_as_hubspot_timestamp() - self.max_age * 1000:
+                self.refresh()
+
+        return list(
+            HubspotCompanyPropertyValue.objects.filter(
+                portal_key=self.portal_key,
+                property_name=prop_name,
+                property_value=str(prop_value),
+            ).order_by('company_id').values_list('company_id', flat=True)
+        )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from djhubspot.client import HubspotClient
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the persistent index of the Hubspot companies by property value. Without "
+        "property names, all the indexed properties are refreshed incrementally."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'properties', nargs='*',
+            help="The names of the properties to index.",
+        )
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help="Rebuild the index of the given properties from scratch.",
+        )
+
+    def handle(self, *args, **options):
+        company_index = HubspotClient.for_portal().company_index
+        indexed_properties = company_index.indexed_properties
+
+        for prop_name in options['properties']:
+            if options['rebuild'] or prop_name not in indexed_properties:
+                self.stdout.write(f"Building the index of '{prop_name}' ...")
+                company_index.build(prop_name)
+
+        company_index.refresh()
+        self.stdout.write(self.style.SUCCESS("Company index is up to date."))
@@ -0,0 +1,33 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from djhubspot.sync import DeltaSync
+
+
+class Command(BaseCommand):
+    help = (
+        "Sync `HubspotSyncable` models with the Hubspot objects modified since their last sync."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='+',
+            help="The labels of the models to sync, ex: 'crm.Company'.",
+        )
+        parser.add_argument(
+            '--full', action='store_true',
+            help="Sync all the objects of the portal, not only the recently modified ones.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            models = [apps.get_model(label) for label in options['models']]
+        except (LookupError, ValueError) as e:
+            raise CommandError(e)
+
+        for model in models:
+            counts = DeltaSync(model).run(full=options['full'])
+            self.stdout.write(self.style.SUCCESS(
+                f"{model._meta.label}: {counts['created']} created, {counts['updated']} "
+                f"updated, {counts['unchanged']} unchanged."
+            ))
@@ -0,0 +1,73 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from djhubspot.queue import WebhookQueueWorker
+
+
+class Command(BaseCommand):
+    help = (
+        "Process the Hubspot webhook events queued by a `WebhookView` having `queue_events` "
+        "enabled."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--view',
+            default=getattr(settings, 'HUBSPOT_WEBHOOK_VIEW', None),
+            help=(
+                "The dotted path of the `WebhookView` subclass processing the events. Defaults "
+                "to the `HUBSPOT_WEBHOOK_VIEW` setting."
+            ),
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=1,
+            help="How many events can be processed at the same time.",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help="How many webhook requests are processed at once.",
+        )
+        parser.add_argument(
+            '--max-attempts', type=int, default=5,
+            help="How many times a webhook request is processed before giving up.",
+        )
+        parser.add_argument(
+            '--retry-backoff', type=float, default=5,
+            help="How many seconds a failed webhook request waits before its first retry.",
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Exit once no webhook request is ready to be processed, instead of waiting.",
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=1,
+            help="How many seconds to wait for new events when the queue is empty.",
+        )
+
+    def handle(self, *args, **options):
+        if not options['view']:
+            raise CommandError(
+                "The `--view` option or the `HUBSPOT_WEBHOOK_VIEW` setting is required.",
+            )
+        if options['concurrency'] < 1:
+            raise CommandError("The concurrency should be at least 1.")
+
+        worker = WebhookQueueWorker(
+            import_string(options['view'])(),
+            concurrency=options['concurrency'],
+            batch_size=options['batch_size'],
+            max_attempts=options['max_attempts'],
+            retry_backoff=options['retry_backoff'],
+        )
+
+        while True:
+            processed, failed = worker.run_once()
+            if processed:
+                self.stdout.write(f"{processed} webhook request(s) processed, {failed} failed.")
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['sleep'])
@@ -0,0 +1,65 @@
+import threading
+import time
+
+
+class ClientMetrics:
+    """
+    Counters of the calls performed by a `HubspotClient`.
+
+    Example:
+    ```
+    client.metrics.snapshot()
+    # {'calls': 120, 'errors': 2, 'time': 14.2}
+    ```
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def get(self, name):
+        return self._counters.get(name, 0)
+
+    def snapshot(self):
+        """
+        Returns
+        -------
+        dict
+            The value of each counter, by name.
+        """
+        with self._lock:
+            return dict(self._counters)
+
+    def reset(self):
+        with self._lock:
+            self._counters = {}
+
+    def after_fork(self):
+        """Reset the counters in a child process, its lock could have been held by the parent."""
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def instrument(self, call):
+        """
+        Count the calls, failed calls (`errors`) and the time spent in them (in seconds).
+
+        Returns
+        -------
+        callable
+        """
+        def instrumented_call(*args, **kwargs):
+            started_at = self.clock()
+            try:
+                return call(*args, **kwargs)
+            except Exception:
+                self.increment('errors')
+                raise
+            finally:
+                self.increment('calls')
+                self.increment('time', self.clock() - started_at)
+        return instrumented_call
@@ -0,0 +1,41 @@
+# Generated by Django 2.2.28 on 2026-10-17 16:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HubspotWatermark',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('portal_key', models.CharField(max_length=16, verbose_name='Portal key')),
+                ('name', models.CharField(help_text="What is synchronized, ex: 'company_index:domain'", max_length=255, verbose_name='Name')),
+                ('timestamp', models.BigIntegerField(help_text='Hubspot timestamp (in milliseconds) up to which the data is synchronized', verbose_name='Timestamp')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+            ],
+            options={
+                'unique_together': {('portal_key', 'name')},
+            },
+        ),
+        migrations.CreateModel(
+            name='HubspotCompanyPropertyValue',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('portal_key', models.CharField(max_length=16, verbose_name='Portal key')),
+                ('property_name', models.CharField(max_length=255, verbose_name='Property name')),
+                ('property_value', models.CharField(max_length=255, verbose_name='Property value')),
+                ('company_id', models.BigIntegerField(verbose_name='Company ID')),
+            ],
+            options={
+                'unique_together': {('portal_key', 'property_name', 'company_id')},
+                'index_together': {('portal_key', 'property_name', 'property_value')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.28 on 2026-10-17 16:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djhubspot', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HubspotWebhookBatch',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('body', models.TextField(help_text='The raw body of the webhook request', verbose_name='Body')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='pending', max_length=16, verbose_name='Status')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Attempts')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('received_at', models.DateTimeField(auto_now_add=True, verbose_name='Received at')),
+                ('claimed_at', models.DateTimeField(blank=True, null=True, verbose_name='Claimed at')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Processed at')),
+            ],
+            options={
+                'ordering': ('pk',),
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-17 16:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djhubspot', '0002_webhook_batch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hubspotwebhookbatch',
+            name='available_at',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='The batch is not processed again before this date', null=True, verbose_name='Available at'),
+        ),
+    ]
@@ -1,8 +1,14 @@
+import json
 import logging
 
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
+from .client import HubspotClient
+from .sync import DeltaSync
+from .utils import chunks, hubspot_timestamp_to_datetime, to_hubspot_value
+
 logger = logging.getLogger('vendors.dj_hubspot')
 
 
@@ -30,8 +36,121 @@ class HubspotSyncableManager(models.Manager):
             defaults=defaults or {},
         )
 
+    SYNC_MANY_BATCH_SIZE = 500
+
+    def _has_changed(self, obj, field_name, value):
+        field = self.model._meta.get_field(field_name)
+        if not field.is_relation:
+            # Ex: an integer field receiving the string of an integer from the Hubspot API.
+            value = field.to_python(value)
+        return getattr(obj, field_name) != value
+
+    def sync_many(self, items, batch_size=None):
+        """
+        Perform the equivalent of `sync_with_hubspot` on many objects at once.
+
+        For each batch of objects, the existing objects are loaded with a single query, then the
+        new objects are inserted with a single `bulk_create`, and the existing ones updated with a
+        single `bulk_update`. `hubspot_last_synced_at` is set on all the objects.
+
+        Parameters
+        ----------
+        items: iterable of tuple
+            The hubspot id of each object, with its `defaults`. When an hubspot id is given many
+            times, its last `defaults` are used.
+        batch_size: int, optional
+            Defaults to `SYNC_MANY_BATCH_SIZE`.
+
+        Returns
+        -------
+        dict
+            How many objects have been `created`, `updated` and left `unchanged`.
+        """
+        counts = {'created': 0, 'updated': 0, 'unchanged': 0}
+        synced_at = timezone.now()
+
+        for items_batch in chunks(items, batch_size or self.SYNC_MANY_BATCH_SIZE):
+            hubspot_id_field = self.model._meta.get_field('hubspot_id')
+            defaults_by_hubspot_id = {
+                hubspot_id_field.to_python(hubspot_id): defaults or {}
+                for hubspot_id, defaults in items_batch
+            }
+            existing_objects = self.in_bulk(
+                list(defaults_by_hubspot_id), field_name='hubspot_id',
+            )
+
+            to_create = []
+            to_update = []
+            updated_fields = {'hubspot_last_synced_at'}
+            for hubspot_id, defaults in defaults_by_hubspot_id.items():
+                obj = existing_objects.get(hubspot_id)
+                if obj is None:
+                    to_create.append(self.model(
+                        hubspot_id=hubspot_id,
+                        hubspot_last_synced_at=synced_at,
+                        **defaults,
+                    ))
+                    continue
+
+                changed_fields = [
+                    field_name
+                    for field_name, value in defaults.items()
+                    if self._has_changed(obj, field_name, value)
+                ]
+                for field_name in changed_fields:
+                    setattr(obj, field_name, defaults[field_name])
+                obj.hubspot_last_synced_at = synced_at
+                updated_fields.update(changed_fields)
+                to_update.append(obj)
+                counts['updated' if changed_fields else 'unchanged'] += 1
+
+            with transaction.atomic(using=self.db):
+                self.bulk_create(to_create)
+                if to_update:
+                    self.bulk_update(to_update, sorted(updated_fields))
+            counts['created'] += len(to_create)
+
+        logger.debug(f"{self.model.__name__} synced with hubspot: {counts}")
+        return counts
+
+    def sync_modified(self, hubspot_client=None, full=False):
+        """
+        Sync the objects with the Hubspot objects modified since the last call.
+
+        See `djhubspot.sync.DeltaSync`.
+
+        Returns
+        -------
+        dict
+            How many objects have been `created`, `updated` and left `unchanged`.
+        """
+        return DeltaSync(self.model, hubspot_client=hubspot_client).run(full=full)
+
 
 class HubspotSyncable(models.Model):
+    """
+    A model synced with a type of Hubspot objects.
+
+    The synced fields are declared in `hubspot_properties`, ex:
+
+    ```
+    class Company(HubspotSyncable):
+        hubspot_object_type = 'companies'
+        hubspot_properties = {
+            'name': 'name',
+            'employees': 'numberofemployees',
+        }
+    ```
+
+    The values last synced with Hubspot are stored in `hubspot_synced_values`, so that
+    `sync_to_hubspot` only sends the properties which changed since then.
+    """
+
+    # One of `companies`, `contacts`, `deals`.
+    hubspot_object_type = None
+
+    # The name of the synced Hubspot properties, by model field name.
+    hubspot_properties = {}
 
     hubspot_id = models.BigIntegerField(
         _("Hubspot ID"),
@@ -45,11 +164,169 @@ class HubspotSyncable(models.Model):
         help_text=_("When the model has been synced with Hubspot for the last time"),
     )
 
+    hubspot_synced_values = models.TextField(
+        _("Hubspot synced values"),
+        blank=True, default='', editable=False,
+        help_text=_("The values of the Hubspot properties when they have been last synced"),
+    )
+
     class Meta:
         abstract = True
 
-    def sync_from_hubspot(self):
-        pass
+    def get_hubspot_client(self):
+        """
+        Return the client used to sync the object, override it to target another portal.
+
+        Returns
+        -------
+        djhubspot.client.HubspotClient
+        """
+        return HubspotClient.for_portal()
+
+    def get_hubspot_values(self):
+        """
+        Returns
+        -------
+        dict
+            The current values of the synced properties, by property name.
+        """
+        return {
+            property_name: to_hubspot_value(getattr(self, field_name))
+            for field_name, property_name in self.hubspot_properties.items()
+        }
+
+    def get_hubspot_changes(self):
+        """
+        Returns
+        -------
+        dict
+            The values of the synced properties which changed since the last sync, by property
+            name.
+        """
+        synced_values = json.loads(self.hubspot_synced_values or '{}')
+        return {
+            property_name: value
+            for property_name, value in self.get_hubspot_values().items()
+            if property_name not in synced_values or synced_values[property_name] != value
+        }
+
+    @classmethod
+    def _from_hubspot_value(cls, field_name, value):
+        field = cls._meta.get_field(field_name)
+        if value is None or value == '':
+            return None if field.null else field.get_default()
+        if isinstance(field, models.DateField) and str(value).isdigit():
+            # Dates may be given as timestamps in milliseconds.
+            value = hubspot_timestamp_to_datetime(int(value))
+            if not isinstance(field, models.DateTimeField):
+                value = value.date()
+        return field.to_python(value)
+
+    @classmethod
+    def get_hubspot_defaults(cls, values):
+        """
+        Convert the values of the synced properties of an Hubspot object to field values.
+
+        Parameters
+        ----------
+        values: dict
+            The values of the properties, by property name.
+
+        Returns
+        -------
+        dict
+            The field values by field name, including `hubspot_synced_values`. They could be used
+            as the `defaults` of `HubspotSyncableManager.sync_with_hubspot`.
+        """
+        defaults = {
+            field_name: cls._from_hubspot_value(field_name, values.get(property_name))
+            for field_name, property_name in cls.hubspot_properties.items()
+        }
+        defaults['hubspot_synced_values'] = json.dumps({
+            property_name: to_hubspot_value(defaults[field_name])
+            for field_name, property_name in cls.hubspot_properties.items()
+        }, sort_keys=True)
+        return defaults
+
+    def _mark_as_synced(self, save):
+        self.hubspot_synced_values = json.dumps(self.get_hubspot_values(), sort_keys=True)
+        self.hubspot_last_synced_at = timezone.now()
+        if not save:
+            return
+        if self.pk is None:
+            self.save()
+        else:
+            self.save(update_fields=[
+                'hubspot_id', 'hubspot_last_synced_at', 'hubspot_synced_values',
+                *self.hubspot_properties,
+            ])
+
+    def sync_from_hubspot(self, save=True):
+        """
+        Update the synced fields with the values of the Hubspot object.
+
+        Only the synced properties are requested, with a single API call.
+
+        Parameters
+        ----------
+        save: bool, optional
+            Whether to save the updated fields.
+        """
+        if self.hubspot_id is None:
+            raise ValueError(f"{self} has no hubspot id.")
+
+        response = self.get_hubspot_client().get_crm_objects_client()._call(
+            f'{self.hubspot_object_type}/{self.hubspot_id}',
+            params={'properties': ','.join(self.hubspot_properties.values())},
+        )
+        for field_name, value in self.get_hubspot_defaults(response.get('properties', {})).items():
+            setattr(self, field_name, value)
+
+        self._mark_as_synced(save)
+
+    def sync_to_hubspot(self, force=False, validate=None, save=True):
+        """
+        Send the synced fields which changed since the last sync to Hubspot.
+
+        The Hubspot object is created when the model has no hubspot id yet. Nothing is sent when
+        no field changed.
+
+        Parameters
+        ----------
+        force: bool, optional
+            Send all the synced fields, even if they did not change.
+        validate: bool, optional
+            See `HubspotClient.clean_properties`.
+        save: bool, optional
+            Whether to save the hubspot id and the synced values.
+
+        Returns
+        -------
+        bool
+            Whether an API call has been performed.
+        """
+        is_new = self.hubspot_id is None
+        changes = self.get_hubspot_values() if force or is_new else self.get_hubspot_changes()
+        if not changes:
+            logger.debug(f"{self} did not change since its last sync with Hubspot.")
+            return False
+
+        hubspot_client = self.get_hubspot_client()
+        data = {
+            'properties': hubspot_client.clean_properties(
+                self.hubspot_object_type, changes, validate,
+            ),
+        }
+        crm_objects_client = hubspot_client.get_crm_objects_client()
+        if is_new:
+            response = crm_objects_client._call(
+                self.hubspot_object_type, method='POST', data=data,
+            )
+            self.hubspot_id = int(response['id'])
+        else:
+            crm_objects_client._call(
+                f'{self.hubspot_object_type}/{self.hubspot_id}', method='PATCH', data=data,
+            )
 
-    def sync_to_hubspot(self):
-        pass
+        self._mark_as_synced(save)
+        return True
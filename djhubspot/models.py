@@ -0,0 +1,104 @@
+from django.db import models
+from django.utils.translation import ugettext_lazy as _
+
+
+class HubspotWatermark(models.Model):
+    """
+    High-water mark of an incremental synchronization with a Hubspot portal.
+
+    Portals are identified by their `HubspotClient.portal_key`.
+    """
+
+    portal_key = models.CharField(_("Portal key"), max_length=16)
+
+    name = models.CharField(
+        _("Name"),
+        max_length=255,
+        help_text=_("What is synchronized, ex: 'company_index:domain'"),
+    )
+
+    timestamp = models.BigIntegerField(
+        _("Timestamp"),
+        help_text=_("Hubspot timestamp (in milliseconds) up to which the data is synchronized"),
+    )
+
+    updated_at = models.DateTimeField(_("Updated at"), auto_now=True)
+
+    class Meta:
+        unique_together = ('portal_key', 'name')
+
+    def __str__(self):
+        return f'{self.name} ({self.portal_key}): {self.timestamp}'
+
+
+class HubspotCompanyPropertyValue(models.Model):
+    """
+    The value of a property of a company, used to look up companies by property value.
+
+    See `djhubspot.indexes.CompanyPropertyIndex`.
+    """
+
+    portal_key = models.CharField(_("Portal key"), max_length=16)
+
+    property_name = models.CharField(_("Property name"), max_length=255)
+
+    property_value = models.CharField(_("Property value"), max_length=255)
+
+    company_id = models.BigIntegerField(_("Company ID"))
+
+    class Meta:
+        unique_together = ('portal_key', 'property_name', 'company_id')
+        index_together = [
+            ('portal_key', 'property_name', 'property_value'),
+        ]
+
+    def __str__(self):
+        return f'{self.property_name}={self.property_value}: {self.company_id}'
+
+
+class HubspotWebhookBatch(models.Model):
+    """
+    A batch of events received from a Hubspot webhook, queued to be processed later on.
+
+    See `djhubspot.queue`.
+    """
+
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (STATUS_PENDING, _("Pending")),
+        (STATUS_PROCESSING, _("Processing")),
+        (STATUS_DONE, _("Done")),
+        (STATUS_FAILED, _("Failed")),
+    )
+
+    body = models.TextField(_("Body"), help_text=_("The raw body of the webhook request"))
+
+    status = models.CharField(
+        _("Status"),
+        max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True,
+    )
+
+    attempts = models.PositiveIntegerField(_("Attempts"), default=0)
+
+    error = models.TextField(_("Error"), blank=True)
+
+    received_at = models.DateTimeField(_("Received at"), auto_now_add=True)
+
+    claimed_at = models.DateTimeField(_("Claimed at"), blank=True, null=True)
+
+    processed_at = models.DateTimeField(_("Processed at"), blank=True, null=True)
+
+    available_at = models.DateTimeField(
+        _("Available at"), blank=True, null=True, db_index=True,
+        help_text=_("The batch is not processed again before this date"),
+    )
+
+    class Meta:
+        ordering = ('pk',)
+
+    def __str__(self):
+        return f'Webhook batch #{self.pk} ({self.status})'
@@ -0,0 +1,75 @@
+import logging
+
+from .registries import PortalRegistry, get_portal_registry
+
+logger = logging.getLogger('vendors.dj_hubspot')
+
+
+class OwnerDirectory(PortalRegistry):
+    """
+    The owners of a portal, loaded at once and indexed by id and email.
+
+    Optional settings:
+
+    - HUBSPOT_OWNERS_MAX_AGE: after how many seconds the owners are reloaded. `None` to never
+      reload them automatically. Defaults to 3600.
+    """
+
+    MAX_AGE_SETTING = 'HUBSPOT_OWNERS_MAX_AGE'
+
+    def load(self):
+        """Load all the owners of the portal. It costs one API call."""
+        owners = self.client.get_owners_client().get_owners()
+
+        owners_by_id = {}
+        owners_by_email = {}
+        for owner in owners:
+            owners_by_id[str(owner['ownerId'])] = owner
+            if owner.get('email'):
+                owners_by_email[owner['email'].lower()] = owner
+
+        logger.debug(f"{len(owners_by_id)} owner(s) loaded.")
+        return {'id': owners_by_id, 'email': owners_by_email}
+
+    def get_by_id(self, owner_id):
+        """
+        Parameters
+        ----------
+        owner_id: int or str
+
+        Returns
+        -------
+        dict
+            The owner as returned by the Hubspot API, `None` if there is no such owner.
+        """
+        return self._get('id', str(owner_id))
+
+    def get_by_email(self, owner_email):
+        """
+        Parameters
+        ----------
+        owner_email: str
+            Case insensitive.
+
+        Returns
+        -------
+        dict
+            The owner as returned by the Hubspot API, `None` if there is no such owner.
+        """
+        return self._get('email', owner_email.lower())
+
+    @property
+    def owners(self):
+        """All the owners of the portal."""
+        return list(self._get_index('id').values())
+
+
+def get_owner_directory(hubspot_client):
+    """
+    Return the owner directory shared by all the clients targeting the same portal.
+
+    Returns
+    -------
+    OwnerDirectory
+    """
+    return get_portal_registry(OwnerDirectory, hubspot_client)
@@ -0,0 +1,52 @@
+import logging
+
+logger = logging.getLogger('vendors.dj_hubspot')
+
+
+class HubspotPager:
+    """
+    Iterate lazily over the records of a paginated endpoint of the Hubspot API.
+
+    Pages are fetched one at a time, when the records of the previous one have all been consumed,
+    so that only one page is kept in memory.
+
+    The `offset` attribute could be saved in order to resume the iteration later on: it is the
+    offset of the page containing the last record consumed, and is moved to the next page only
+    once all the records of the page have been consumed. When resuming, some records could then be
+    read twice, but none is skipped.
+
+    Example:
+    ```
+    pager = client.iter_contacts(properties=['email'], offset=saved_offset)
+    for contact in pager:
+        process(contact)
+        saved_offset = pager.offset
+    ```
+    """
+
+    def __init__(self, fetch_page, offset=None):
+        """
+        Parameters
+        ----------
+        fetch_page: callable
+            Called with the offset of a page, should return a tuple made of the list of the
+            records of the page, the offset of the next page and whether there are more pages.
+        offset: optional
+            The offset of the first page to fetch, `None` to start from the beginning.
+        """
+        self.fetch_page = fetch_page
+        self.offset = offset
+        self.pages = 0
+        self.exhausted = False
+
+    def __iter__(self):
+        while not self.exhausted:
+            records, next_offset, has_more = self.fetch_page(self.offset)
+            self.pages += 1
+            logger.debug(f"Page #{self.pages} fetched with {len(records)} record(s).")
+
+            for record in records:
+                yield record
+
+            self.offset = next_offset
+            self.exhausted = not has_more
@@ -0,0 +1,67 @@
+import logging
+
+from .registries import PortalRegistry, get_portal_registry
+
+logger = logging.getLogger('vendors.dj_hubspot')
+
+
+class DealPipelineRegistry(PortalRegistry):
+    """
+    The deal pipelines of a portal, loaded at once and indexed by id, as well as their stages.
+
+    Optional settings:
+
+    - HUBSPOT_PIPELINES_MAX_AGE: after how many seconds the pipelines are reloaded. `None` to
+      never reload them automatically. Defaults to 3600.
+    """
+
+    MAX_AGE_SETTING = 'HUBSPOT_PIPELINES_MAX_AGE'
+
+    def load(self):
+        """Load all the deal pipelines of the portal. It costs one API call."""
+        pipelines = self.client.get_pipelines_client().get_all('deals')
+
+        pipelines_by_id = {}
+        stages_by_id = {}
+        for pipeline in pipelines:
+            pipelines_by_id[pipeline['pipelineId']] = pipeline
+            for stage in pipeline.get('stages', []):
+                stages_by_id[stage['stageId']] = stage
+
+        logger.debug(f"{len(pipelines_by_id)} deal pipeline(s) loaded.")
+        return {'pipelines': pipelines_by_id, 'stages': stages_by_id}
+
+    def get_pipeline(self, pipeline_id):
+        """
+        Returns
+        -------
+        dict
+            The pipeline as returned by the Hubspot API, `None` if there is no such pipeline.
+        """
+        return self._get('pipelines', pipeline_id)
+
+    def get_stage(self, stage_id):
+        """
+        Returns
+        -------
+        dict
+            The deal stage as returned by the Hubspot API (see `Deal.deal_stage`), `None` if there
+            is no such stage.
+        """
+        return self._get('stages', stage_id)
+
+    @property
+    def pipelines(self):
+        """All the deal pipelines of the portal."""
+        return list(self._get_index('pipelines').values())
+
+
+def get_pipeline_registry(hubspot_client):
+    """
+    Return the deal pipeline registry shared by all the clients targeting the same portal.
+
+    Returns
+    -------
+    DealPipelineRegistry
+    """
+    return get_portal_registry(DealPipelineRegistry, hubspot_client)
@@ -0,0 +1,182 @@
+import logging
+
+from .helpers import ALL_PROPERTIES, Company, Contact, Deal, Owner
+
+logger = logging.getLogger('vendors.dj_hubspot')
+
+
+def _get_associated_ids(objects, to_object_type, association_key, hubspot_client):
+    """
+    Return the ids of the objects associated to each of the given objects, by hubspot id.
+
+    The associations already included in the api object contents (ex: the deals fetched one by
+    one) are used as is, the other ones are read in batches.
+    """
+    associated_ids = {}
+    to_read = []
+    for api_object in objects:
+        try:
+            ids = api_object.api_object_content['associations'][association_key]
+        except (KeyError, TypeError):
+            to_read.append(api_object.hubspot_id)
+        else:
+            associated_ids[str(api_object.hubspot_id)] = [str(object_id) for object_id in ids]
+
+    if to_read:
+        associated_ids.update(hubspot_client.get_associations_batch(
+            objects[0].CRM_OBJECT_TYPE, to_object_type, to_read,
+        ))
+    return associated_ids
+
+
+def _prefetch_contacts(objects, hubspot_client, max_workers):
+    vids_by_object = _get_associated_ids(objects, 'contacts', 'associatedVids', hubspot_client)
+    contacts, _missing_ids = Contact.fetch_many(
+        {vid for vids in vids_by_object.values() for vid in vids},
+        properties=ALL_PROPERTIES,
+        hubspot_client=hubspot_client,
+        max_workers=max_workers,
+    )
+    for api_object in objects:
+        api_object.__dict__['contacts'] = [
+            contacts[vid]
+            for vid in vids_by_object.get(str(api_object.hubspot_id), [])
+            if vid in contacts
+        ]
+    return list(contacts.values())
+
+
+def _prefetch_company(deals, hubspot_client, max_workers):
+    company_ids_by_deal = _get_associated_ids(
+        deals, 'companies', 'associatedCompanyIds', hubspot_client,
+    )
+    # Only the first company of a deal is used, see `Deal.company`.
+    company_id_by_deal = {
+        deal_id: company_ids[0]
+        for deal_id, company_ids in company_ids_by_deal.items()
+        if company_ids
+    }
+    companies, _missing_ids = Company.fetch_many(
+        set(company_id_by_deal.values()), hubspot_client=hubspot_client, max_workers=max_workers,
+    )
+    for deal in deals:
+        company_id = company_id_by_deal.get(str(deal.hubspot_id))
+        deal.__dict__['company'] = companies.get(company_id)
+    return list(companies.values())
+
+
+def _prefetch_parent_company(companies, hubspot_client, max_workers):
+    parent_ids = {
+        str(company.hubspot_id): company._get_property_value('hs_parent_company_id')
+        for company in companies
+    }
+    parents, _missing_ids = Company.fetch_many(
+        {str(parent_id) for parent_id in parent_ids.values() if parent_id},
+        hubspot_client=hubspot_client,
+        max_workers=max_workers,
+    )
+    for company in companies:
+        company.__dict__['parent_company'] = parents.get(
+            str(parent_ids[str(company.hubspot_id)]),
+        )
+    return list(parents.values())
+
+
+def _prefetch_owner(deals, hubspot_client, max_workers):
+    owner_ids = {
+        str(deal.hubspot_id): deal._get_property_value('hubspot_owner_id') for deal in deals
+    }
+    owners, _missing_ids = Owner.fetch_many(
+        {str(owner_id) for owner_id in owner_ids.values() if owner_id},
+        hubspot_client=hubspot_client,
+    )
+    for deal in deals:
+        deal.__dict__['owner'] = owners.get(str(owner_ids[str(deal.hubspot_id)]))
+    return list(owners.values())
+
+
+def _prefetch_products(deals, hubspot_client, max_workers):
+    products_by_deal = Deal.load_products(deals, hubspot_client=hubspot_client)
+    return [product for products in products_by_deal.values() for product in products]
+
+
+# How each relation is prefetched, by class of the objects.
+PREFETCHERS = {
+    Company: {
+        'contacts': _prefetch_contacts,
+        'parent_company': _prefetch_parent_company,
+    },
+    Deal: {
+        'company': _prefetch_company,
+        'contacts': _prefetch_contacts,
+        'owner': _prefetch_owner,
+        'products': _prefetch_products,
+    },
+}
+
+
+def _get_prefetcher(objects, relation):
+    for object_class, prefetchers in PREFETCHERS.items():
+        if isinstance(objects[0], object_class) and relation in prefetchers:
+            return prefetchers[relation]
+    raise ValueError(f"Cannot prefetch '{relation}' of {objects[0].__class__.__name__} objects.")
+
+
+def prefetch(objects, *relations, hubspot_client=None, max_workers=None):
+    """
+    Fetch the related objects of many objects at once, as `prefetch_related` does.
+
+    The association ids of all the objects are gathered, then each relation is resolved with
+    batched reads (see `HubspotAPIObject.fetch_many`), whatever the number of objects. The
+    related objects are stored in the cached properties of each object, so that accessing them
+    afterwards does not perform any call.
+
+    Relations of the related objects are separated by `__`, as in Django lookups.
+
+    Example:
+    ```
+    deals = Deal.fetch_list(deal_ids)
+    prefetch(deals, 'contacts', 'company__parent_company', 'owner', 'products')
+    for deal in deals:
+        print(deal.company.parent_company.name, [contact.email for contact in deal.contacts])
+    ```
+
+    Parameters
+    ----------
+    objects: iterable of HubspotAPIObject
+        Objects of the same type, which should all belong to the same hubspot portal.
+    relations: str
+        Supported relations: `contacts` and `parent_company` of the companies, `company`,
+        `contacts`, `owner` and `products` of the deals.
+    hubspot_client: HubspotClient, optional
+        Defaults to the client of the first object.
+    max_workers: int, optional
+        How many batches could be fetched at the same time, see `fetch_many`.
+
+    Returns
+    -------
+    list
+        The given objects.
+    """
+    objects = list(objects)
+    if not objects:
+        return objects
+    hubspot_client = hubspot_client or objects[0].client
+
+    nested_relations = {}
+    for relation in relations:
+        relation, _, nested_relation = relation.partition('__')
+        nested_relations.setdefault(relation, [])
+        if nested_relation:
+            nested_relations[relation].append(nested_relation)
+
+    for relation, nested in nested_relations.items():
+        prefetcher = _get_prefetcher(objects, relation)
+        logger.debug(f"Prefetching '{relation}' of {len(objects)} object(s) ...")
+        related_objects = prefetcher(objects, hubspot_client, max_workers)
+        if nested and related_objects:
+            prefetch(
+                related_objects, *nested, hubspot_client=hubspot_client, max_workers=max_workers,
+            )
+
+    return objects
@@ -0,0 +1,271 @@
+from datetime import timedelta
+import logging
+
+from django.db import close_old_connections, connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .bulk import BulkExecutor
+from .errors import HubspotCircuitOpen, HubspotEventError
+from .models import HubspotWebhookBatch
+
+logger = logging.getLogger('vendors.dj_hubspot')
+
+
+def enqueue_webhook_batch(raw_body):
+    """
+    Store the raw body of a webhook request, to process its events later on.
+
+    Returns
+    -------
+    HubspotWebhookBatch
+    """
+    return HubspotWebhookBatch.objects.create(body=raw_body)
+
+
+class WebhookQueueWorker:
+    """
+    Process the webhook batches queued by a `WebhookView` having `queue_events` enabled.
+
+    Batches are claimed in the order they have been received, so that several workers can safely
+    drain the same queue. The events of the claimed batches are then spread over `concurrency`
+    lanes processed at the same time: all the events about a given object go to the same lane, in
+    the order they have been received, so that they are processed sequentially.
+
+    When an event fails, its batch is put back in the queue (or marked as failed after
+    `max_attempts`), and the next events about the same object are put back with it so that they
+    are not processed out of order. The batch is only processed again after an exponential delay
+    (`retry_backoff` seconds, doubled on each attempt): the batches received in the meantime are
+    not held back by it. A batch could then be processed more than once:
+    `process_event` should be idempotent. A batch failing because the Hubspot API is unavailable
+    (see `djhubspot.circuit.CircuitBreaker`) is put back without consuming an attempt, until the
+    circuit lets the calls through again.
+
+    Only a single worker guarantees the order of the events across batches, running several
+    workers only brings more concurrency.
+    """
+
+    def __init__(
+        self,
+        webhook_view,
+        concurrency=1,
+        batch_size=100,
+        max_attempts=5,
+        stale_after=600,
+        retry_backoff=5,
+        max_retry_backoff=600,
+    ):
+        """
+        Parameters
+        ----------
+        webhook_view: WebhookView
+            The view whose `process_event` method processes the events.
+        concurrency: int, optional
+            How many events can be processed at the same time.
+        batch_size: int, optional
+            How many batches are claimed at once.
+        max_attempts: int, optional
+            How many times the processing of a batch is attempted before it is marked as failed.
+        stale_after: int, optional
+            After how many seconds a batch claimed by a worker, but not processed, is considered
+            abandoned (ex: the worker crashed) and can be claimed again.
+        retry_backoff: float, optional
+            How many seconds a failed batch waits before its first retry, doubled on each retry.
+        max_retry_backoff: float, optional
+            The maximum delay before the retry of a failed batch, in seconds.
+        """
+        self.webhook_view = webhook_view
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.stale_after = stale_after
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+
+    def claim_batches(self):
+        """
+        Mark the next batches of the queue as being processed by this worker.
+
+        The batches waiting for a retry are skipped until their `available_at` date.
+
+        Returns
+        -------
+        list of HubspotWebhookBatch
+        """
+        now = timezone.now()
+        candidates = HubspotWebhookBatch.objects.filter(
+            Q(status=HubspotWebhookBatch.STATUS_PENDING)
+            & (Q(available_at__isnull=True) | Q(available_at__lte=now))
+            | Q(
+                status=HubspotWebhookBatch.STATUS_PROCESSING,
+                claimed_at__lt=now - timedelta(seconds=self.stale_after),
+            )
+        ).order_by('pk').values_list('pk', 'status', 'claimed_at')[:self.batch_size]
+
+        claimed_ids = []
+        for pk, status, claimed_at in candidates:
+            # The batch is claimed only if no other worker did it in the meantime.
+            claimed = HubspotWebhookBatch.objects.filter(
+                pk=pk, status=status, claimed_at=claimed_at,
+            ).update(
+                status=HubspotWebhookBatch.STATUS_PROCESSING,
+                claimed_at=now,
+                attempts=F('attempts') + 1,
+            )
+            if claimed:
+                claimed_ids.append(pk)
+
+        return list(HubspotWebhookBatch.objects.filter(pk__in=claimed_ids).order_by('pk'))
+
+    def _process_lane(self, lane):
+        """
+        Process sequentially the events of a lane.
+
+        Returns
+        -------
+        tuple
+            The errors of the failed batches, by batch id, and the batches which only failed
+            because of an open circuit, with the seconds before the circuit closes by batch id.
+        """
+        errors = {}
+        deferred = {}
+        failed = set()
+        # When the failure comes from an open circuit, the seconds before it closes, by object key.
+        failed_objects = {}
+        try:
+            for batch, event in lane:
+                object_key = event.object_key
+                if object_key in failed_objects:
+                    errors.setdefault(batch.pk, f"Previous event about {object_key} failed.")
+                    retry_in = failed_objects[object_key]
+                    if retry_in is None:
+                        failed.add(batch.pk)
+                    else:
+                        deferred[batch.pk] = max(retry_in, deferred.get(batch.pk, 0))
+                    continue
+                try:
+                    self.webhook_view.process_event(event)
+                except HubspotCircuitOpen as e:
+                    logger.warning(f"{e} Deferring {batch}.")
+                    failed_objects[object_key] = e.retry_in
+                    errors[batch.pk] = repr(e)
+                    deferred[batch.pk] = max(e.retry_in, deferred.get(batch.pk, 0))
+                except Exception as e:
+                    logger.exception(
+                        f"Processing of Hubspot event {event.message.get('eventId')} failed.",
+                    )
+                    failed_objects[object_key] = None
+                    errors[batch.pk] = repr(e)
+                    failed.add(batch.pk)
+        finally:
+            if self.concurrency > 1:
+                # Each thread has its own connection to the database.
+                connection.close()
+        return errors, {
+            batch_id: retry_in for batch_id, retry_in in deferred.items() if batch_id not in failed
+        }
+
+    def process_batches(self, batches):
+        """
+        Process the events of the given batches.
+
+        Returns
+        -------
+        tuple
+            The number of batches processed and the number of batches which failed.
+        """
+        errors = {}
+        deferred = {}
+        batches_events = {}
+        scheduled_event_ids = set()
+        lanes = [[] for _ in range(self.concurrency)]
+
+        for batch in batches:
+            try:
+                events = self.webhook_view.parse_events(batch.body)
+            except HubspotEventError as e:
+                errors[batch.pk] = repr(e)
+                continue
+
+            if self.webhook_view.deduplicate_events:
+                # The same event could also be contained in several of the claimed batches.
+                events = [
+                    event for event in events
+                    if event.message.get('eventId') not in scheduled_event_ids
+                ]
+                scheduled_event_ids.update(event.message.get('eventId') for event in events)
+            events = self.webhook_view.prepare_events(events)
+            batches_events[batch.pk] = events
+            if self.webhook_view.update_company_index:
+                self.webhook_view.hubspot_events = events
+                self.webhook_view.apply_events_to_company_index()
+
+            for event in events:
+                lane_index = hash(event.object_key) % self.concurrency
+                lanes[lane_index].append((batch, event))
+
+        if self.concurrency > 1:
+            summary = BulkExecutor(max_workers=self.concurrency).map(self._process_lane, lanes)
+            lanes_results = [result.result for result in summary.results]
+        else:
+            lanes_results = [self._process_lane(lanes[0])]
+        failed = set()
+        for lane_errors, lane_deferred in lanes_results:
+            for batch_id, error in lane_errors.items():
+                errors.setdefault(batch_id, error)
+            for batch_id, retry_in in lane_deferred.items():
+                deferred[batch_id] = max(retry_in, deferred.get(batch_id, 0))
+            failed.update(set(lane_errors) - set(lane_deferred))
+
+        for batch in batches:
+            error = errors.get(batch.pk)
+            retry_in = deferred.get(batch.pk) if batch.pk not in failed else None
+            self._complete(batch, error, retry_in=retry_in)
+            if error is None:
+                self.webhook_view.events_processed(batches_events[batch.pk])
+
+        return len(batches), len(errors)
+
+    def _complete(self, batch, error=None, retry_in=None):
+        update_fields = ['status', 'error', 'processed_at', 'available_at']
+        now = timezone.now()
+        batch.available_at = None
+        if error is None:
+            batch.status = HubspotWebhookBatch.STATUS_DONE
+            batch.error = ''
+        elif retry_in is not None:
+            # The batch will be processed again once the circuit lets the calls through.
+            batch.status = HubspotWebhookBatch.STATUS_PENDING
+            batch.error = error
+            batch.attempts = F('attempts') - 1
+            batch.available_at = now + timedelta(seconds=retry_in)
+            update_fields.append('attempts')
+        elif batch.attempts >= self.max_attempts:
+            logger.error(f"{batch} failed {batch.attempts} time(s), giving up: {error}")
+            batch.status = HubspotWebhookBatch.STATUS_FAILED
+            batch.error = error
+        else:
+            batch.status = HubspotWebhookBatch.STATUS_PENDING
+            batch.error = error
+            retry_in = min(self.max_retry_backoff, self.retry_backoff * 2 ** (batch.attempts - 1))
+            batch.available_at = now + timedelta(seconds=retry_in)
+        batch.processed_at = now
+        batch.save(update_fields=update_fields)
+
+    def run_once(self):
+        """
+        Claim and process the next batches of the queue.
+
+        Returns
+        -------
+        tuple
+            The number of batches processed and the number of batches which failed.
+        """
+        close_old_connections()
+        batches = self.claim_batches()
+        if not batches:
+            return 0, 0
+
+        processed, failed = self.process_batches(batches)
+        logger.debug(f"{processed} webhook batch(es) processed, {failed} failed.")
+        return processed, failed
@@ -0,0 +1,312 @@
+import asyncio
+from contextlib import contextmanager
+from datetime import datetime
+import logging
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .errors import HubspotQuotaExceeded
+from .utils import register_after_fork
+
+logger = logging.getLogger('vendors.dj_hubspot')
+
+
+class LocalBackend:
+    """
+    Store the state of a rate limiter in memory. The limiter is shared between the threads of the
+    process only.
+    """
+
+    def __init__(self, **kwargs):
+        self._state = None
+        self._lock = threading.Lock()
+
+    def after_fork(self):
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def lock(self, key):
+        with self._lock:
+            yield
+
+    def get_state(self, key):
+        return self._state
+
+    def set_state(self, key, state):
+        self._state = state
+
+
+class DjangoCacheBackend:
+    """
+    Store the state of a rate limiter into one of the caches configured in the `CACHES` setting,
+    so that it is shared between processes (and servers, with memcached or redis).
+
+    The state is protected by a lock built on top of the atomic `cache.add`. When the lock cannot
+    be acquired within `lock_timeout` (ex: the cache is unavailable), the state of the process is
+    used instead: the calls are then only throttled within the process.
+
+    The lock is released with a `cache.get` followed by a `cache.delete`, which is not atomic: a
+    lock held for longer than `lock_timeout` could expire in the meantime, and the lock acquired by
+    another process be deleted. `lock_timeout` should then be much longer than the few cache calls
+    made while holding the lock.
+    """
+
+    def __init__(self, alias='default', lock_timeout=5, **kwargs):
+        """
+        Parameters
+        ----------
+        alias: str, optional
+            The alias of the Django cache to use.
+        lock_timeout: int, optional
+            For how long (in seconds) the lock could be held. This prevents a crashed process from
+            blocking the others forever. This is also how long the lock is waited for.
+        """
+        self.alias = alias
+        self.lock_timeout = lock_timeout
+        # Protect the state from the other threads without hammering the cache.
+        self._local_lock = threading.Lock()
+        # The last known state, used when the cache cannot be locked.
+        self._local_state = None
+        self._unlocked = False
+
+    def after_fork(self):
+        self._local_lock = threading.Lock()
+
+    @property
+    def cache(self):
+        from django.core.cache import caches
+        return caches[self.alias]
+
+    @contextmanager
+    def lock(self, key):
+        lock_key = f'{key}:lock'
+        token = uuid.uuid4().hex
+
+        with self._local_lock:
+            deadline = time.monotonic() + self.lock_timeout
+            locked = self.cache.add(lock_key, token, self.lock_timeout)
+            while not locked and time.monotonic() < deadline:
+                time.sleep(0.005)
+                locked = self.cache.add(lock_key, token, self.lock_timeout)
+            if not locked:
+                logger.warning(
+                    f"Could not lock the Hubspot rate limiter {key} within {self.lock_timeout}s, "
+                    f"throttling the calls of this process only."
+                )
+            self._unlocked = not locked
+            try:
+                yield
+            finally:
+                self._unlocked = False
+                if locked and self.cache.get(lock_key) == token:
+                    self.cache.delete(lock_key)
+
+    def get_state(self, key):
+        if self._unlocked:
+            return self._local_state
+        return self.cache.get(key)
+
+    def set_state(self, key, state):
+        self._local_state = state
+        if not self._unlocked:
+            # The state is useless after a day as the daily quota is reset.
+            self.cache.set(key, state, 24 * 3600)
+
+
+class RateLimiter:
+    """
+    A token bucket limiting the calls made to the Hubspot API.
+
+    The bucket contains at most `burst` tokens and is refilled with `requests_per_10s` tokens
+    every 10 seconds. Each call consumes a token, waiting for one to be available if needed.
+    An optional daily quota could also be enforced.
+
+    Cf: https://developers.hubspot.com/apps/api_guidelines
+    """
+
+    EPSILON = 1e-6
+
+    def __init__(
+        self,
+        requests_per_10s=100,
+        burst=10,
+        daily_quota=None,
+        backend=None,
+        key='djhubspot:ratelimit',
+        clock=time.time,
+        sleep=time.sleep,
+    ):
+        """
+        Parameters
+        ----------
+        requests_per_10s: int, optional
+        burst: int, optional
+            The number of calls which could be performed at once, without waiting.
+        daily_quota: int, optional
+            The maximum number of calls per day (UTC). Not enforced by default.
+        backend: optional
+            Where the state of the limiter is stored. Defaults to a `LocalBackend`.
+        key: str, optional
+            Identify the limiter in the backend.
+        """
+        self.requests_per_10s = requests_per_10s
+        self.rate = requests_per_10s / 10.0  # tokens per second
+        self.burst = burst
+        self.daily_quota = daily_quota
+        self.backend = backend or LocalBackend()
+        self.key = key
+        self.clock = clock
+        self.sleep = sleep
+
+    def _initial_state(self, now):
+        return {
+            'tokens': float(self.burst),
+            'updated_at': now,
+            'day': self._day(now),
+            'daily_count': 0,
+        }
+
+    @staticmethod
+    def _day(now):
+        return datetime.utcfromtimestamp(now).strftime('%Y-%m-%d')
+
+    def _try_acquire(self):
+        """
+        Try to consume a token.
+
+        Returns
+        -------
+        float
+            `0` if a token has been consumed, otherwise the number of seconds to wait before a
+            token becomes available.
+        """
+        with self.backend.lock(self.key):
+            now = self.clock()
+            state = self.backend.get_state(self.key) or self._initial_state(now)
+
+            # Refill the bucket with the tokens generated since the last call.
+            elapsed = max(0.0, now - state['updated_at'])
+            state['tokens'] = min(float(self.burst), state['tokens'] + elapsed * self.rate)
+            state['updated_at'] = now
+
+            today = self._day(now)
+            if state['day'] != today:
+                state['day'] = today
+                state['daily_count'] = 0
+
+            if self.daily_quota is not None and state['daily_count'] >= self.daily_quota:
+                self.backend.set_state(self.key, state)
+                raise HubspotQuotaExceeded(
+                    f"The daily quota of {self.daily_quota} calls to the Hubspot API has been "
+                    f"reached."
+                )
+
+            # Timestamps are large floats, ignore the rounding errors of the refill.
+            if state['tokens'] >= 1 - self.EPSILON:
+                state['tokens'] = max(0.0, state['tokens'] - 1)
+                state['daily_count'] += 1
+                delay = 0
+            else:
+                delay = (1 - state['tokens']) / self.rate
+
+            self.backend.set_state(self.key, state)
+            return delay
+
+    def acquire(self):
+        """
+        Block until a call to the API is allowed.
+
+        Raises
+        ------
+        HubspotQuotaExceeded
+            If the daily quota has been reached.
+        """
+        while True:
+            delay = self._try_acquire()
+            if not delay:
+                return
+            logger.debug(f"Hubspot rate limit reached, waiting {delay:.3f}s ...")
+            self.sleep(delay)
+
+    async def acquire_async(self):
+        """
+        Same as `acquire`, but wait without blocking the event loop.
+
+        Except for the `LocalBackend`, whose lock is only held for a few instructions, the backend
+        is accessed from a thread as its lock and its storage could block.
+        """
+        blocking = not isinstance(self.backend, LocalBackend)
+        while True:
+            if blocking:
+                delay = await asyncio.get_running_loop().run_in_executor(None, self._try_acquire)
+            else:
+                delay = self._try_acquire()
+            if not delay:
+                return
+            logger.debug(f"Hubspot rate limit reached, waiting {delay:.3f}s ...")
+            await asyncio.sleep(delay)
+
+    def throttle(self, call):
+        """Wrap the given `call` in order to acquire a token before each of its invocations."""
+        def throttled_call(*args, **kwargs):
+            self.acquire()
+            return call(*args, **kwargs)
+        return throttled_call
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+@register_after_fork
+def _reset_locks():
+    global _rate_limiters_lock
+    _rate_limiters_lock = threading.Lock()
+    for rate_limiter in _rate_limiters.values():
+        if hasattr(rate_limiter.backend, 'after_fork'):
+            rate_limiter.backend.after_fork()
+
+
+def get_rate_limiter(portal_key):
+    """
+    Return the rate limiter of a portal, shared by the whole process.
+
+    The limiter is configured by the `HUBSPOT_RATE_LIMIT` setting:
+    ```
+    HUBSPOT_RATE_LIMIT = {
+        'REQUESTS_PER_10S': 100,
+        'BURST': 10,
+        'DAILY_QUOTA': 250000,
+        # Share the limiter between processes.
+        'BACKEND': 'djhubspot.ratelimit.DjangoCacheBackend',
+        'OPTIONS': {'alias': 'default'},
+    }
+    ```
+
+    Parameters
+    ----------
+    portal_key: str
+        See `HubspotClient.portal_key`.
+
+    Returns
+    -------
+    RateLimiter
+    """
+    with _rate_limiters_lock:
+        if portal_key not in _rate_limiters:
+            config = getattr(settings, 'HUBSPOT_RATE_LIMIT', None) or {}
+            backend_class = import_string(
+                config.get('BACKEND', 'djhubspot.ratelimit.LocalBackend')
+            )
+            _rate_limiters[portal_key] = RateLimiter(
+                requests_per_10s=config.get('REQUESTS_PER_10S', 100),
+                burst=config.get('BURST', 10),
+                daily_quota=config.get('DAILY_QUOTA'),
+                backend=backend_class(**config.get('OPTIONS', {})),
+                key=f'djhubspot:ratelimit:{portal_key}',
+            )
+        return _rate_limiters[portal_key]
@@ -0,0 +1,129 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+from .utils import register_after_fork
+
+logger = logging.getLogger('vendors.dj_hubspot')
+
+
+class PortalRegistry:
+    """
+    Objects of a portal which rarely change (pipelines, owners, ...), loaded at once and indexed.
+
+    Objects are loaded on first use, and reloaded when they are older than the `MAX_AGE_SETTING`
+    setting or on demand with `refresh`. Looking for an unknown object (ex: it has just been
+    created) also triggers a reload, at most once every `MIN_RELOAD_INTERVAL` seconds.
+
+    Subclasses should define `load`. Registries are shared by all the clients targeting the same
+    portal, see `get_portal_registry`.
+    """
+
+    # The name of the setting defining after how many seconds the objects are reloaded. `None`
+    # never reloads them automatically.
+    MAX_AGE_SETTING = None
+    DEFAULT_MAX_AGE = 3600
+
+    # Do not reload the objects more often than this when looking for unknown ones.
+    MIN_RELOAD_INTERVAL = 60
+
+    def __init__(self, hubspot_client, clock=time.monotonic):
+        """
+        Parameters
+        ----------
+        hubspot_client: HubspotClient
+        clock: callable, optional
+        """
+        self.client = hubspot_client
+        self.clock = clock
+        self.loaded_at = None
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    @property
+    def max_age(self):
+        return getattr(settings, self.MAX_AGE_SETTING, self.DEFAULT_MAX_AGE)
+
+    @property
+    def is_stale(self):
+        if self.loaded_at is None:
+            return True
+        return self.max_age is not None and self.clock() - self.loaded_at >= self.max_age
+
+    def load(self):
+        """
+        Fetch the objects from the API.
+
+        Returns
+        -------
+        dict
+            Dicts of objects by key, by index name.
+        """
+        raise NotImplementedError
+
+    def refresh(self):
+        """Reload the objects from the API."""
+        # Indexes are built aside, then swapped, so that lookups are never made on partial ones.
+        self._indexes = self.load()
+        self.loaded_at = self.clock()
+        logger.debug(f"{self.__class__.__name__} loaded.")
+
+    def invalidate(self):
+        """Reload the objects on next use."""
+        self.loaded_at = None
+
+    def _ensure_loaded(self, missing=False):
+        with self._lock:
+            if self.is_stale:
+                self.refresh()
+            elif missing and self.clock() - self.loaded_at >= self.MIN_RELOAD_INTERVAL:
+                self.refresh()
+
+    def _get_index(self, index_name):
+        self._ensure_loaded()
+        return self._indexes[index_name]
+
+    def _get(self, index_name, key):
+        value = self._get_index(index_name).get(key)
+        if value is None:
+            self._ensure_loaded(missing=True)
+            value = self._indexes[index_name].get(key)
+        return value
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+@register_after_fork
+def _reset_locks():
+    # The loaded objects are kept: a preforking server could load them once in the parent.
+    global _registries_lock
+    _registries_lock = threading.Lock()
+    for registry in _registries.values():
+        registry._lock = threading.Lock()
+
+
+def get_portal_registry(registry_class, hubspot_client, *args):
+    """
+    Return the registry of the given class shared by all the clients targeting the same portal.
+
+    Parameters
+    ----------
+    registry_class: type
+        A `PortalRegistry` subclass.
+    hubspot_client: HubspotClient
+    *args:
+        Passed to the registry class, after the client. A registry is shared for given `args`.
+
+    Returns
+    -------
+    PortalRegistry
+    """
+    key = (registry_class, hubspot_client.portal_key) + args
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = registry_class(hubspot_client, *args)
+        return _registries[key]
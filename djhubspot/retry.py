@@ -0,0 +1,277 @@
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import json
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+
+from hubspot3.error import HubspotRateLimited, HubspotServerError, HubspotTimeout
+
+logger = logging.getLogger('vendors.dj_hubspot')
+
+_local = threading.local()
+
+
+class RetryBudget:
+    """
+    The number of retries shared by all the calls of a bulk run, so that a degraded API does not
+    make a large run retry each of its calls.
+    """
+
+    def __init__(self, max_retries):
+        """
+        Parameters
+        ----------
+        max_retries: int
+        """
+        self.max_retries = max_retries
+        self.used = 0
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self):
+        return max(0, self.max_retries - self.used)
+
+    def consume(self):
+        """
+        Returns
+        -------
+        bool
+            Whether a retry was still available.
+        """
+        with self._lock:
+            if self.used >= self.max_retries:
+                return False
+            self.used += 1
+            return True
+
+    def __repr__(self):
+        return f'<RetryBudget {self.remaining}/{self.max_retries} remaining>'
+
+
+@contextmanager
+def use_retry_budget(budget):
+    """Make the retries of the calls performed by the current thread consume the given budget."""
+    previous_budget = getattr(_local, 'budget', None)
+    _local.budget = budget
+    try:
+        yield budget
+    finally:
+        _local.budget = previous_budget
+
+
+def get_retry_budget():
+    """
+    Returns
+    -------
+    RetryBudget
+        The budget of the bulk run the current thread belongs to, if any.
+    """
+    return getattr(_local, 'budget', None)
+
+
+class RetryPolicy:
+    """
+    Retry the calls failing because of a transient error (rate limit, server error, timeout,
+    socket error), waiting with a jittered exponential backoff between the attempts.
+
+    The delay requested by the `Retry-After` header of the response is honoured. Only the
+    idempotent calls are retried by default: a non idempotent call (ex: a POST creating an object)
+    which timed out could have been performed anyway. The calls rejected by the rate limit are
+    retried whatever their method, Hubspot did not perform them.
+
+    Cf: https://developers.hubspot.com/docs/api/usage-details#rate-limits
+    """
+
+    # `OSError` covers the socket errors raised as is by `http.client` (connection errors,
+    # `socket.timeout`, `socket.gaierror`, ...), as for the circuit breaker.
+    RETRYABLE_ERRORS = (HubspotRateLimited, HubspotServerError, HubspotTimeout, OSError)
+
+    IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+    # The POST endpoints which only read data.
+    IDEMPOTENT_POST_SUFFIXES = ('/batch/read', '/search')
+
+    def __init__(
+        self,
+        max_retries=3,
+        backoff=0.5,
+        max_backoff=30,
+        retry_non_idempotent=False,
+        bulk_budget=None,
+        sleep=time.sleep,
+        jitter=random.random,
+    ):
+        """
+        Parameters
+        ----------
+        max_retries: int, optional
+            How many times a call is retried at most, `0` to disable the retries.
+        backoff: float, optional
+            The delay before the first retry, in seconds, doubled on each retry.
+        max_backoff: float, optional
+            The maximum delay between two attempts, in seconds. The calls whose `Retry-After` is
+            longer are not retried.
+        retry_non_idempotent: bool, optional
+            Retry all the calls, whatever their method.
+        bulk_budget: int, optional
+            The number of retries allowed for each bulk run, see `new_budget`. Unlimited by
+            default.
+        sleep: callable, optional
+        jitter: callable, optional
+            Return a random float in [0, 1).
+        """
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_non_idempotent = retry_non_idempotent
+        self.bulk_budget = bulk_budget
+        self.sleep = sleep
+        self.jitter = jitter
+
+    def new_budget(self):
+        """
+        Returns
+        -------
+        RetryBudget
+            A budget for a new bulk run, `None` if it is unlimited.
+        """
+        if self.bulk_budget is None:
+            return None
+        return RetryBudget(self.bulk_budget)
+
+    def is_idempotent(self, subpath, method):
+        method = (method or 'GET').upper()
+        if method in self.IDEMPOTENT_METHODS:
+            return True
+        return method == 'POST' and subpath.rstrip('/').endswith(self.IDEMPOTENT_POST_SUFFIXES)
+
+    @staticmethod
+    def get_retry_after(error):
+        """
+        Returns
+        -------
+        float
+            The number of seconds to wait according to the `Retry-After` header of the response,
+            `None` if there is none.
+        """
+        getheader = getattr(getattr(error, 'result', None), 'getheader', None)
+        value = getheader('Retry-After') if getheader else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+    @staticmethod
+    def is_daily_limit(error):
+        """Whether the error comes from the daily limit of the portal, retrying is pointless."""
+        if not isinstance(error, HubspotRateLimited):
+            return False
+        try:
+            return json.loads(error.result.body).get('policyName') == 'DAILY'
+        except (AttributeError, TypeError, ValueError):
+            return False
+
+    def get_delay(self, attempt, error=None):
+        """
+        Returns
+        -------
+        float
+            The number of seconds to wait before the retry following the given attempt (starting
+            at 0), `None` if the call should not be retried.
+        """
+        retry_after = self.get_retry_after(error)
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_backoff else None
+        # "Full jitter": spread the retries of the concurrent calls.
+        return self.jitter() * min(self.max_backoff, self.backoff * 2 ** attempt)
+
+    def wrap(self, call, metrics=None):
+        """
+        Wrap `BaseClient._call_raw` in order to retry its invocations.
+
+        A call could be declared idempotent, or not, with the `idempotent` keyword argument (ex:
+        `client._call(subpath, method='POST', idempotent=True)`), whatever its method.
+
+        Parameters
+        ----------
+        call: callable
+        metrics: djhubspot.metrics.ClientMetrics, optional
+            Where the `retries` are counted.
+
+        Returns
+        -------
+        callable
+        """
+        def call_with_retries(subpath, *args, idempotent=None, **kwargs):
+            method = kwargs.get('method', args[1] if len(args) > 1 else 'GET')
+            if idempotent is None:
+                idempotent = self.is_idempotent(subpath, method)
+            retryable = self.retry_non_idempotent or idempotent
+
+            attempt = 0
+            while True:
+                try:
+                    return call(subpath, *args, **kwargs)
+                except self.RETRYABLE_ERRORS as e:
+                    if not (retryable or isinstance(e, HubspotRateLimited)):
+                        raise
+                    if attempt >= self.max_retries or self.is_daily_limit(e):
+                        raise
+                    delay = self.get_delay(attempt, e)
+                    if delay is None:
+                        raise
+
+                    budget = get_retry_budget()
+                    if budget is not None and not budget.consume():
+                        logger.warning(f"Retry budget of the bulk run exhausted: {budget!r}")
+                        raise
+
+                    logger.warning(
+                        f"{method} {subpath} failed ({e.__class__.__name__}), retrying in "
+                        f"{delay:.2f}s ..."
+                    )
+                    if metrics is not None:
+                        metrics.increment('retries')
+                    self.sleep(delay)
+                    attempt += 1
+
+        return call_with_retries
+
+
+def get_retry_policy():
+    """
+    Return the retry policy configured by the `HUBSPOT_RETRY` setting:
+    ```
+    HUBSPOT_RETRY = {
+        'MAX_RETRIES': 3,
+        'BACKOFF': 0.5,
+        'MAX_BACKOFF': 30,
+        'RETRY_NON_IDEMPOTENT': False,
+        'BULK_BUDGET': None,
+    }
+    ```
+
+    Returns
+    -------
+    RetryPolicy
+    """
+    config = getattr(settings, 'HUBSPOT_RETRY', None) or {}
+    return RetryPolicy(
+        max_retries=config.get('MAX_RETRIES', 3),
+        backoff=config.get('BACKOFF', 0.5),
+        max_backoff=config.get('MAX_BACKOFF', 30),
+        retry_non_idempotent=config.get('RETRY_NON_IDEMPOTENT', False),
+        bulk_budget=config.get('BULK_BUDGET'),
+    )
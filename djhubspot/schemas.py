@@ -0,0 +1,223 @@
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+import logging
+import math
+import time
+
+from .errors import HubspotValidationError
+from .registries import PortalRegistry, get_portal_registry
+from .utils import datetime_to_hubspot_timestamp
+
+logger = logging.getLogger('vendors.dj_hubspot')
+
+MS_PER_DAY = 24 * 60 * 60 * 1000
+
+
+def _coerce_string(value, prop):
+    if isinstance(value, (dict, list, tuple, set)):
+        raise ValueError("expected a string")
+    return str(value)
+
+
+def _coerce_number(value, prop):
+    if isinstance(value, bool):
+        raise ValueError("expected a number")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, Decimal):
+        if not value.is_finite():
+            raise ValueError("expected a finite number")
+        # Decimals cannot be encoded in JSON.
+        return str(value)
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise ValueError("expected a finite number")
+        return value
+    if isinstance(value, str):
+        try:
+            Decimal(value.strip())
+        except InvalidOperation:
+            raise ValueError(f"expected a number, got '{value}'")
+        return value.strip()
+    raise ValueError("expected a number")
+
+
+def _coerce_bool(value, prop):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, str) and value.lower() in ('true', 'false'):
+        return value.lower()
+    raise ValueError(f"expected a boolean, got '{value}'")
+
+
+def _coerce_enumeration(value, prop):
+    if isinstance(value, bool):
+        value = 'true' if value else 'false'
+
+    checkbox = prop.get('fieldType') == 'checkbox'
+    if isinstance(value, (list, tuple, set)):
+        if not checkbox:
+            raise ValueError("expected a single value")
+        values = [str(item) for item in value]
+    elif checkbox and isinstance(value, str):
+        # Multiple values are separated by semicolons.
+        values = value.split(';')
+    else:
+        values = [str(value)]
+
+    options = {option['value'] for option in prop.get('options') or []}
+    # The options of some properties (ex: owners) are not listed in their definition.
+    if options or not prop.get('externalOptions'):
+        invalid_values = [item for item in values if item and item not in options]
+        if invalid_values:
+            raise ValueError(f"invalid option(s): {', '.join(invalid_values)}")
+    return ';'.join(values)
+
+
+def _coerce_timestamp(value):
+    if isinstance(value, bool):
+        raise ValueError("expected a date")
+    if isinstance(value, (date, datetime)):
+        return datetime_to_hubspot_timestamp(value)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"expected a date or a timestamp in milliseconds, got '{value}'")
+
+
+def _coerce_date(value, prop):
+    if isinstance(value, datetime):
+        # Hubspot only accepts dates at midnight UTC.
+        value = value.date()
+    timestamp = _coerce_timestamp(value)
+    if timestamp % MS_PER_DAY:
+        raise ValueError("expected a timestamp at midnight UTC")
+    return timestamp
+
+
+def _coerce_datetime(value, prop):
+    return _coerce_timestamp(value)
+
+
+class PropertySchema(PortalRegistry):
+    """
+    The definitions of the properties of a type of object of a portal, indexed by name.
+
+    It allows to check and convert the data sent to Hubspot locally, see `clean`.
+
+    Optional settings:
+
+    - HUBSPOT_PROPERTIES_MAX_AGE: after how many seconds the definitions are reloaded. `None` to
+      never reload them automatically. Defaults to 3600.
+    """
+
+    MAX_AGE_SETTING = 'HUBSPOT_PROPERTIES_MAX_AGE'
+
+    # How the values are converted, by property type.
+    COERCERS = {
+        'bool': _coerce_bool,
+        'date': _coerce_date,
+        'datetime': _coerce_datetime,
+        'enumeration': _coerce_enumeration,
+        'number': _coerce_number,
+        'string': _coerce_string,
+    }
+
+    def __init__(self, hubspot_client, object_type, clock=time.monotonic):
+        """
+        Parameters
+        ----------
+        hubspot_client: HubspotClient
+        object_type: str
+            One of `companies`, `contacts`, `deals`, `products`.
+        clock: callable, optional
+        """
+        super().__init__(hubspot_client, clock=clock)
+        self.object_type = object_type
+
+    def load(self):
+        """Load the definitions of all the properties. It costs one API call."""
+        properties = self.client.get_properties_client().get_all(object_type=self.object_type)
+        logger.debug(f"{len(properties)} {self.object_type} propertie(s) loaded.")
+        return {
+            'name': {prop['name']: prop for prop in properties if not prop.get('deleted')},
+        }
+
+    def get_property(self, name):
+        """
+        Returns
+        -------
+        dict
+            The definition of the property as returned by the Hubspot API (see
+            `djhubspot.helpers.HubspotProperty`), `None` if there is no such property.
+        """
+        return self._get('name', name)
+
+    @property
+    def properties(self):
+        """The definitions of all the properties."""
+        return list(self._get_index('name').values())
+
+    def clean_value(self, name, value):
+        """
+        Check and convert the value of a property to what Hubspot expects.
+
+        Raises
+        ------
+        ValueError
+            If the value is not valid.
+        """
+        prop = self.get_property(name)
+        if prop is None:
+            raise ValueError("unknown property")
+        if prop.get('readOnlyValue') or prop.get('calculated'):
+            raise ValueError("read-only property")
+        if value is None or value == '':
+            # Clear the value of the property.
+            return ''
+
+        coerce = self.COERCERS.get(prop.get('type'), _coerce_string)
+        return coerce(value, prop)
+
+    def clean(self, data):
+        """
+        Check and convert the values of the given properties to what Hubspot expects.
+
+        Parameters
+        ----------
+        data: dict
+            Values by property name.
+
+        Returns
+        -------
+        dict
+            The converted values by property name.
+
+        Raises
+        ------
+        HubspotValidationError
+            Listing all the invalid properties.
+        """
+        cleaned_data = {}
+        errors = {}
+        for name, value in data.items():
+            try:
+                cleaned_data[name] = self.clean_value(name, value)
+            except ValueError as e:
+                errors[name] = str(e)
+
+        if errors:
+            raise HubspotValidationError(errors)
+        return cleaned_data
+
+
+def get_property_schema(hubspot_client, object_type):
+    """
+    Return the property schema of the given type of object shared by all the clients targeting
+    the same portal.
+
+    Returns
+    -------
+    PropertySchema
+    """
+    return get_portal_registry(PropertySchema, hubspot_client, object_type)
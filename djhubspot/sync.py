@@ -0,0 +1,153 @@
+from datetime import timedelta
+import logging
+
+from .indexes import now_as_hubspot_timestamp
+from .models import HubspotWatermark
+from .utils import get_property_value
+
+logger = logging.getLogger('vendors.dj_hubspot')
+
+
+class DeltaSync:
+    """
+    Sync a `HubspotSyncable` model with the Hubspot objects modified since its last sync.
+
+    The first sync crawls all the objects of the portal. The next ones only fetch the objects
+    modified since the most recent modification synced, the high-water mark of the model, through
+    the "recently modified" endpoints. The objects go through `HubspotSyncableManager.sync_many`,
+    and the watermark only advances once all of them have been committed: a failed sync is
+    entirely performed again by the next one.
+
+    Example:
+    ```
+    DeltaSync(Company).run()
+    # or
+    Company.objects.sync_modified()
+    ```
+    """
+
+    WATERMARK_PREFIX = 'delta_sync:'
+
+    # Hubspot only returns the objects modified during the last 30 days. Older models have to be
+    # crawled again.
+    RECENTLY_MODIFIED_MAX_AGE = timedelta(days=30)
+
+    # The key holding the hubspot id of the api object contents, by object type.
+    ID_KEYS = {
+        'companies': 'companyId',
+        'contacts': 'vid',
+        'deals': 'dealId',
+    }
+
+    # The property holding the last modification date of the objects, by object type.
+    LAST_MODIFIED_PROPERTIES = {
+        'companies': 'hs_lastmodifieddate',
+        'contacts': 'lastmodifieddate',
+        'deals': 'hs_lastmodifieddate',
+    }
+
+    def __init__(self, model, hubspot_client=None):
+        """
+        Parameters
+        ----------
+        model: type
+            A `HubspotSyncable` model, having a `HubspotSyncableManager` as default manager.
+        hubspot_client: HubspotClient, optional
+            Defaults to the client returned by the `get_hubspot_client` method of the model.
+        """
+        if model.hubspot_object_type not in self.ID_KEYS:
+            raise ValueError(f"Cannot sync {model.__name__} with '{model.hubspot_object_type}'.")
+        self.model = model
+        self.object_type = model.hubspot_object_type
+        self.client = hubspot_client or model().get_hubspot_client()
+        self.portal_key = self.client.portal_key
+        self.watermark_name = self.WATERMARK_PREFIX + model._meta.label_lower
+
+    def get_watermark(self):
+        """
+        Returns
+        -------
+        int
+            The hubspot timestamp up to which the model is synced, `None` if it was never synced.
+        """
+        return HubspotWatermark.objects.filter(
+            portal_key=self.portal_key, name=self.watermark_name,
+        ).values_list('timestamp', flat=True).first()
+
+    def _set_watermark(self, timestamp):
+        HubspotWatermark.objects.update_or_create(
+            portal_key=self.portal_key,
+            name=self.watermark_name,
+            defaults={'timestamp': timestamp},
+        )
+
+    @property
+    def properties(self):
+        """The names of the properties to fetch."""
+        return [
+            *self.model.hubspot_properties.values(),
+            self.LAST_MODIFIED_PROPERTIES[self.object_type],
+        ]
+
+    def _iter_items(self, api_objects, last_modified):
+        """
+        Convert the api object contents to the items expected by `sync_many`, keeping track of the
+        most recent modification in `last_modified`.
+        """
+        last_modified_property = self.LAST_MODIFIED_PROPERTIES[self.object_type]
+        for api_object in api_objects:
+            if api_object.get('isDeleted'):
+                continue
+
+            modified_at = get_property_value(api_object, last_modified_property)
+            if modified_at:
+                last_modified[0] = max(last_modified[0], int(modified_at))
+
+            values = {
+                property_name: get_property_value(api_object, property_name)
+                for property_name in self.model.hubspot_properties.values()
+            }
+            yield (
+                api_object[self.ID_KEYS[self.object_type]],
+                self.model.get_hubspot_defaults(values),
+            )
+
+    def run(self, full=False):
+        """
+        Sync the objects modified since the last sync.
+
+        Parameters
+        ----------
+        full: bool, optional
+            Sync all the objects of the portal, whatever the watermark.
+
+        Returns
+        -------
+        dict
+            How many objects have been `created`, `updated` and left `unchanged`.
+        """
+        started_at = now_as_hubspot_timestamp()
+        watermark = self.get_watermark()
+        oldest_allowed = started_at - self.RECENTLY_MODIFIED_MAX_AGE.total_seconds() * 1000
+
+        if full or watermark is None or watermark < oldest_allowed:
+            logger.info(f"Syncing all the Hubspot {self.object_type} with {self.model.__name__}.")
+            api_objects = getattr(self.client, f'iter_{self.object_type}')(
+                properties=self.properties,
+            )
+            # Changes performed during the crawl will be caught by the next sync.
+            last_modified = [started_at]
+        else:
+            api_objects = getattr(self.client, f'iter_recently_modified_{self.object_type}')(
+                watermark, properties=self.properties,
+            )
+            last_modified = [watermark]
+
+        counts = self.model._default_manager.sync_many(
+            self._iter_items(api_objects, last_modified),
+        )
+
+        # Everything is committed: the next sync can start from the last modification synced.
+        self._set_watermark(last_modified[0])
+        logger.debug(f"{self.model.__name__} synced up to {last_modified[0]}: {counts}")
+        return counts
@@ -0,0 +1,278 @@
+from collections import deque
+import http.client
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+from .utils import register_after_fork
+
+logger = logging.getLogger('vendors.dj_hubspot')
+
+# The errors raised when a kept alive connection has been closed by the server in the meantime.
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+# The requests which could be sent again when the server may have received them already.
+IDEMPOTENT_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'))
+
+
+class ConnectionPool:
+    """
+    Persistent connections to a host, kept alive between the calls.
+
+    At most `pool_size` idle connections are kept, more connections are opened when needed (ex:
+    by concurrent calls) and closed once used. Connections idle for more than `max_idle` seconds
+    are closed instead of being reused, the server probably closed them already.
+    """
+
+    def __init__(self, connection_factory, host, timeout, pool_size=10, max_idle=60,
+                 clock=time.monotonic):
+        """
+        Parameters
+        ----------
+        connection_factory: callable
+            Instantiate an `http.client` connection, called with the host and the timeout.
+        host: str
+        timeout: float
+            In seconds.
+        pool_size: int, optional
+        max_idle: float, optional
+            In seconds.
+        clock: callable, optional
+        """
+        self.connection_factory = connection_factory
+        self.host = host
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.max_idle = max_idle
+        self.clock = clock
+        self._idle = deque()
+        self._lock = threading.Lock()
+
+    def new_connection(self):
+        return self.connection_factory(self.host, timeout=self.timeout)
+
+    def acquire(self):
+        """
+        Returns
+        -------
+        tuple
+            An idle connection if there is one (the most recently used), otherwise a new one, and
+            whether it is reused.
+        """
+        expired = []
+        connection = None
+        with self._lock:
+            while self._idle:
+                idle_connection, released_at = self._idle.pop()
+                if self.clock() - released_at <= self.max_idle:
+                    connection = idle_connection
+                    break
+                expired.append(idle_connection)
+            # The remaining connections have been idle for even longer.
+            while self._idle and self.clock() - self._idle[0][1] > self.max_idle:
+                expired.append(self._idle.popleft()[0])
+
+        for expired_connection in expired:
+            expired_connection.close()
+        if connection is not None:
+            return connection, True
+        return self.new_connection(), False
+
+    def release(self, connection):
+        """Give a connection back to the pool, to be reused by the next calls."""
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append((connection, self.clock()))
+                return
+        connection.close()
+
+    def close(self):
+        """Close all the idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for connection, _released_at in idle:
+            connection.close()
+
+    def __len__(self):
+        return len(self._idle)
+
+
+class PooledConnection:
+    """
+    Stand in for the `http.client` connection hubspot3 instantiates for each call.
+
+    The connection is taken from the pool when the request is sent, and given back to it when
+    hubspot3 closes it, once the response has been read. A request which could not be sent over
+    a kept alive connection, as the server closed it in the meantime, is sent again over a new
+    connection. When the connection is closed while waiting for the response, the server may
+    have received the request: it is only sent again if its method is idempotent (ex: a `POST`
+    creating an object is not).
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.host = pool.host
+        self.timeout = pool.timeout
+        self._connection = None
+        self._reused = False
+        self._request = None
+        self._response = None
+
+    def _send(self):
+        method, url, body, headers = self._request
+        self._connection.request(method, url, body, headers)
+
+    def _reconnect(self):
+        self._connection.close()
+        self._connection, self._reused = self.pool.new_connection(), False
+        self._send()
+
+    def request(self, method, url, body=None, headers=None):
+        self._request = (method, url, body, headers or {})
+        self._response = None
+        self._connection, self._reused = self.pool.acquire()
+        try:
+            self._send()
+        except STALE_CONNECTION_ERRORS:
+            if not self._reused:
+                raise
+            self._reconnect()
+
+    def getresponse(self):
+        try:
+            self._response = self._connection.getresponse()
+        except STALE_CONNECTION_ERRORS:
+            if not self._reused or self._request[0].upper() not in IDEMPOTENT_METHODS:
+                self.close()
+                raise
+            logger.debug(f"Kept alive connection to {self.host} closed by the server.")
+            self._reconnect()
+            self._response = self._connection.getresponse()
+        return self._response
+
+    def close(self):
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+
+        response = self._response
+        # The connection could only be reused once its response has been entirely read.
+        if response is not None and response.isclosed() and not response.will_close:
+            self.pool.release(connection)
+        else:
+            connection.close()
+
+
+class HubspotTransport:
+    """
+    The persistent connections to the Hubspot API of a portal, shared by all its hubspot3 clients.
+
+    It is configured by the `HUBSPOT_TRANSPORT` setting, see `get_transport`.
+    """
+
+    def __init__(self, pool_size=10, timeout=10, max_idle=60, clock=time.monotonic):
+        """
+        Parameters
+        ----------
+        pool_size: int, optional
+            How many idle connections are kept per host.
+        timeout: float, optional
+            The timeout of the calls, in seconds.
+        max_idle: float, optional
+            After how many seconds an idle connection is closed.
+        clock: callable, optional
+        """
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.clock = clock
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def get_pool(self, connection_factory, host, timeout):
+        key = (connection_factory, host, timeout)
+        with self._lock:
+            if key not in self._pools:
+                self._pools[key] = ConnectionPool(
+                    connection_factory, host, timeout,
+                    pool_size=self.pool_size, max_idle=self.max_idle, clock=self.clock,
+                )
+            return self._pools[key]
+
+    def install(self, client):
+        """
+        Make a hubspot3 client perform its calls through the pooled connections.
+
+        hubspot3 instantiates its `connection_type` option for each call, it is replaced by a
+        factory of `PooledConnection`.
+        """
+        connection_factory = client.options['connection_type']
+
+        def connect(host, timeout=None):
+            return PooledConnection(self.get_pool(connection_factory, host, timeout))
+
+        client.options['connection_type'] = connect
+        client.options['timeout'] = self.timeout
+        return client
+
+    def close(self):
+        """Close all the idle connections."""
+        with self._lock:
+            pools = list(self._pools.values())
+        for pool in pools:
+            pool.close()
+
+    def after_fork(self):
+        """
+        Forget the connections inherited from the parent process, without closing them: they are
+        still used by the parent.
+        """
+        self._pools = {}
+        self._lock = threading.Lock()
+
+
+_transports = {}
+_transports_lock = threading.Lock()
+
+
+@register_after_fork
+def _reset_transports():
+    global _transports_lock
+    _transports_lock = threading.Lock()
+    for transport in _transports.values():
+        transport.after_fork()
+
+
+def get_transport(portal_key):
+    """
+    Return the transport of a portal, shared by the whole process.
+
+    The transport is configured by the `HUBSPOT_TRANSPORT` setting:
+    ```
+    HUBSPOT_TRANSPORT = {
+        'POOL_SIZE': 10,
+        'TIMEOUT': 10,
+        'MAX_IDLE': 60,
+    }
+    ```
+
+    Parameters
+    ----------
+    portal_key: str
+        See `HubspotClient.portal_key`.
+
+    Returns
+    -------
+    HubspotTransport
+    """
+    with _transports_lock:
+        if portal_key not in _transports:
+            config = getattr(settings, 'HUBSPOT_TRANSPORT', None) or {}
+            _transports[portal_key] = HubspotTransport(
+                pool_size=config.get('POOL_SIZE', 10),
+                timeout=config.get('TIMEOUT', 10),
+                max_idle=config.get('MAX_IDLE', 60),
+            )
+        return _transports[portal_key]
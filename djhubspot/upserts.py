@@ -0,0 +1,286 @@
+from decimal import Decimal, InvalidOperation
+import logging
+import time
+
+from hubspot3.error import HubspotBadRequest, HubspotConflict
+
+from .bulk import BulkItemResult, BulkSummary
+from .errors import HubspotValidationError
+from .retry import get_retry_budget, use_retry_budget
+from .utils import chunks
+
+from . import constants
+
+logger = logging.getLogger('vendors.dj_hubspot')
+
+# The property holding the hubspot id of the objects.
+HUBSPOT_ID_PROPERTY = 'hs_object_id'
+
+
+class BatchUpserter:
+    """
+    Create or update many objects of the same type through the batch endpoints of the CRM API.
+
+    Records are sent by batches of `batch_size`. For each batch, existing objects are matched on
+    their `id_property` with a single batch read, then updated with a single batch update, and the
+    new ones are created with a single batch create. The created objects are matched with their
+    record on `id_property`, or on their property values when the records are matched on their
+    hubspot id: the records whose created object could not be matched fail.
+
+    When Hubspot rejects a batch because of some invalid records, the batch is split in halves
+    which are sent again, until the invalid records are isolated: only them end up failing.
+
+    The transient errors (rate limit, server error, timeout) are left to the retry policy of the
+    client (see `djhubspot.retry.RetryPolicy`): the batch reads are retried, while the batch
+    creates are not, since a create which failed could have been performed anyway. The batch
+    updates are only retried with `retry_updates`.
+    """
+
+    # Errors caused by the content of the batch.
+    RECORD_ERRORS = (HubspotBadRequest, HubspotConflict)
+
+    def __init__(
+        self, hubspot_client, object_type, id_property=None, validate=None,
+        batch_size=constants.BATCH_WRITE_MAX_SIZE, retry_updates=False,
+    ):
+        """
+        Parameters
+        ----------
+        hubspot_client: HubspotClient
+        object_type: str
+            One of `companies`, `contacts`, `deals`.
+        id_property: str, optional
+            The unique property used to match the existing objects (ex: 'email'). By default, the
+            records are matched on their hubspot id, given as `hs_object_id`.
+        validate: bool, optional
+            Check and convert the records locally, see `HubspotClient.clean_properties`.
+        batch_size: int, optional
+        retry_updates: bool, optional
+            Let the retry policy retry the batch updates, which set the same values when they are
+            performed twice.
+        """
+        self.client = hubspot_client
+        self.object_type = object_type
+        self.id_property = id_property or HUBSPOT_ID_PROPERTY
+        self.validate = validate
+        self.batch_size = batch_size
+        self.retry_updates = retry_updates
+        self.crm_objects_client = hubspot_client.get_crm_objects_client()
+
+    def _call(self, operation, data, **options):
+        return self.crm_objects_client._call(
+            f'{self.object_type}/batch/{operation}', method='POST', data=data, **options,
+        )
+
+    def _key(self, value):
+        if value is None or value == '':
+            return None
+        value = str(value)
+        # Emails are case insensitive.
+        return value.lower() if self.id_property == 'email' else value
+
+    def _get_properties(self, record):
+        properties = {
+            name: value for name, value in record.items() if name != HUBSPOT_ID_PROPERTY
+        }
+        return self.client.clean_properties(self.object_type, properties, self.validate)
+
+    def _find_ids(self, records):
+        """
+        Return the hubspot ids of the existing objects matching the given records, by key.
+        """
+        if self.id_property == HUBSPOT_ID_PROPERTY:
+            # The records already hold the ids.
+            return {}
+
+        keys = {self._key(record.get(self.id_property)) for record in records} - {None}
+        if not keys:
+            return {}
+        response = self._call('read', {
+            'idProperty': self.id_property,
+            'properties': [self.id_property],
+            'inputs': [{'id': key} for key in sorted(keys)],
+        })
+        return {
+            self._key(result['properties'].get(self.id_property)): result['id']
+            for result in (response or {}).get('results', [])
+        }
+
+    def _update(self, items):
+        options = {'idempotent': True} if self.retry_updates else {}
+        self._call('update', {
+            'inputs': [
+                {'id': hubspot_id, 'properties': properties}
+                for _record, properties, hubspot_id in items
+            ],
+        }, **options)
+        return [hubspot_id for _record, _properties, hubspot_id in items]
+
+    def _create(self, items):
+        response = self._call('create', {
+            'inputs': [{'properties': properties} for _record, properties, _id in items],
+        })
+        results = (response or {}).get('results', [])
+
+        # Hubspot does not return the results in the order of the inputs, and could return less
+        # results than inputs (ex: a multi-status response).
+        if self.id_property == HUBSPOT_ID_PROPERTY:
+            hubspot_ids = self._match_by_properties(items, results)
+        else:
+            ids_by_key = {
+                self._key((result.get('properties') or {}).get(self.id_property)): result['id']
+                for result in results
+            }
+            hubspot_ids = [
+                ids_by_key.get(self._key(properties.get(self.id_property)))
+                for _record, properties, _id in items
+            ]
+
+        unmatched_ids = {str(result['id']) for result in results} - {
+            str(hubspot_id) for hubspot_id in hubspot_ids if hubspot_id is not None
+        }
+        if unmatched_ids:
+            logger.warning(
+                f"{len(unmatched_ids)} created {self.object_type} could not be matched with their "
+                f"record.",
+                extra={'hubspot_ids': sorted(unmatched_ids)},
+            )
+        return hubspot_ids
+
+    @staticmethod
+    def _normalize_value(value):
+        if isinstance(value, bool):
+            return str(value).lower()
+        value = str(value).strip()
+        try:
+            # Hubspot formats the numbers its own way (ex: `10.0` is returned as `10`).
+            return str(Decimal(value).normalize())
+        except InvalidOperation:
+            return value.lower()
+
+    def _match_by_properties(self, items, results):
+        """
+        Match the created objects with the items whose property values they hold, nothing else
+        identifying them.
+
+        Returns
+        -------
+        list
+            The hubspot id of the object created for each item, `None` if it could not be matched.
+        """
+        remaining_results = list(results)
+        hubspot_ids = []
+        for _record, properties, _id in items:
+            expected = {
+                name: self._normalize_value(value)
+                for name, value in properties.items() if value is not None and value != ''
+            }
+            for result in remaining_results:
+                result_properties = result.get('properties') or {}
+                if all(
+                    result_properties.get(name) is not None
+                    and self._normalize_value(result_properties[name]) == value
+                    for name, value in expected.items()
+                ):
+                    remaining_results.remove(result)
+                    hubspot_ids.append(result['id'])
+                    break
+            else:
+                hubspot_ids.append(None)
+        return hubspot_ids
+
+    def _send(self, send, items):
+        """
+        Send a batch, splitting it in order to isolate the invalid records.
+
+        Parameters
+        ----------
+        send: callable
+            Send the items of a batch, returning their hubspot ids.
+        items: list of tuple
+            The record, its properties and its hubspot id (if it exists).
+
+        Returns
+        -------
+        list of BulkItemResult
+        """
+        try:
+            hubspot_ids = send(items)
+        except self.RECORD_ERRORS as e:
+            if len(items) == 1:
+                return [BulkItemResult(items[0][0], error=e)]
+            middle = len(items) // 2
+            return self._send(send, items[:middle]) + self._send(send, items[middle:])
+        except Exception as e:
+            logger.exception(f"Batch of {len(items)} {self.object_type} failed.")
+            return [BulkItemResult(record, error=e) for record, _properties, _id in items]
+
+        return [
+            BulkItemResult(record, result=str(hubspot_id))
+            if hubspot_id is not None else
+            BulkItemResult(record, error=ValueError("The created object could not be matched."))
+            for (record, _properties, _id), hubspot_id in zip(items, hubspot_ids)
+        ]
+
+    def _upsert_batch(self, records):
+        results = {}
+        valid_records = []
+        for index, record in enumerate(records):
+            try:
+                valid_records.append((index, record, self._get_properties(record)))
+            except HubspotValidationError as e:
+                results[index] = BulkItemResult(record, error=e)
+
+        try:
+            ids_by_key = self._find_ids([record for _index, record, _properties in valid_records])
+        except Exception as e:
+            logger.exception(f"Cannot match the existing {self.object_type}.")
+            for index, record, _properties in valid_records:
+                results[index] = BulkItemResult(record, error=e)
+            return [results[index] for index in range(len(records))]
+
+        to_update = []
+        to_create = []
+        for index, record, properties in valid_records:
+            key = self._key(record.get(self.id_property))
+            hubspot_id = key if self.id_property == HUBSPOT_ID_PROPERTY else ids_by_key.get(key)
+            item = ((index, record), properties, hubspot_id)
+            (to_update if hubspot_id is not None else to_create).append(item)
+
+        for send, items in ((self._update, to_update), (self._create, to_create)):
+            if not items:
+                continue
+            for result in self._send(send, items):
+                index, record = result.item
+                result.item = record
+                results[index] = result
+
+        return [results[index] for index in range(len(records))]
+
+    def upsert(self, records):
+        """
+        Create or update the given records.
+
+        The retries of the whole run share a budget, see `RetryPolicy.bulk_budget`.
+
+        Parameters
+        ----------
+        records: iterable of dict
+            The property values of the objects, by name.
+
+        Returns
+        -------
+        djhubspot.bulk.BulkSummary
+            The result of each record is its hubspot id, in the order of the records.
+        """
+        started_at = time.monotonic()
+        results = []
+        # Without a budget of its own, the upsert shares the budget of the bulk run it belongs to.
+        budget = self.client.retry_policy.new_budget() or get_retry_budget()
+        with use_retry_budget(budget):
+            for records_batch in chunks(records, self.batch_size):
+                results.extend(self._upsert_batch(records_batch))
+
+        summary = BulkSummary(results, duration=time.monotonic() - started_at)
+        logger.debug(f"Upsert of {self.object_type} done: {summary}")
+        return summary
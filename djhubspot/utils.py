@@ -1,6 +1,10 @@
-from datetime import datetime
+import calendar
+from datetime import date, datetime
+import hashlib
+from itertools import islice
+import os
 
-from django.utils.timezone import make_aware
+from django.utils.timezone import is_naive, make_aware
 
 
 def pretty_request(request):
@@ -52,3 +56,97 @@ def hubspot_timestamp_to_datetime(hs_timestamp):
     return make_aware(
         datetime.fromtimestamp(hs_timestamp / 1000.0)
     )
+
+
+def datetime_to_hubspot_timestamp(value):
+    """
+    Convert a datetime (or a date, taken at midnight UTC) to an hubspot timestamp (in millisecond).
+
+    Naive datetimes are considered to be in the current time zone.
+
+    Returns
+    -------
+    int
+    """
+    if not isinstance(value, datetime):
+        return calendar.timegm(value.timetuple()) * 1000
+    if is_naive(value):
+        value = make_aware(value)
+    return int(value.timestamp() * 1000)
+
+
+def to_hubspot_value(value):
+    """
+    Convert a python value to the value of an hubspot property.
+
+    Returns
+    -------
+    str, int or float
+    """
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (date, datetime)):
+        return datetime_to_hubspot_timestamp(value)
+    if isinstance(value, (int, float)):
+        return value
+    return str(value)
+
+
+def register_after_fork(function):
+    """
+    Call `function` in the child processes after a fork (ex: by a preforking server), on the
+    platforms supporting it.
+
+    Locks held by another thread when the process forked would never be released in the child,
+    and connections opened by the parent should not be shared with it.
+    """
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=function)
+    return function
+
+
+def chunks(items, size):
+    """
+    Split the given `items` into lists of at most `size` elements.
+
+    This is mostly useful to respect the maximum number of objects accepted by the batch
+    endpoints of the Hubspot API.
+
+    Items are consumed lazily, so `items` could be a generator.
+
+    Yields
+    ------
+    list
+    """
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def get_portal_key(hubspot_api_key):
+    """
+    Identify the portal targeted by an api key without disclosing the key.
+
+    This is used to namespace the data shared between the clients of a same portal (caches, rate
+    limiters, ...).
+    """
+    return hashlib.sha1(hubspot_api_key.encode()).hexdigest()[:16]
+
+
+def get_property_value(api_object_content, property_name):
+    """
+    Safely retrieve the 'value' of a property from an api object content.
+
+    Returns
+    -------
+    str or None
+    """
+    try:
+        return api_object_content['properties'][property_name]['value']
+    except (KeyError, TypeError):
+        return None
@@ -1,20 +1,32 @@
 import logging
-import json
+import threading
 
 from django.http import HttpResponse
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from django.views.generic import View
 
+from .client import HubspotClient
 from .decorators import request_is_from_hubspot
-from .events import HubspotEvent
-from .utils import pretty_request
+from .errors import HubspotCircuitOpen, HubspotEventError
+from .events import EventDeduplicator, HubspotEvent, coalesce_events
+from .queue import enqueue_webhook_batch
+from .utils import pretty_request, register_after_fork
 
 from . import constants
 
 
 logger = logging.getLogger('vendors.dj_hubspot')
 
+_event_deduplicators = {}
+_event_deduplicators_lock = threading.Lock()
+
+
+@register_after_fork
+def _reset_locks():
+    global _event_deduplicators_lock
+    _event_deduplicators_lock = threading.Lock()
+
 
 @method_decorator(csrf_exempt, name='dispatch')
 @method_decorator(request_is_from_hubspot, name='dispatch')
@@ -26,6 +38,101 @@ class WebhookView(View):
     hubspot_events = []
     raw_body = None
 
+    # Keep the persistent index of the companies (see `HubspotClient.company_index`) current with
+    # the received events.
+    update_company_index = False
+
+    # Only store the received events in the database and respond immediately, the events being
+    # processed later on by the `hubspot_process_webhooks` management command.
+    # Hubspot expects a response within a few seconds, and retries the requests which took longer.
+    queue_events = False
+
+    # Store the events in the queue (see `queue_events`) when their processing fails because the
+    # Hubspot API is unavailable (see `djhubspot.circuit.CircuitBreaker`), instead of failing the
+    # request. The events processed before the failure are processed again by the queue worker:
+    # `process_event` should be idempotent.
+    queue_events_on_circuit_open = False
+
+    # Drop the events already processed, Hubspot sending them again when it did not get a
+    # response in time.
+    deduplicate_events = False
+    # Each view class remembers its own processed events by default (see
+    # `get_event_deduplicator`), set an `EventDeduplicator` to configure or share it.
+    event_deduplicator = None
+
+    # Merge the property changes about the same object into a single event, whose
+    # `changed_properties` holds the latest value of each property.
+    coalesce_property_changes = False
+
+    def apply_events_to_company_index(self):
+        """Apply the company events contained in the request to the company index."""
+        company_index = HubspotClient.for_portal().company_index
+        for event in self.hubspot_events:
+            company_index.apply_event(event)
+
+    @classmethod
+    def get_class_event_deduplicator(cls):
+        """
+        Returns
+        -------
+        djhubspot.events.EventDeduplicator
+            The deduplicator of the view class, created on first use. It is not shared with the
+            subclasses.
+        """
+        with _event_deduplicators_lock:
+            if cls not in _event_deduplicators:
+                _event_deduplicators[cls] = EventDeduplicator()
+            return _event_deduplicators[cls]
+
+    def get_event_deduplicator(self):
+        """
+        Returns
+        -------
+        djhubspot.events.EventDeduplicator
+            The `event_deduplicator` if set, the deduplicator of the view class otherwise.
+        """
+        if self.event_deduplicator is not None:
+            return self.event_deduplicator
+        return self.get_class_event_deduplicator()
+
+    def parse_events(self, raw_body):
+        """
+        Build the events contained in the body of a request, invalid events being ignored.
+
+        Parameters
+        ----------
+        raw_body: bytes or str
+
+        Returns
+        -------
+        list of HubspotEvent
+
+        Raises
+        ------
+        HubspotEventError
+            If the body is not a JSON list of events.
+        """
+        return HubspotEvent.parse_batch(raw_body)
+
+    def prepare_events(self, hubspot_events):
+        """
+        Deduplicate and coalesce the events before they are processed, if enabled.
+
+        Returns
+        -------
+        list of HubspotEvent
+        """
+        if self.deduplicate_events:
+            hubspot_events = self.get_event_deduplicator().filter(hubspot_events)
+        if self.coalesce_property_changes:
+            hubspot_events = coalesce_events(hubspot_events)
+        return hubspot_events
+
+    def events_processed(self, hubspot_events):
+        """Called once the given events have been successfully processed."""
+        if self.deduplicate_events:
+            self.get_event_deduplicator().mark_seen(hubspot_events)
+
     def process_event(self, event):
         """
         Process a single event.
@@ -67,23 +174,36 @@ class WebhookView(View):
         # FIXME: At the moment, warning lvl is the only way to output something ...
         logger.debug(pretty_request(request))
 
-        self.raw_body = request.body.decode('utf-8')
-
         try:
-            json_events = json.loads(self.raw_body)
-        except (json.JSONDecodeError, TypeError):
+            hubspot_events = self.parse_events(request.body)
+        except HubspotEventError:
             # The content of the request seems to be invalid.
             logger.error(
                 'Invalid request body received from hubspot.',
-                extra={'raw_body': self.raw_body},
+                extra={'raw_body': request.body},
             )
             return HttpResponse('Bad request', status=constants.HTTP_400_BAD_REQUEST)
 
-        for event in json_events:
-            # FIXME: Handle errors. Log invalid events.
-            self.hubspot_events.append(HubspotEvent(event))
+        self.raw_body = request.body.decode('utf-8')
+
+        if self.queue_events:
+            enqueue_webhook_batch(self.raw_body)
+            return HttpResponse()
+
+        self.hubspot_events = self.prepare_events(hubspot_events)
+
+        if self.update_company_index:
+            self.apply_events_to_company_index()
 
         # Process hubspot events.
-        self.process_events()
+        try:
+            self.process_events()
+        except HubspotCircuitOpen as e:
+            if not self.queue_events_on_circuit_open:
+                raise
+            logger.warning(f"{e} Queuing {len(self.hubspot_events)} hubspot event(s).")
+            enqueue_webhook_batch(self.raw_body)
+            return HttpResponse()
+        self.events_processed(self.hubspot_events)
 
         return HttpResponse()
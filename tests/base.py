@@ -3,3 +3,21 @@ from django.test import TestCase as DJTestCase
 
 class TestCase(DJTestCase):
     pass
+
+
+class FakeClock:
+    """A clock which only moves forward when sleeping, or when `now` is set."""
+
+    def __init__(self, now=0):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay
@@ -0,0 +1,22 @@
+from django.db import models
+
+from djhubspot.mixins import HubspotSyncable, HubspotSyncableManager
+
+
+class Company(HubspotSyncable):
+    """A model synced with the Hubspot companies, used by the tests."""
+
+    hubspot_object_type = 'companies'
+    hubspot_properties = {
+        'name': 'name',
+        'employees': 'numberofemployees',
+        'founded_on': 'founded_on',
+    }
+
+    name = models.CharField(max_length=255, blank=True)
+
+    employees = models.IntegerField(blank=True, null=True)
+
+    founded_on = models.DateField(blank=True, null=True)
+
+    objects = HubspotSyncableManager()
@@ -26,6 +26,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "djhubspot",
+    "tests",
 ]
 
 ROOT_URLCONF = "tests.urls"
@@ -0,0 +1,197 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+from djhubspot import registries
+from djhubspot.aio import AsyncCompany, AsyncDeal, AsyncHubspotClient, aiohttp
+from djhubspot.client import OwnersClient, PipelinesClient
+from djhubspot.errors import HubspotNotFound
+
+from .base import TestCase
+
+if aiohttp is not None:
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+
+
+DEALS = {
+    '1': {
+        'dealId': 1,
+        'properties': {
+            'dealname': {'value': 'Big deal'},
+            'hubspot_owner_id': {'value': '5'},
+            'pipeline': {'value': 'default'},
+            'dealstage': {'value': 'won'},
+        },
+        'associations': {'associatedCompanyIds': [10], 'associatedVids': [100, 101]},
+    },
+}
+COMPANIES = {
+    '10': {'companyId': 10, 'properties': {'name': {'value': 'ACME'}}},
+}
+CONTACTS = {
+    '100': {'vid': 100, 'properties': {'email': {'value': 'jane@acme.com'}}},
+    '101': {'vid': 101, 'properties': {'email': {'value': 'john@acme.com'}}},
+}
+LINE_ITEMS = {
+    '1000': {
+        'objectId': 1000,
+        'properties': {'name': {'value': 'Desk'}, 'hs_product_id': {'value': '7'}},
+    },
+}
+
+
+def build_fake_hubspot_app(calls):
+    """A fake Hubspot API serving the objects above."""
+
+    def get_object(objects, key):
+        async def handler(request):
+            calls.append(request.path)
+            try:
+                return web.json_response(objects[request.match_info[key]])
+            except KeyError:
+                return web.json_response({'message': 'Not found'}, status=404)
+        return handler
+
+    async def get_associations(request):
+        calls.append(request.path)
+        return web.json_response({'results': [1000], 'hasMore': False, 'offset': 1000})
+
+    async def batch_read_line_items(request):
+        calls.append(request.path)
+        payload = await request.json()
+        return web.json_response({
+            str(line_id): LINE_ITEMS[str(line_id)]
+            for line_id in payload['ids']
+        })
+
+    app = web.Application()
+    app.router.add_get('/deals/v1/deal/{deal_id}', get_object(DEALS, 'deal_id'))
+    app.router.add_get(
+        '/companies/v2/companies/{company_id}', get_object(COMPANIES, 'company_id'),
+    )
+    app.router.add_get(
+        '/contacts/v1/contact/vid/{vid}/profile', get_object(CONTACTS, 'vid'),
+    )
+    app.router.add_get(
+        '/crm-associations/v1/associations/{object_id}/HUBSPOT_DEFINED/{definition_id}',
+        get_associations,
+    )
+    app.router.add_post(
+        '/crm-objects/v1/objects/line_items/batch-read', batch_read_line_items,
+    )
+    return app
+
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed.")
+class AsyncHubspotClientTestCase(TestCase):
+
+    def run_with_fake_hubspot(self, test_coroutine):
+        calls = []
+
+        async def run():
+            server = TestServer(build_fake_hubspot_app(calls))
+            await server.start_server()
+            try:
+                async with AsyncHubspotClient(
+                    hubspot_api_key='__API_KEY__',
+                    api_base=str(server.make_url('')),
+                ) as client:
+                    await test_coroutine(client)
+            finally:
+                await server.close()
+
+        asyncio.run(run())
+        return calls
+
+    def test_deal_relations(self):
+        async def test(client):
+            deal = await AsyncDeal.get(1, hubspot_client=client)
+            company, contacts, products = await asyncio.gather(
+                deal.get_company(),
+                deal.get_contacts(),
+                deal.get_products(),
+            )
+
+            self.assertEqual(deal.name, 'Big deal')
+            self.assertIsInstance(company, AsyncCompany)
+            self.assertEqual(deal.company.name, 'ACME')
+            self.assertEqual(
+                sorted(contact.email for contact in deal.contacts),
+                ['jane@acme.com', 'john@acme.com'],
+            )
+            self.assertEqual([product.name for product in products], ['Desk'])
+
+        calls = self.run_with_fake_hubspot(test)
+        self.assertEqual(len(calls), 6)
+
+    def test_deal_accessors(self):
+        registries._registries.clear()
+        owners = [{'ownerId': 5, 'email': 'jane@acme.com', 'firstName': 'Jane'}]
+        pipelines = [{
+            'pipelineId': 'default',
+            'stages': [{'stageId': 'won', 'label': 'Won', 'metadata': {'probability': '1.0'}}],
+        }]
+
+        async def test(client):
+            deal = await AsyncDeal.get(1, hubspot_client=client)
+            with self.assertRaises(TypeError):
+                deal.products
+
+            owner, deal_stage, products = await asyncio.gather(
+                deal.get_owner(),
+                deal.get_deal_stage(),
+                deal.get_products(),
+            )
+
+            self.assertEqual(owner.first_name, 'Jane')
+            self.assertIs(deal.owner, owner)
+            self.assertEqual(deal_stage['label'], 'Won')
+            self.assertTrue(deal.closed_won)
+            self.assertIs(deal.products, products)
+
+        with mock.patch.object(OwnersClient, 'get_owners', return_value=owners), \
+                mock.patch.object(PipelinesClient, 'get_all', return_value=pipelines) as get_all:
+            self.run_with_fake_hubspot(test)
+        get_all.assert_called_once_with('deals')
+
+    def test_not_found(self):
+        async def test(client):
+            with self.assertRaises(ValueError):
+                await AsyncDeal.get(2, hubspot_client=client)
+            with self.assertRaises(HubspotNotFound):
+                await client.get_company_data(11)
+
+        self.run_with_fake_hubspot(test)
+
+    def test_create_company(self):
+        received = []
+
+        async def run():
+            async def create_company(request):
+                received.append(await request.json())
+                return web.json_response({'companyId': 12})
+
+            app = web.Application()
+            app.router.add_post('/companies/v2/companies', create_company)
+            server = TestServer(app)
+            await server.start_server()
+            try:
+                async with AsyncHubspotClient(
+                    hubspot_api_key='__API_KEY__',
+                    api_base=str(server.make_url('')),
+                ) as client:
+                    return await client.create_company({'name': 'ACME'})
+            finally:
+                await server.close()
+
+        self.assertEqual(asyncio.run(run()), {'companyId': 12})
+        self.assertEqual(
+            json.dumps(received),
+            json.dumps([{'properties': [{'name': 'name', 'value': 'ACME'}]}]),
+        )
+
+    def test_requires_async_client(self):
+        with self.assertRaises(TypeError):
+            AsyncDeal(1, hubspot_client=None)
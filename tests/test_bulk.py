@@ -0,0 +1,78 @@
+import threading
+import time
+from unittest import mock
+
+from djhubspot.bulk import BulkExecutor
+from djhubspot.client import HubspotClient
+from djhubspot.errors import HubspotNotFound
+
+from .base import TestCase
+
+
+class BulkExecutorTestCase(TestCase):
+
+    def test_results_and_errors(self):
+        def operation(value):
+            if value % 3 == 0:
+                raise ValueError(value)
+            return value * 2
+
+        summary = BulkExecutor(max_workers=3).map(operation, range(1, 10))
+
+        self.assertEqual(len(summary), 9)
+        self.assertEqual([result.item for result in summary.results], list(range(1, 10)))
+        self.assertEqual([result.result for result in summary.succeeded], [2, 4, 8, 10, 14, 16])
+        self.assertEqual([result.item for result in summary.failed], [3, 6, 9])
+        self.assertTrue(all(isinstance(error, ValueError) for error in summary.errors))
+
+    def test_max_workers(self):
+        running = []
+        max_running = []
+        lock = threading.Lock()
+
+        def operation(value):
+            with lock:
+                running.append(value)
+                max_running.append(len(running))
+            time.sleep(0.01)
+            with lock:
+                running.remove(value)
+
+        with BulkExecutor(max_workers=2) as bulk:
+            for value in range(10):
+                bulk.submit(operation, value)
+
+        self.assertLessEqual(max(max_running), 2)
+        self.assertEqual(len(bulk.summary.succeeded), 10)
+
+    def test_submit_outside_block(self):
+        with self.assertRaises(RuntimeError):
+            BulkExecutor().submit(print, 'oops')
+
+
+class HubspotClientBulkTestCase(TestCase):
+
+    def test_delete_all_companies_having(self):
+        companies_client = mock.Mock()
+        companies_client._call.return_value = {
+            'companies': [
+                {'companyId': 1, 'properties': {'source': {'value': 'test'}}},
+                {'companyId': 2, 'properties': {'source': {'value': 'crm'}}},
+                {'companyId': 3, 'properties': {'source': {'value': 'test'}}},
+            ],
+            'has-more': False,
+            'offset': 3,
+        }
+        companies_client.delete.side_effect = [None, HubspotNotFound(None, None)]
+
+        client = HubspotClient(hubspot_api_key='__API_KEY__')
+        client.get_companies_client = mock.Mock(return_value=companies_client)
+
+        summary = client.delete_all_companies(having={'source': 'test'}, max_workers=1)
+
+        self.assertEqual(
+            [call[0][0] for call in companies_client.delete.call_args_list],
+            [1, 3],
+        )
+        self.assertEqual([result.item for result in summary.succeeded], [1])
+        self.assertEqual([result.item for result in summary.failed], [3])
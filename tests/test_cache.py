@@ -0,0 +1,123 @@
+from unittest import mock
+
+from django.test import override_settings
+
+from djhubspot.cache import (
+    DjangoObjectCache,
+    LocMemObjectCache,
+    get_object_cache,
+    set_object_cache,
+)
+from djhubspot.client import HubspotClient
+from djhubspot.helpers import Company
+
+from .base import TestCase
+
+
+class LocMemObjectCacheTestCase(TestCase):
+
+    def test_lru_eviction(self):
+        cache = LocMemObjectCache(max_size=2)
+        cache.set('a', {'objectId': 'a'})
+        cache.set('b', {'objectId': 'b'})
+
+        # Reading 'a' makes 'b' the least recently used entry.
+        cache.get('a')
+        cache.set('c', {'objectId': 'c'})
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), {'objectId': 'a'})
+
+    def test_ttl(self):
+        cache = LocMemObjectCache(ttl=10)
+        with mock.patch('djhubspot.cache.time.monotonic', return_value=100):
+            cache.set('a', {'objectId': 'a'})
+        with mock.patch('djhubspot.cache.time.monotonic', return_value=105):
+            self.assertIsNotNone(cache.get('a'))
+        with mock.patch('djhubspot.cache.time.monotonic', return_value=111):
+            self.assertIsNone(cache.get('a'))
+
+    def test_cached_values_are_copies(self):
+        cache = LocMemObjectCache()
+        cache.set('a', {'properties': {'name': {'value': 'ACME'}}})
+        cache.get('a')['properties'].pop('name')
+
+        self.assertIn('name', cache.get('a')['properties'])
+        self.assertEqual(cache.stats(), {'hits': 2, 'misses': 0})
+
+
+class DjangoObjectCacheTestCase(TestCase):
+
+    def test_get_set(self):
+        cache = DjangoObjectCache()
+        key = ('portal', 'Company', '42', ())
+
+        self.assertIsNone(cache.get(key))
+        cache.set(key, {'companyId': 42})
+        self.assertEqual(cache.get(key), {'companyId': 42})
+        cache.delete(key)
+        self.assertIsNone(cache.get(key))
+
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 2})
+
+
+class HubspotAPIObjectCacheTestCase(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        set_object_cache(LocMemObjectCache())
+        self.addCleanup(set_object_cache, None)
+
+        self.companies_client = mock.Mock()
+        self.companies_client.get.return_value = {
+            'companyId': 42,
+            'properties': {'name': {'value': 'ACME'}},
+        }
+        self.client = HubspotClient(hubspot_api_key='__API_KEY__')
+        self.client.get_companies_client = mock.Mock(return_value=self.companies_client)
+
+    def test_fetch_uses_cache(self):
+        self.assertEqual(Company(42, hubspot_client=self.client).name, 'ACME')
+        self.assertEqual(Company(42, hubspot_client=self.client).name, 'ACME')
+        self.companies_client.get.assert_called_once()
+
+        # The cache is bypassed when explicitly asked to.
+        Company(42, fetch=False, hubspot_client=self.client).fetch(use_cache=False)
+        self.assertEqual(self.companies_client.get.call_count, 2)
+
+    def test_cache_is_namespaced_by_portal(self):
+        Company(42, hubspot_client=self.client)
+
+        other_client = HubspotClient(hubspot_api_key='__OTHER_API_KEY__')
+        other_client.get_companies_client = mock.Mock(return_value=self.companies_client)
+        Company(42, hubspot_client=other_client)
+
+        self.assertEqual(self.companies_client.get.call_count, 2)
+
+    def test_update_invalidates_cache(self):
+        company = Company(42, hubspot_client=self.client)
+        company.update({'properties': []})
+        Company(42, hubspot_client=self.client)
+
+        self.assertEqual(self.companies_client.get.call_count, 2)
+
+
+class GetObjectCacheTestCase(TestCase):
+
+    def tearDown(self):
+        set_object_cache(None)
+        super().tearDown()
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(get_object_cache())
+
+    @override_settings(HUBSPOT_OBJECT_CACHE={
+        'BACKEND': 'djhubspot.cache.LocMemObjectCache',
+        'OPTIONS': {'max_size': 10},
+    })
+    def test_from_settings(self):
+        object_cache = get_object_cache()
+        self.assertIsInstance(object_cache, LocMemObjectCache)
+        self.assertEqual(object_cache.max_size, 10)
+        self.assertIs(get_object_cache(), object_cache)
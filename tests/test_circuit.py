@@ -0,0 +1,154 @@
+import socket
+from unittest import mock
+
+from django.test import override_settings
+
+from djhubspot import circuit
+from djhubspot.circuit import CircuitBreaker
+from djhubspot.client import HubspotClient
+from djhubspot.errors import (
+    HubspotCircuitOpen,
+    HubspotNotFound,
+    HubspotServerError,
+    HubspotTimeout,
+)
+from djhubspot.retry import RetryPolicy
+
+from .base import FakeClock, TestCase
+
+
+def server_error():
+    result = mock.Mock(status=502, reason='Bad Gateway', body='')
+    result.getheader.return_value = None
+    return HubspotServerError(result, {})
+
+
+class CircuitBreakerTestCase(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(
+            failure_threshold=2, recovery_timeout=30, family_thresholds={'deals': 3},
+            clock=self.clock,
+        )
+        self.call = mock.Mock(return_value='ok')
+        self.protected_call = self.breaker.protect(self.call, get_path=lambda subpath: subpath)
+
+    def fail(self, subpath, error_class=HubspotTimeout):
+        self.call.side_effect = error_class(None, {})
+        with self.assertRaises(error_class):
+            self.protected_call(subpath)
+        self.call.side_effect = None
+
+    def test_get_family(self):
+        self.assertEqual(CircuitBreaker.get_family('companies/v2/companies/42'), 'companies')
+        self.assertEqual(
+            CircuitBreaker.get_family('crm/v3/objects/deals/batch/read'), 'crm/v3/objects',
+        )
+
+    def test_open_after_consecutive_failures(self):
+        self.fail('companies/v2/companies/1')
+        self.assertEqual(self.protected_call('companies/v2/companies/1'), 'ok')
+        self.fail('companies/v2/companies/1')
+        self.assertEqual(self.breaker.get_state('companies'), CircuitBreaker.CLOSED)
+
+        self.fail('companies/v2/companies/1')
+        self.assertEqual(self.breaker.get_state('companies'), CircuitBreaker.OPEN)
+
+        self.call.reset_mock()
+        with self.assertRaises(HubspotCircuitOpen) as context:
+            self.protected_call('companies/v2/companies/2')
+        self.assertEqual(context.exception.family, 'companies')
+        self.assertEqual(context.exception.retry_in, 30)
+        self.call.assert_not_called()
+
+        # The other families are not affected.
+        self.assertEqual(self.protected_call('contacts/v1/contact/vid/3/profile'), 'ok')
+
+    def test_socket_errors_open_the_circuit(self):
+        breaker = CircuitBreaker(clock=self.clock)
+        call = mock.Mock(side_effect=socket.timeout('timed out'))
+        protected_call = breaker.protect(call, get_path=lambda subpath: subpath)
+
+        for _ in range(5):
+            with self.assertRaises(socket.timeout):
+                protected_call('companies/v2/companies/1')
+        self.assertEqual(breaker.get_state('companies'), CircuitBreaker.OPEN)
+
+        call.side_effect = socket.gaierror('Name or service not known')
+        for _ in range(5):
+            with self.assertRaises(socket.gaierror):
+                protected_call('contacts/v1/contact/vid/3/profile')
+        self.assertEqual(breaker.get_state('contacts'), CircuitBreaker.OPEN)
+
+    def test_family_thresholds(self):
+        self.fail('deals/v1/deal/1')
+        self.fail('deals/v1/deal/1')
+        self.assertEqual(self.breaker.get_state('deals'), CircuitBreaker.CLOSED)
+        self.fail('deals/v1/deal/1')
+        self.assertEqual(self.breaker.get_state('deals'), CircuitBreaker.OPEN)
+
+    def test_responses_are_not_failures(self):
+        for _ in range(3):
+            self.fail('companies/v2/companies/1', error_class=HubspotNotFound)
+        self.assertEqual(self.breaker.get_state('companies'), CircuitBreaker.CLOSED)
+
+    def test_half_open_probe(self):
+        self.fail('companies/v2/companies/1')
+        self.fail('companies/v2/companies/1')
+
+        self.clock.now = 30
+
+        def probe(subpath):
+            # Only the probe is let through while it is in progress.
+            self.assertEqual(self.breaker.get_state('companies'), CircuitBreaker.HALF_OPEN)
+            with self.assertRaises(HubspotCircuitOpen):
+                self.protected_call(subpath)
+            raise HubspotTimeout(None, {})
+
+        # The probe fails: the circuit opens again.
+        self.call.side_effect = probe
+        with self.assertRaises(HubspotTimeout):
+            self.protected_call('companies/v2/companies/1')
+        self.assertEqual(self.breaker.get_state('companies'), CircuitBreaker.OPEN)
+
+        with self.assertRaises(HubspotCircuitOpen):
+            self.protected_call('companies/v2/companies/1')
+
+        self.clock.now = 60
+        self.call.side_effect = None
+        self.assertEqual(self.protected_call('companies/v2/companies/1'), 'ok')
+        self.assertEqual(self.breaker.get_state('companies'), CircuitBreaker.CLOSED)
+
+    def test_disabled(self):
+        breaker = CircuitBreaker(failure_threshold=None)
+        self.assertIs(breaker.protect(self.call, get_path=str), self.call)
+
+
+class HubspotClientCircuitBreakerTestCase(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        circuit._circuit_breakers.clear()
+        self.addCleanup(circuit._circuit_breakers.clear)
+
+    @override_settings(HUBSPOT_CIRCUIT_BREAKER={'FAILURE_THRESHOLD': 3})
+    def test_calls_fail_fast(self):
+        client = HubspotClient(
+            hubspot_api_key='__API_KEY__', retry_policy=RetryPolicy(sleep=lambda delay: None),
+        )
+        companies_client = client.get_companies_client()
+
+        with mock.patch('hubspot3.base.BaseClient._create_request'), \
+                mock.patch('hubspot3.base.BaseClient._execute_request_raw') as execute_mock:
+            execute_mock.side_effect = server_error()
+            # The circuit opens during the retries.
+            with self.assertRaises(HubspotCircuitOpen):
+                companies_client.get(42)
+            with self.assertRaises(HubspotCircuitOpen):
+                client.get_companies_client().get(43)
+
+        self.assertEqual(execute_mock.call_count, 3)
+        self.assertEqual(client.circuit_breaker.get_state('companies'), CircuitBreaker.OPEN)
+        self.assertEqual(client.metrics.get('rejected'), 2)
@@ -0,0 +1,112 @@
+from unittest import mock
+
+from django.test import override_settings
+
+from hubspot3.error import HubspotNotFound
+
+from djhubspot import client as client_module, transport
+from djhubspot.client import HubspotClient
+from djhubspot.metrics import ClientMetrics
+
+from .base import FakeClock, TestCase
+
+
+class ClientMetricsTestCase(TestCase):
+
+    def test_instrument(self):
+        clock = FakeClock()
+        metrics = ClientMetrics(clock=clock)
+
+        def call(fail=False):
+            clock.now += 2
+            if fail:
+                raise ValueError()
+            return 42
+
+        instrumented_call = metrics.instrument(call)
+        self.assertEqual(instrumented_call(), 42)
+        with self.assertRaises(ValueError):
+            instrumented_call(fail=True)
+
+        self.assertEqual(metrics.snapshot(), {'calls': 2, 'errors': 1, 'time': 4})
+        metrics.reset()
+        self.assertEqual(metrics.snapshot(), {})
+
+
+class HubspotClientRegistryTestCase(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        client_module._clients.clear()
+        self.addCleanup(client_module._clients.clear)
+
+    @override_settings(HUBSPOT_API_KEY='__API_KEY__')
+    def test_for_portal(self):
+        client = HubspotClient.for_portal()
+
+        self.assertIs(HubspotClient.for_portal('__API_KEY__'), client)
+        self.assertIsNot(HubspotClient.for_portal('__OTHER_API_KEY__'), client)
+        self.assertIsNot(HubspotClient('__API_KEY__'), client)
+        self.assertIs(client.get_companies_client(), client.get_companies_client())
+
+    def test_close(self):
+        client = HubspotClient.for_portal('__API_KEY__')
+        companies_client = client.get_companies_client()
+
+        with mock.patch.object(transport.HubspotTransport, 'close') as close_mock:
+            client.close()
+
+        close_mock.assert_called_once_with()
+        self.assertIsNot(client.get_companies_client(), companies_client)
+        self.assertIsNot(HubspotClient.for_portal('__API_KEY__'), client)
+
+    def test_context_manager(self):
+        with HubspotClient.for_portal('__API_KEY__') as client:
+            client.get_companies_client()
+        self.assertNotIn(client, client_module._clients.values())
+
+    def test_calls_are_counted(self):
+        client = HubspotClient.for_portal('__API_KEY__')
+        companies_client = client.get_companies_client()
+
+        with mock.patch('hubspot3.base.BaseClient._create_request'), \
+                mock.patch('hubspot3.base.BaseClient._execute_request_raw') as execute_mock:
+            execute_mock.return_value.body = '{"companyId": 42}'
+            companies_client.get(42)
+            execute_mock.side_effect = HubspotNotFound(None, None)
+            with self.assertRaises(HubspotNotFound):
+                companies_client.get(43)
+
+        metrics = client.metrics.snapshot()
+        self.assertEqual(metrics['calls'], 2)
+        self.assertEqual(metrics['errors'], 1)
+
+    def test_after_fork(self):
+        client = HubspotClient.for_portal('__API_KEY__')
+        client.metrics.increment('calls')
+        pools = client.transport._pools
+        lock = client_module._clients_lock
+
+        # Called in the child processes by `os.register_at_fork`.
+        client_module._reset_clients()
+        transport._reset_transports()
+
+        self.assertIsNot(client_module._clients_lock, lock)
+        self.assertIs(HubspotClient.for_portal('__API_KEY__'), client)
+        self.assertEqual(client.metrics.snapshot(), {})
+        self.assertIsNot(client.transport._pools, pools)
+
+
+class HubspotClientDeprecationsTestCase(TestCase):
+
+    def test_post_request_delay(self):
+        client = HubspotClient(hubspot_api_key='__API_KEY__')
+
+        with self.assertWarns(DeprecationWarning):
+            self.assertEqual(HubspotClient.POST_REQUEST_DELAY, 1)
+        with self.assertWarns(DeprecationWarning):
+            self.assertEqual(client.POST_REQUEST_DELAY, 1)
+
+        with self.assertWarns(DeprecationWarning), mock.patch('time.sleep') as sleep_mock:
+            client.wait()
+        sleep_mock.assert_not_called()
@@ -1,4 +1,7 @@
-from djhubspot.events import HubspotEvent
+import json
+
+from djhubspot.errors import HubspotEventError
+from djhubspot.events import EventDeduplicator, HubspotEvent, coalesce_events
 
 from .base import TestCase
 
@@ -31,9 +34,106 @@ class HubspotEventTestCase(TestCase):
             HubspotEvent.EVENT_TYPE_DEAL_UPDATED,
         )
 
+    def test_fields(self):
+        self.assertEqual(self.event.deal_id, 697680835)
+        self.assertEqual(self.event.updated_property_name, 'dealstage')
+        self.assertEqual(self.event.object_key, ('deal', 697680835))
+        self.assertFalse(hasattr(self.event, 'company_id'))
+        self.assertIs(self.event.occurred_at, self.event.occurred_at)
+
+        company_event = HubspotEvent(dict(JSON_EVENT, subscriptionType='company.deletion'))
+        self.assertEqual(company_event.event_type, HubspotEvent.EVENT_TYPE_COMPANY_DELETED)
+        self.assertEqual(company_event.company_id, 697680835)
+        self.assertFalse(hasattr(company_event, 'updated_property_name'))
+
+    def test_parse_batch(self):
+        raw_body = json.dumps([
+            JSON_EVENT,
+            dict(JSON_EVENT, subscriptionType='unknown'),
+            'invalid',
+            dict(JSON_EVENT, subscriptionType='contact.creation'),
+        ]).encode()
+        events = HubspotEvent.parse_batch(raw_body)
+
+        self.assertEqual(
+            [event.event_type for event in events],
+            [HubspotEvent.EVENT_TYPE_DEAL_UPDATED, HubspotEvent.EVENT_TYPE_CONTACT_CREATED],
+        )
+        with self.assertRaises(HubspotEventError):
+            HubspotEvent.parse_batch(b'{"invalid"')
+        with self.assertRaises(HubspotEventError):
+            HubspotEvent({'subscriptionType': 'unknown'})
+
     # FIXME: Not sure about the timezone yet.
     # def test_occurred_at(self):
     #     self.assertEqual(
     #         self.event.occurred_at,
     #         datetime(2019, 4, 24, 10, 30, 37, 139000),
     #     )
+
+
+def deal_event(event_id, deal_id, subscription_type='deal.propertyChange', occurred_at=0,
+               property_name='dealstage', property_value=None):
+    return HubspotEvent({
+        'objectId': deal_id,
+        'propertyName': property_name,
+        'propertyValue': property_value,
+        'eventId': event_id,
+        'occurredAt': occurred_at,
+        'subscriptionType': subscription_type,
+        'attemptNumber': 0,
+    })
+
+
+class EventDeduplicatorTestCase(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.now = 0
+        self.deduplicator = EventDeduplicator(max_size=2, ttl=60, clock=lambda: self.now)
+
+    def test_filter(self):
+        events = [deal_event(1, 10), deal_event(2, 10), deal_event(1, 10)]
+        self.assertEqual(
+            [event.event_id for event in self.deduplicator.filter(events)], [1, 2],
+        )
+
+        # Events are only seen once they have been processed.
+        self.assertEqual(len(self.deduplicator.filter(events)), 2)
+        self.deduplicator.mark_seen(events[:1])
+        self.assertEqual(
+            [event.event_id for event in self.deduplicator.filter(events)], [2],
+        )
+
+    def test_bounds(self):
+        self.deduplicator.mark_seen([deal_event(1, 10), deal_event(2, 10), deal_event(3, 10)])
+        # The oldest id has been forgotten.
+        self.assertEqual(len(self.deduplicator), 2)
+        self.assertEqual(len(self.deduplicator.filter([deal_event(1, 10)])), 1)
+
+        self.now = 61
+        self.assertEqual(len(self.deduplicator.filter([deal_event(2, 10)])), 1)
+        self.assertEqual(len(self.deduplicator), 0)
+
+
+class CoalesceEventsTestCase(TestCase):
+
+    def test_coalesce_property_changes(self):
+        events = coalesce_events([
+            deal_event(1, 10, occurred_at=3, property_value='won'),
+            deal_event(2, 11, occurred_at=1, property_value='lost'),
+            deal_event(3, 10, occurred_at=2, property_value='closed'),
+            deal_event(4, 10, occurred_at=4, property_name='amount', property_value='10'),
+            deal_event(5, 10, subscription_type='deal.deletion', occurred_at=5),
+            deal_event(6, 10, occurred_at=6, property_value='open'),
+        ])
+
+        self.assertEqual([event.event_id for event in events], [4, 2, 5, 6])
+        self.assertEqual(events[0].merged_event_ids, (3, 1, 4))
+        self.assertEqual(events[0].changed_properties, {'dealstage': 'won', 'amount': '10'})
+        self.assertEqual(events[1].changed_properties, {'dealstage': 'lost'})
+        self.assertEqual(events[3].changed_properties, {'dealstage': 'open'})
+
+        deduplicator = EventDeduplicator()
+        deduplicator.mark_seen(events[:1])
+        self.assertEqual(len(deduplicator), 3)
@@ -0,0 +1,228 @@
+from unittest import mock
+
+from djhubspot import registries
+from djhubspot.cache import LocMemObjectCache, set_object_cache
+from djhubspot.client import CRMObjectsClient, HubspotClient, PropertiesClient
+from djhubspot.helpers import Company, Contact, Deal, Line, Product
+
+from .base import TestCase
+
+
+def line_item_content(line_id, product_id=None, name='Product', price='10.0'):
+    """Build the content of a line item as returned by the lines API."""
+    properties = {
+        'name': {'value': name},
+        'price': {'value': price},
+    }
+    if product_id:
+        properties['hs_product_id'] = {'value': product_id}
+    return {
+        'objectType': 'LINE_ITEM',
+        'objectId': line_id,
+        'properties': properties,
+        'isDeleted': False,
+    }
+
+
+class DealProductsTestCase(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = HubspotClient(hubspot_api_key='__API_KEY__')
+
+        self.get_associations_batch = mock.Mock(return_value={
+            '1': ['11', '12'],
+            '2': ['21'],
+        })
+
+        self.lines_client = mock.Mock()
+        self.lines_client._call.return_value = {
+            '11': line_item_content(11, product_id='111', name='Desk'),
+            '12': line_item_content(12),
+            '21': line_item_content(21, product_id='211', name='Chair'),
+        }
+
+        self.client.get_associations_batch = self.get_associations_batch
+        self.client.get_lines_client = mock.Mock(return_value=self.lines_client)
+
+    def test_load_products(self):
+        deals = [
+            Deal(1, fetch=False, hubspot_client=self.client),
+            Deal(2, fetch=False, hubspot_client=self.client),
+        ]
+
+        products_by_deal = Deal.load_products(deals)
+
+        # The associations and the line items are read with a single batch request each.
+        self.get_associations_batch.assert_called_once_with('deals', 'line_items', [1, 2])
+        self.lines_client._call.assert_called_once()
+        self.assertEqual(
+            sorted(self.lines_client._call.call_args[1]['data']['ids']),
+            ['11', '12', '21'],
+        )
+
+        # Lines which are not of type 'PRODUCT' are ignored.
+        self.assertEqual([product.name for product in products_by_deal[1]], ['Desk'])
+        self.assertEqual([product.name for product in products_by_deal[2]], ['Chair'])
+        self.assertEqual(deals[0].products[0].hubspot_id, '111')
+
+    def test_products_are_read_by_chunks(self):
+        self.get_associations_batch.return_value = {'1': [str(i) for i in range(250)]}
+        self.lines_client._call.return_value = {}
+
+        deal = Deal(1, fetch=False, hubspot_client=self.client)
+
+        self.assertEqual(deal.products, [])
+        self.assertEqual(self.lines_client._call.call_count, 3)
+
+    def test_deal_without_products_is_not_fetched_again(self):
+        self.get_associations_batch.return_value = {}
+        deals = [
+            Deal(3, fetch=False, hubspot_client=self.client),
+            Deal(4, fetch=False, hubspot_client=self.client),
+        ]
+
+        Deal.load_products(deals)
+        self.get_associations_batch.reset_mock()
+
+        self.assertEqual(deals[0].products, [])
+        self.assertEqual(deals[1].products, [])
+        self.get_associations_batch.assert_not_called()
+        self.lines_client._call.assert_not_called()
+        # Each deal has its own list of products.
+        self.assertIsNot(deals[0].products, deals[1].products)
+
+
+class PropertyProjectionTestCase(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = HubspotClient(hubspot_api_key='__API_KEY__')
+        self.companies_client = mock.Mock()
+        self.companies_client.get.return_value = {'properties': {'name': {'value': 'ACME'}}}
+        self.contacts_client = mock.Mock()
+        self.contacts_client.get_contact_by_id.return_value = {'properties': {}}
+        self.client.get_companies_client = mock.Mock(return_value=self.companies_client)
+        self.client.get_contacts_client = mock.Mock(return_value=self.contacts_client)
+
+    def test_all_properties_without_history_by_default(self):
+        company = Company(1, hubspot_client=self.client)
+
+        self.assertEqual(company.name, 'ACME')
+        self.companies_client.get.assert_called_once_with(
+            1, params={'includePropertyVersions': 'false'}, doseq=True,
+        )
+
+    def test_properties_per_class_and_per_call(self):
+        class CompanyName(Company):
+            fetched_properties = ('name',)
+
+        CompanyName(1, hubspot_client=self.client)
+        self.companies_client.get.assert_called_with(
+            1, params={'includePropertyVersions': 'false', 'properties': ('name',)}, doseq=True,
+        )
+
+        company = Company(1, hubspot_client=self.client, properties=['zip', 'city', 'zip'])
+        self.companies_client.get.assert_called_with(1, params={
+            'includePropertyVersions': 'false', 'properties': ('city', 'zip'),
+        }, doseq=True)
+
+        company.fetch(include_history=True)
+        self.companies_client.get.assert_called_with(1, params={
+            'includePropertyVersions': 'true', 'properties': ('city', 'zip'),
+        }, doseq=True)
+
+    def test_contact_params(self):
+        Contact(1, hubspot_client=self.client, properties=['email'])
+
+        self.contacts_client.get_contact_by_id.assert_called_once_with(1, params={
+            'propertyMode': 'value_only',
+            'showListMemberships': 'false',
+            'formSubmissionMode': 'none',
+            'property': ('email',),
+        }, doseq=True)
+
+
+class LineTestCase(TestCase):
+
+    def test_extra_properties_do_not_leak_between_instances(self):
+        client = HubspotClient(hubspot_api_key='__API_KEY__')
+        for _ in range(3):
+            line = Line(1, fetch=False, hubspot_client=client, extra_properties=['quantity'])
+            product = Product(1, fetch=False, hubspot_client=client, extra_properties=['sku'])
+
+        self.assertEqual(line._get_fetch_params(), {'properties': ('quantity',)})
+        self.assertEqual(product._get_fetch_params(), {'properties': ('name', 'price', 'sku')})
+        self.assertEqual(Line(1, fetch=False, hubspot_client=client)._get_fetch_params(), {})
+        self.assertEqual(Product.fetched_properties, ('name', 'price'))
+
+
+class FetchManyTestCase(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = HubspotClient(hubspot_api_key='__API_KEY__')
+
+        def batch_read(subpath, method, data):
+            # Odd ids do not exist.
+            return {'results': [
+                {'id': item['id'], 'properties': {'email': f"{item['id']}@acme.com"}}
+                for item in data['inputs']
+                if int(item['id']) % 2 == 0
+            ]}
+
+        patcher = mock.patch.object(CRMObjectsClient, '_call', side_effect=batch_read)
+        self.call = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_fetch_many_by_chunks(self):
+        contacts, missing_ids = Contact.fetch_many(
+            range(250), properties=['email'], hubspot_client=self.client, max_workers=3,
+        )
+
+        self.assertEqual(self.call.call_count, 3)
+        self.call.assert_any_call('contacts/batch/read', method='POST', data={
+            'inputs': [{'id': str(vid)} for vid in range(200, 250)],
+            'properties': ['email'],
+        })
+        self.assertEqual(len(contacts), 125)
+        self.assertEqual(contacts['42'].email, '42@acme.com')
+        self.assertEqual(contacts['42'].api_object_content['vid'], 42)
+        self.assertEqual(missing_ids, [str(vid) for vid in range(1, 250, 2)])
+
+    def test_fetch_many_uses_class_properties(self):
+        products, missing_ids = Product.fetch_many([2, 2], hubspot_client=self.client)
+
+        self.call.assert_called_once_with('products/batch/read', method='POST', data={
+            'inputs': [{'id': '2'}], 'properties': ['name', 'price'],
+        })
+        self.assertEqual(list(products), ['2'])
+        self.assertEqual(missing_ids, [])
+
+    def test_fetch_many_does_not_fill_object_cache(self):
+        object_cache = LocMemObjectCache()
+        set_object_cache(object_cache)
+        self.addCleanup(set_object_cache, None)
+
+        contacts, _missing_ids = Contact.fetch_many([2], hubspot_client=self.client)
+
+        # The converted content must not be read by `fetch` in place of the one it returns.
+        self.assertEqual(len(object_cache), 0)
+        self.assertIsNone(object_cache.get(contacts['2'].cache_key))
+
+    def test_company_contacts_have_all_properties(self):
+        registries._registries.clear()
+        company = Company(1, fetch=False, hubspot_client=self.client)
+        company._associations_client = mock.Mock()
+        company._associations_client.get_company_to_contacts.return_value = [2, 4]
+
+        with mock.patch.object(PropertiesClient, 'get_all', return_value=[
+            {'name': 'email', 'type': 'string'}, {'name': 'firstname', 'type': 'string'},
+        ]):
+            contacts = company.contacts
+
+        self.call.assert_called_once_with('contacts/batch/read', method='POST', data={
+            'inputs': [{'id': '2'}, {'id': '4'}], 'properties': ['email', 'firstname'],
+        })
+        self.assertEqual([contact.email for contact in contacts], ['2@acme.com', '4@acme.com'])
+        self.assertIsNone(contacts[0].fetched_properties)
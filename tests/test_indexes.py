@@ -0,0 +1,110 @@
+from unittest import mock
+
+from django.test import override_settings
+
+from djhubspot.client import HubspotClient
+from djhubspot.events import HubspotEvent
+from djhubspot.models import HubspotCompanyPropertyValue, HubspotWatermark
+
+from .base import TestCase
+
+
+def company_change_event(company_id, prop_name, prop_value):
+    return HubspotEvent({
+        'objectId': company_id,
+        'propertyName': prop_name,
+        'propertyValue': prop_value,
+        'eventId': 1,
+        'occurredAt': 1556094637139,
+        'subscriptionType': 'company.propertyChange',
+        'attemptNumber': 0,
+    })
+
+
+@override_settings(HUBSPOT_COMPANY_INDEX_MAX_AGE=None)
+class CompanyPropertyIndexTestCase(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = HubspotClient(hubspot_api_key='__API_KEY__')
+        self.client.iter_companies = mock.Mock(return_value=[
+            {'companyId': 1, 'properties': {'siren': {'value': '123'}}},
+            {'companyId': 2, 'properties': {'siren': {'value': '456'}}},
+            {'companyId': 3, 'properties': {}},
+            {'companyId': 4, 'properties': {'siren': {'value': 123}}},
+        ])
+        self.client.get_recently_modified_companies = mock.Mock(return_value=[])
+
+    def test_lookup_builds_index_once(self):
+        self.assertEqual(self.client.filter_companies('siren', 123), [1, 4])
+        self.assertEqual(self.client.get_company_id_by_property_value('siren', '456'), 2)
+        self.assertIsNone(self.client.get_company_id_by_property_value('siren', '789'))
+
+        # The index is persisted: other clients of the same portal reuse it.
+        other_client = HubspotClient(hubspot_api_key='__API_KEY__')
+        other_client.iter_companies = mock.Mock()
+        self.assertEqual(other_client.filter_companies('siren', '456'), [2])
+
+        self.client.iter_companies.assert_called_once_with(properties=['siren'])
+        other_client.iter_companies.assert_not_called()
+
+    def test_refresh(self):
+        self.client.reindex_companies('siren')
+        watermark = HubspotWatermark.objects.get(name='company_index:siren')
+
+        self.client.get_recently_modified_companies.return_value = [
+            {'companyId': 2, 'isDeleted': False, 'properties': {'siren': {'value': '789'}}},
+            {'companyId': 4, 'isDeleted': True, 'properties': {}},
+        ]
+        self.client.company_index.refresh()
+
+        self.client.get_recently_modified_companies.assert_called_once_with(
+            since=watermark.timestamp,
+        )
+        self.assertEqual(self.client.filter_companies('siren', '123'), [1])
+        self.assertEqual(self.client.filter_companies('siren', '456'), [])
+        self.assertEqual(self.client.filter_companies('siren', '789'), [2])
+
+    @override_settings(HUBSPOT_COMPANY_INDEX_MAX_AGE=0)
+    def test_lookup_refreshes_old_index(self):
+        self.client.reindex_companies('siren')
+        HubspotWatermark.objects.update(timestamp=0)
+        self.client.filter_companies('siren', '123')
+
+        # The index is too old to be refreshed incrementally, it has been rebuilt.
+        self.assertEqual(self.client.iter_companies.call_count, 2)
+
+    def test_rebuild_keeps_previous_index_during_crawl(self):
+        company_index = self.client.company_index
+        company_index.build('siren')
+        lookups = []
+
+        def iter_companies(properties):
+            # The previous index is still used while the companies are crawled.
+            yield {'companyId': 1, 'properties': {'siren': {'value': '789'}}}
+            lookups.append(company_index.lookup('siren', '123'))
+            yield {'companyId': 2, 'properties': {'siren': {'value': '789'}}}
+
+        self.client.iter_companies = iter_companies
+        company_index.build('siren')
+
+        self.assertEqual(lookups, [[1, 4]])
+        self.assertEqual(company_index.lookup('siren', '123'), [])
+        self.assertEqual(company_index.lookup('siren', '789'), [1, 2])
+        self.assertEqual(
+            list(HubspotCompanyPropertyValue.objects.values_list('property_name', flat=True)),
+            ['siren', 'siren'],
+        )
+
+    def test_apply_event(self):
+        company_index = self.client.company_index
+        company_index.build('siren')
+
+        company_index.apply_event(company_change_event(1, 'siren', '999'))
+        company_index.apply_event(company_change_event(5, 'siren', '123'))
+        # Events about properties which are not indexed are ignored.
+        company_index.apply_event(company_change_event(2, 'name', 'ACME'))
+
+        self.assertEqual(company_index.lookup('siren', '999'), [1])
+        self.assertEqual(company_index.lookup('siren', '123'), [4, 5])
+        self.assertEqual(company_index.indexed_properties, ['siren'])
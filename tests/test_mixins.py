@@ -0,0 +1,90 @@
+from datetime import date
+from unittest import mock
+
+from djhubspot.client import CRMObjectsClient
+
+from .base import TestCase
+from .models import Company
+
+
+class HubspotSyncableManagerTestCase(TestCase):
+
+    def test_sync_many(self):
+        Company.objects.create(hubspot_id=1, name='ACME', employees=10)
+        Company.objects.create(hubspot_id=2, name='Globex', employees=20)
+
+        # For each batch: a SELECT, and a bulk write in a savepoint.
+        with self.assertNumQueries(8):
+            counts = Company.objects.sync_many((
+                (hubspot_id, {'name': name, 'employees': employees})
+                for hubspot_id, name, employees in (
+                    ('1', 'ACME', '10'),
+                    (2, 'Globex Corporation', 20),
+                    (3, 'Initech', None),
+                    (4, 'Umbrella', 40),
+                )
+            ), batch_size=2)
+
+        self.assertEqual(counts, {'created': 2, 'updated': 1, 'unchanged': 1})
+        self.assertEqual(
+            list(Company.objects.order_by('hubspot_id').values_list('hubspot_id', 'name')),
+            [(1, 'ACME'), (2, 'Globex Corporation'), (3, 'Initech'), (4, 'Umbrella')],
+        )
+        self.assertFalse(Company.objects.filter(hubspot_last_synced_at=None).exists())
+
+
+class HubspotSyncableTestCase(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(CRMObjectsClient, '_call')
+        self.call = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_sync_to_hubspot_sends_changed_properties(self):
+        self.call.return_value = {'id': '42'}
+        company = Company.objects.create(name='ACME', employees=10)
+
+        self.assertTrue(company.sync_to_hubspot())
+        self.call.assert_called_once_with('companies', method='POST', data={
+            'properties': {'name': 'ACME', 'numberofemployees': 10, 'founded_on': ''},
+        })
+        company.refresh_from_db()
+        self.assertEqual(company.hubspot_id, 42)
+        self.assertIsNotNone(company.hubspot_last_synced_at)
+
+        # Nothing changed: no API call.
+        self.call.reset_mock()
+        self.assertFalse(company.sync_to_hubspot())
+        self.call.assert_not_called()
+
+        company.employees = 12
+        company.founded_on = date(2001, 2, 3)
+        company.save()
+        company = Company.objects.get(pk=company.pk)
+        self.assertTrue(company.sync_to_hubspot())
+        self.call.assert_called_once_with('companies/42', method='PATCH', data={
+            'properties': {'numberofemployees': 12, 'founded_on': 981158400000},
+        })
+        self.assertEqual(company.get_hubspot_changes(), {})
+
+    def test_sync_from_hubspot_fetches_mapped_properties(self):
+        company = Company.objects.create(hubspot_id=42, name='ACME')
+        self.call.return_value = {
+            'id': '42',
+            'properties': {
+                'name': 'ACME Corporation', 'numberofemployees': '150', 'founded_on': '2001-02-03',
+            },
+        }
+
+        company.sync_from_hubspot()
+
+        self.call.assert_called_once_with(
+            'companies/42', params={'properties': 'name,numberofemployees,founded_on'},
+        )
+        company.refresh_from_db()
+        self.assertEqual(
+            (company.name, company.employees, company.founded_on),
+            ('ACME Corporation', 150, date(2001, 2, 3)),
+        )
+        self.assertEqual(company.get_hubspot_changes(), {})
@@ -0,0 +1,65 @@
+from unittest import mock
+
+from djhubspot import registries
+from djhubspot.client import HubspotClient, OwnersClient
+from djhubspot.helpers import Deal, Owner
+
+from .base import TestCase
+
+
+OWNERS = [
+    {'ownerId': 1, 'email': 'jane@acme.com', 'firstName': 'Jane', 'lastName': 'Doe'},
+    {'ownerId': 2, 'email': 'John@acme.com', 'firstName': 'John', 'lastName': 'Doe'},
+]
+
+
+class OwnerDirectoryTestCase(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        registries._registries.clear()
+        self.client = HubspotClient(hubspot_api_key='__API_KEY__')
+        patcher = mock.patch.object(OwnersClient, 'get_owners', return_value=OWNERS)
+        self.get_owners = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_deal_owners_are_resolved_with_a_single_call(self):
+        deals = [
+            Deal.from_api_object_content(deal_id, {
+                'dealId': deal_id,
+                'properties': {'hubspot_owner_id': {'value': str(owner_id)}},
+            }, hubspot_client=self.client)
+            for deal_id, owner_id in ((10, 1), (11, 2), (12, 1))
+        ]
+
+        self.assertEqual([deal.owner.first_name for deal in deals], ['Jane', 'John', 'Jane'])
+        self.assertIs(deals[0].owner.client, self.client)
+        self.get_owners.assert_called_once_with()
+
+    def test_owner_lookups(self):
+        owner = Owner.from_owner_email('john@ACME.com', '__API_KEY__')
+        self.assertEqual(owner.hubspot_id, 2)
+        self.assertIs(owner.client, HubspotClient.for_portal('__API_KEY__'))
+        self.assertIsNone(Owner.from_owner_email('nobody@acme.com', '__API_KEY__'))
+        with self.assertRaises(ValueError):
+            Owner(3, hubspot_client=self.client)
+
+    def test_link_owner_to_company(self):
+        with mock.patch.object(OwnersClient, 'link_owner_to_company') as link_owner_to_company:
+            self.client.link_owner_to_company('jane@acme.com', 100)
+            self.client.link_owner_to_company('2', 100)
+
+        self.assertEqual(
+            link_owner_to_company.call_args_list, [mock.call(1, 100), mock.call(2, 100)],
+        )
+        with self.assertRaises(ValueError):
+            self.client.link_owner_to_company(3, 100)
+
+    def test_fetch_many(self):
+        owners, missing_ids = Owner.fetch_many([1, '2', 3], hubspot_client=self.client)
+
+        self.assertEqual({key: owner.email for key, owner in owners.items()}, {
+            '1': 'jane@acme.com', '2': 'John@acme.com',
+        })
+        self.assertEqual(missing_ids, ['3'])
+        self.get_owners.assert_called_once_with()
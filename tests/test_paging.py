@@ -0,0 +1,104 @@
+from unittest import mock
+
+from djhubspot.client import HubspotClient
+from djhubspot.paging import HubspotPager
+
+from .base import TestCase
+
+
+class HubspotPagerTestCase(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.pages = {
+            None: ([1, 2], 'a', True),
+            'a': ([3, 4], 'b', True),
+            'b': ([5], 'c', False),
+        }
+        self.fetch_page = mock.Mock(side_effect=lambda offset: self.pages[offset])
+
+    def test_iterate_lazily(self):
+        pager = HubspotPager(self.fetch_page)
+        iterator = iter(pager)
+
+        self.assertEqual(next(iterator), 1)
+        self.assertEqual(self.fetch_page.call_count, 1)
+
+        self.assertEqual(list(iterator), [2, 3, 4, 5])
+        self.assertEqual(pager.pages, 3)
+        self.assertTrue(pager.exhausted)
+
+    def test_resume(self):
+        pager = HubspotPager(self.fetch_page)
+        consumed = []
+        for record in pager:
+            consumed.append(record)
+            if record == 4:
+                break
+
+        # The offset still points to the page of the last record consumed ...
+        self.assertEqual(pager.offset, 'a')
+
+        # ... so that no record is skipped when resuming.
+        self.assertEqual(list(HubspotPager(self.fetch_page, offset=pager.offset)), [3, 4, 5])
+
+
+class HubspotClientIterTestCase(TestCase):
+
+    def test_iter_contacts(self):
+        contacts_client = mock.Mock()
+        contacts_client._call.side_effect = [
+            {'contacts': [{'vid': 1}, {'vid': 2}], 'vid-offset': 2, 'has-more': True},
+            {'contacts': [{'vid': 3}], 'vid-offset': 3, 'has-more': False},
+        ]
+        client = HubspotClient(hubspot_api_key='__API_KEY__')
+        client.get_contacts_client = mock.Mock(return_value=contacts_client)
+
+        contacts = client.iter_contacts(properties=['email'], page_size=500, offset=0)
+
+        self.assertEqual([contact['vid'] for contact in contacts], [1, 2, 3])
+        self.assertEqual(
+            [call[1]['params'] for call in contacts_client._call.call_args_list],
+            [
+                # The page size is limited to the maximum allowed by the API.
+                {'count': 100, 'property': ['email']},
+                {'count': 100, 'property': ['email'], 'vidOffset': 2},
+            ],
+        )
+
+    def test_iter_companies_skips_deleted(self):
+        companies_client = mock.Mock()
+        companies_client._call.return_value = {
+            'companies': [
+                {'companyId': 1, 'isDeleted': False},
+                {'companyId': 2, 'isDeleted': True},
+            ],
+            'offset': 2,
+            'has-more': False,
+        }
+        client = HubspotClient(hubspot_api_key='__API_KEY__')
+        client.get_companies_client = mock.Mock(return_value=companies_client)
+
+        self.assertEqual(
+            [company['companyId'] for company in client.iter_companies()],
+            [1],
+        )
+
+    def test_iter_products_page_size(self):
+        products_client = mock.Mock()
+        products_client._call.return_value = {
+            'objects': [{'objectId': 1}, {'objectId': 2, 'isDeleted': True}],
+            'offset': 2,
+            'hasMore': False,
+        }
+        client = HubspotClient(hubspot_api_key='__API_KEY__')
+        client.get_products_client = mock.Mock(return_value=products_client)
+
+        self.assertEqual([product['objectId'] for product in client.iter_products()], [1])
+        list(client.iter_products(page_size=500))
+        list(client.iter_products(page_size=20))
+
+        self.assertEqual(
+            [call[1]['params']['limit'] for call in products_client._call.call_args_list],
+            [100, 100, 20],
+        )
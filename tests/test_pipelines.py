@@ -0,0 +1,77 @@
+from unittest import mock
+
+from djhubspot import pipelines, registries
+from djhubspot.client import HubspotClient, PipelinesClient
+from djhubspot.helpers import Deal
+
+from .base import TestCase
+
+
+PIPELINES = [
+    {
+        'pipelineId': 'default',
+        'label': 'Sales',
+        'stages': [
+            {'stageId': 'open', 'label': 'Open', 'metadata': {'probability': '0.2'}},
+            {'stageId': 'won', 'label': 'Won', 'metadata': {'probability': '1.0'}},
+        ],
+    },
+    {
+        'pipelineId': 'renewals',
+        'label': 'Renewals',
+        'stages': [
+            {'stageId': 'renewed', 'label': 'Renewed', 'metadata': {'probability': '1.0'}},
+        ],
+    },
+]
+
+
+def build_deal(deal_id, pipeline_id, stage_id, hubspot_client):
+    return Deal.from_api_object_content(deal_id, {
+        'dealId': deal_id,
+        'properties': {
+            'pipeline': {'value': pipeline_id},
+            'dealstage': {'value': stage_id},
+        },
+    }, hubspot_client=hubspot_client)
+
+
+class DealPipelineRegistryTestCase(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        registries._registries.clear()
+        self.client = HubspotClient(hubspot_api_key='__API_KEY__')
+        patcher = mock.patch.object(PipelinesClient, 'get_all', return_value=PIPELINES)
+        self.get_all = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_deal_stages_are_resolved_with_a_single_call(self):
+        deals = [
+            build_deal(1, 'default', 'won', self.client),
+            build_deal(2, 'default', 'open', self.client),
+            build_deal(3, 'renewals', 'renewed', HubspotClient(hubspot_api_key='__API_KEY__')),
+        ]
+
+        self.assertEqual([deal.closed_won for deal in deals], [True, False, True])
+        self.assertEqual(deals[2]._pipeline['label'], 'Renewals')
+        self.get_all.assert_called_once_with('deals')
+
+    def test_refresh(self):
+        now = [0]
+        registry = pipelines.DealPipelineRegistry(self.client, clock=lambda: now[0])
+
+        self.assertEqual(registry.get_stage('won')['label'], 'Won')
+        self.assertEqual(self.get_all.call_count, 1)
+
+        # Unknown stages trigger a reload, but not too often.
+        self.assertIsNone(registry.get_stage('lost'))
+        now[0] = registry.MIN_RELOAD_INTERVAL
+        self.assertIsNone(registry.get_stage('lost'))
+        self.assertIsNone(registry.get_stage('lost'))
+        self.assertEqual(self.get_all.call_count, 2)
+
+        with self.settings(HUBSPOT_PIPELINES_MAX_AGE=10):
+            now[0] += 10
+            registry.get_pipeline('default')
+        self.assertEqual(self.get_all.call_count, 3)
@@ -0,0 +1,101 @@
+from unittest import mock
+
+from djhubspot import registries
+from djhubspot.client import CRMObjectsClient, HubspotClient, OwnersClient, PropertiesClient
+from djhubspot.helpers import Company, Deal
+from djhubspot.prefetch import prefetch
+
+from .base import TestCase
+
+
+def batch_read(subpath, method, data):
+    object_type = subpath.split('/')[0]
+    return {'results': [
+        {
+            'id': item['id'],
+            'properties': {
+                'companies': {
+                    'name': f"Company {item['id']}",
+                    'hs_parent_company_id': '1' if item['id'] != '1' else None,
+                },
+                'contacts': {'email': f"{item['id']}@acme.com"},
+            }[object_type],
+        }
+        for item in data['inputs']
+    ]}
+
+
+class PrefetchTestCase(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        registries._registries.clear()
+        self.client = HubspotClient(hubspot_api_key='__API_KEY__')
+        self.client.get_associations_batch = mock.Mock(return_value={'10': ['5', '6']})
+
+        patcher = mock.patch.object(CRMObjectsClient, '_call', side_effect=batch_read)
+        self.call = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(OwnersClient, 'get_owners', return_value=[
+            {'ownerId': 7, 'email': 'jane@acme.com', 'firstName': 'Jane', 'lastName': 'Doe'},
+        ])
+        self.get_owners = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(PropertiesClient, 'get_all', return_value=[
+            {'name': 'email', 'type': 'string'}, {'name': 'firstname', 'type': 'string'},
+        ])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_prefetch_deals(self):
+        deals = [
+            Deal.from_api_object_content(deal_id, {
+                'dealId': deal_id,
+                'properties': {'hubspot_owner_id': {'value': '7'}},
+                'associations': {
+                    'associatedVids': [deal_id, deal_id + 1],
+                    'associatedCompanyIds': [deal_id // 2],
+                },
+            }, hubspot_client=self.client)
+            for deal_id in range(10, 20)
+        ]
+
+        prefetch(deals, 'contacts', 'company__parent_company', 'owner')
+
+        # One batch read for the contacts, one for the companies and one for their parents.
+        self.assertEqual(self.call.call_count, 3)
+        # The contacts are fetched with all their properties, as when they are not prefetched.
+        self.assertEqual(
+            self.call.call_args_list[0][1]['data']['properties'], ['email', 'firstname'],
+        )
+        self.get_owners.assert_called_once_with()
+        self.client.get_associations_batch.assert_not_called()
+
+        with mock.patch.object(HubspotClient, '_build_client') as build_client:
+            self.assertEqual(
+                [contact.email for contact in deals[0].contacts], ['10@acme.com', '11@acme.com'],
+            )
+            self.assertEqual(deals[0].company.name, 'Company 5')
+            self.assertEqual(deals[0].company.parent_company.name, 'Company 1')
+            self.assertEqual(deals[-1].owner.first_name, 'Jane')
+        build_client.assert_not_called()
+
+    def test_prefetch_reads_missing_associations(self):
+        companies = [
+            Company.from_api_object_content(company_id, {'properties': {}}, self.client)
+            for company_id in (10, 11)
+        ]
+
+        prefetch(companies, 'contacts')
+
+        self.client.get_associations_batch.assert_called_once_with(
+            'companies', 'contacts', [10, 11],
+        )
+        self.assertEqual(
+            [contact.email for contact in companies[0].contacts], ['5@acme.com', '6@acme.com'],
+        )
+        self.assertEqual(companies[1].contacts, [])
+
+    def test_unknown_relation(self):
+        with self.assertRaises(ValueError):
+            prefetch([Company(1, fetch=False, hubspot_client=self.client)], 'owner')
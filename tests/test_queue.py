@@ -0,0 +1,222 @@
+from datetime import timedelta
+import hashlib
+import json
+
+from django.core.management import call_command
+from django.test import RequestFactory, override_settings
+from django.utils import timezone
+
+from djhubspot import constants
+from djhubspot.errors import HubspotCircuitOpen
+from djhubspot.events import EventDeduplicator
+from djhubspot.models import HubspotWebhookBatch
+from djhubspot.queue import WebhookQueueWorker
+from djhubspot.views import WebhookView
+
+from .base import TestCase
+
+
+def deal_change_event(event_id, deal_id, stage):
+    return {
+        'objectId': deal_id,
+        'propertyName': 'dealstage',
+        'propertyValue': stage,
+        'eventId': event_id,
+        'occurredAt': 1557224426153,
+        'subscriptionType': 'deal.propertyChange',
+        'attemptNumber': 0,
+    }
+
+
+class RecordingWebhookView(WebhookView):
+    queue_events = True
+    processed = []
+    failing_events = set()
+    circuit_open = False
+
+    def process_event(self, event):
+        if self.circuit_open:
+            raise HubspotCircuitOpen('deals', 30)
+        if event.event_id in self.failing_events:
+            raise ValueError(event.event_id)
+        self.processed.append((event.deal_id, event.updated_property_value))
+
+
+@override_settings(HUBSPOT_APP_SECRET='__APP_SECRET__')
+class WebhookQueueTestCase(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        RecordingWebhookView.processed = []
+        RecordingWebhookView.failing_events = set()
+        RecordingWebhookView.circuit_open = False
+
+    def post_events(self, events, view_class=RecordingWebhookView):
+        return self.post_body(json.dumps(events).encode(), view_class=view_class)
+
+    def post_body(self, body, view_class=RecordingWebhookView):
+        request = RequestFactory().post(
+            '/hooks/hubspot/', data=body, content_type='application/json',
+        )
+        request.META[constants.HUBSPOT_SIGNATURE_HEADER_NAME] = hashlib.sha256(
+            b'__APP_SECRET__' + body,
+        ).hexdigest()
+        return view_class.as_view()(request)
+
+    def make_batches_available(self):
+        HubspotWebhookBatch.objects.update(available_at=timezone.now())
+
+    def test_events_are_queued(self):
+        response = self.post_events([deal_change_event(1, 10, 'won')])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(RecordingWebhookView.processed, [])
+        batch = HubspotWebhookBatch.objects.get()
+        self.assertEqual(batch.status, HubspotWebhookBatch.STATUS_PENDING)
+
+        call_command(
+            'hubspot_process_webhooks', view='tests.test_queue.RecordingWebhookView', once=True,
+        )
+
+        self.assertEqual(RecordingWebhookView.processed, [(10, 'won')])
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, HubspotWebhookBatch.STATUS_DONE)
+
+    def test_invalid_bodies(self):
+        for body in (b'not json', b'{"objectId": 10}', b'\xff'):
+            response = self.post_body(body)
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(HubspotWebhookBatch.objects.exists())
+
+        HubspotWebhookBatch.objects.create(body='not json')
+        worker = WebhookQueueWorker(RecordingWebhookView(), max_attempts=1)
+        self.assertEqual(worker.run_once(), (1, 1))
+        batch = HubspotWebhookBatch.objects.get()
+        self.assertEqual(batch.status, HubspotWebhookBatch.STATUS_FAILED)
+
+    def test_concurrent_processing_keeps_object_order(self):
+        self.post_events([deal_change_event(i, i % 3, f'stage-{i}') for i in range(30)])
+        self.post_events([deal_change_event(30 + i, i % 3, f'stage-{30 + i}') for i in range(30)])
+
+        worker = WebhookQueueWorker(RecordingWebhookView(), concurrency=4)
+        self.assertEqual(worker.run_once(), (2, 0))
+
+        self.assertEqual(len(RecordingWebhookView.processed), 60)
+        for deal_id in range(3):
+            deal_stages = [
+                stage
+                for event_deal_id, stage in RecordingWebhookView.processed
+                if event_deal_id == deal_id
+            ]
+            self.assertEqual(deal_stages, [f'stage-{i}' for i in range(60) if i % 3 == deal_id])
+
+    def test_failed_batch_is_retried(self):
+        RecordingWebhookView.failing_events = {1}
+        self.post_events([deal_change_event(1, 10, 'won'), deal_change_event(2, 11, 'lost')])
+        # The next event about the same deal must wait for the failed one.
+        self.post_events([deal_change_event(3, 10, 'closed')])
+
+        worker = WebhookQueueWorker(RecordingWebhookView(), max_attempts=2)
+        self.assertEqual(worker.run_once(), (2, 2))
+        self.assertEqual(RecordingWebhookView.processed, [(11, 'lost')])
+        # The failed batches wait before being retried.
+        self.assertEqual(worker.run_once(), (0, 0))
+
+        RecordingWebhookView.failing_events = set()
+        self.make_batches_available()
+        self.assertEqual(worker.run_once(), (2, 0))
+        self.assertEqual(
+            RecordingWebhookView.processed,
+            [(11, 'lost'), (10, 'won'), (11, 'lost'), (10, 'closed')],
+        )
+        self.assertFalse(
+            HubspotWebhookBatch.objects.exclude(status=HubspotWebhookBatch.STATUS_DONE).exists()
+        )
+
+    def test_batch_is_failed_after_max_attempts(self):
+        RecordingWebhookView.failing_events = {1}
+        self.post_events([deal_change_event(1, 10, 'won')])
+
+        worker = WebhookQueueWorker(RecordingWebhookView(), max_attempts=2)
+        worker.run_once()
+        self.make_batches_available()
+        worker.run_once()
+        self.make_batches_available()
+        self.assertEqual(worker.run_once(), (0, 0))
+
+        batch = HubspotWebhookBatch.objects.get()
+        self.assertEqual(batch.status, HubspotWebhookBatch.STATUS_FAILED)
+        self.assertEqual(batch.attempts, 2)
+
+    def test_retry_backoff(self):
+        RecordingWebhookView.failing_events = {1}
+        self.post_events([deal_change_event(1, 10, 'won')])
+        worker = WebhookQueueWorker(
+            RecordingWebhookView(), max_attempts=10, retry_backoff=10, max_retry_backoff=30,
+        )
+
+        delays = []
+        for _ in range(3):
+            before = timezone.now()
+            self.assertEqual(worker.run_once(), (1, 1))
+            batch = HubspotWebhookBatch.objects.get()
+            self.assertEqual(batch.status, HubspotWebhookBatch.STATUS_PENDING)
+            delays.append(round((batch.available_at - before) / timedelta(seconds=1)))
+            self.make_batches_available()
+        self.assertEqual(delays, [10, 20, 30])
+
+        RecordingWebhookView.failing_events = set()
+        self.assertEqual(worker.run_once(), (1, 0))
+        self.assertIsNone(HubspotWebhookBatch.objects.get().available_at)
+
+    def test_deduplicated_and_coalesced_events(self):
+        view = RecordingWebhookView()
+        view.deduplicate_events = True
+        view.coalesce_property_changes = True
+        view.event_deduplicator = EventDeduplicator()
+
+        self.post_events([deal_change_event(1, 10, 'won'), deal_change_event(2, 10, 'closed')])
+        # Hubspot sends an event again.
+        self.post_events([deal_change_event(2, 10, 'closed')])
+
+        worker = WebhookQueueWorker(view)
+        self.assertEqual(worker.run_once(), (2, 0))
+        self.assertEqual(RecordingWebhookView.processed, [(10, 'closed')])
+
+    def test_open_circuit_does_not_consume_attempts(self):
+        RecordingWebhookView.circuit_open = True
+        self.post_events([deal_change_event(1, 10, 'won')])
+
+        worker = WebhookQueueWorker(RecordingWebhookView(), max_attempts=2)
+        for _ in range(3):
+            before = timezone.now()
+            self.assertEqual(worker.run_once(), (1, 1))
+            # The batch waits for the circuit to let the calls through again.
+            self.assertEqual(worker.run_once(), (0, 0))
+            batch = HubspotWebhookBatch.objects.get()
+            self.assertEqual(round((batch.available_at - before) / timedelta(seconds=1)), 30)
+            self.make_batches_available()
+
+        self.assertEqual(batch.status, HubspotWebhookBatch.STATUS_PENDING)
+        self.assertEqual(batch.attempts, 0)
+
+        RecordingWebhookView.circuit_open = False
+        self.assertEqual(worker.run_once(), (1, 0))
+        self.assertEqual(RecordingWebhookView.processed, [(10, 'won')])
+
+    def test_events_are_queued_on_open_circuit(self):
+        class DivertingWebhookView(RecordingWebhookView):
+            queue_events = False
+            queue_events_on_circuit_open = True
+
+        RecordingWebhookView.circuit_open = True
+        response = self.post_events([deal_change_event(1, 10, 'won')], DivertingWebhookView)
+
+        self.assertEqual(response.status_code, 200)
+        batch = HubspotWebhookBatch.objects.get()
+        self.assertEqual(batch.status, HubspotWebhookBatch.STATUS_PENDING)
+        self.assertEqual(json.loads(batch.body), [deal_change_event(1, 10, 'won')])
+
+        RecordingWebhookView.circuit_open = False
+        self.assertEqual(WebhookQueueWorker(DivertingWebhookView()).run_once(), (1, 0))
+        self.assertEqual(RecordingWebhookView.processed, [(10, 'won')])
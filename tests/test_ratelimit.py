@@ -0,0 +1,137 @@
+import asyncio
+import threading
+from unittest import mock
+
+from django.test import override_settings
+
+from djhubspot import ratelimit
+from djhubspot.client import HubspotClient
+from djhubspot.errors import HubspotQuotaExceeded
+from djhubspot.ratelimit import DjangoCacheBackend, RateLimiter, get_rate_limiter
+
+from .base import FakeClock, TestCase
+
+
+class RateLimiterTestCase(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.clock = FakeClock(now=1556094637.0)
+
+    def build_limiter(self, **kwargs):
+        return RateLimiter(clock=self.clock.time, sleep=self.clock.sleep, **kwargs)
+
+    def test_burst(self):
+        limiter = self.build_limiter(requests_per_10s=100, burst=5)
+        for _ in range(5):
+            limiter.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+
+        # The bucket is empty, we have to wait for a new token (10 tokens per second).
+        limiter.acquire()
+        self.assertEqual(len(self.clock.sleeps), 1)
+        self.assertAlmostEqual(self.clock.sleeps[0], 0.1)
+
+    def test_sustained_rate(self):
+        limiter = self.build_limiter(requests_per_10s=100, burst=10)
+        for _ in range(110):
+            limiter.acquire()
+
+        # 10 calls are performed at once, the 100 others at 10 calls per second.
+        self.assertAlmostEqual(self.clock.now - 1556094637.0, 10.0, places=3)
+
+    def test_daily_quota(self):
+        limiter = self.build_limiter(burst=10, daily_quota=3)
+        for _ in range(3):
+            limiter.acquire()
+        with self.assertRaises(HubspotQuotaExceeded):
+            limiter.acquire()
+
+        # The quota is reset the next day.
+        self.clock.now += 24 * 3600
+        limiter.acquire()
+
+    def test_django_cache_backend(self):
+        backend = DjangoCacheBackend()
+        limiter = self.build_limiter(burst=2, backend=backend, key='test:ratelimit')
+        other_limiter = self.build_limiter(burst=2, backend=backend, key='test:ratelimit')
+
+        limiter.acquire()
+        other_limiter.acquire()
+        # Both limiters share the same bucket, which is now empty.
+        self.assertEqual(backend.get_state('test:ratelimit')['tokens'], 0)
+        self.assertIsNone(backend.cache.get('test:ratelimit:lock'))
+
+    def test_django_cache_backend_lock_timeout(self):
+        backend = DjangoCacheBackend(lock_timeout=0.05)
+        limiter = self.build_limiter(burst=2, backend=backend, key='test:ratelimit:locked')
+        limiter.acquire()
+        # Another process holds the lock, and crashed.
+        backend.cache.set('test:ratelimit:locked:lock', '__TOKEN__', 60)
+
+        with self.assertLogs('vendors.dj_hubspot', 'WARNING'):
+            limiter.acquire()
+
+        # The state of the process is used, the lock of the other process is left untouched.
+        self.assertEqual(backend.get_state('test:ratelimit:locked')['tokens'], 1)
+        self.assertEqual(backend._local_state['tokens'], 0)
+        self.assertEqual(backend.cache.get('test:ratelimit:locked:lock'), '__TOKEN__')
+
+    def test_acquire_async_does_not_block_the_loop(self):
+        threads = []
+
+        def record_thread(limiter):
+            try_acquire = limiter._try_acquire
+
+            def wrapper():
+                threads.append(threading.current_thread())
+                return try_acquire()
+            limiter._try_acquire = wrapper
+
+        local_limiter = self.build_limiter(burst=2)
+        cache_limiter = self.build_limiter(
+            burst=2, backend=DjangoCacheBackend(), key='test:ratelimit',
+        )
+        record_thread(local_limiter)
+        record_thread(cache_limiter)
+
+        asyncio.run(local_limiter.acquire_async())
+        asyncio.run(cache_limiter.acquire_async())
+
+        # The cache backend is accessed from a thread, not from the thread of the event loop.
+        self.assertEqual(threads[0], threading.main_thread())
+        self.assertNotEqual(threads[1], threading.main_thread())
+        self.assertEqual(cache_limiter.backend.get_state('test:ratelimit')['tokens'], 1)
+
+
+class HubspotClientRateLimitTestCase(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        ratelimit._rate_limiters.clear()
+        self.addCleanup(ratelimit._rate_limiters.clear)
+
+    @override_settings(HUBSPOT_RATE_LIMIT={'REQUESTS_PER_10S': 50, 'BURST': 3})
+    def test_limiter_is_shared(self):
+        client = HubspotClient(hubspot_api_key='__API_KEY__')
+        other_client = HubspotClient(hubspot_api_key='__API_KEY__')
+
+        self.assertIs(client.rate_limiter, other_client.rate_limiter)
+        self.assertIs(client.rate_limiter, get_rate_limiter(client.portal_key))
+        self.assertEqual(client.rate_limiter.burst, 3)
+        self.assertIsNot(
+            client.rate_limiter,
+            HubspotClient(hubspot_api_key='__OTHER_API_KEY__').rate_limiter,
+        )
+
+    def test_calls_are_throttled(self):
+        client = HubspotClient(hubspot_api_key='__API_KEY__')
+        companies_client = client.get_companies_client()
+
+        with mock.patch.object(client.rate_limiter, 'acquire') as acquire_mock, \
+                mock.patch('hubspot3.base.BaseClient._create_request'), \
+                mock.patch('hubspot3.base.BaseClient._execute_request_raw') as execute_mock:
+            execute_mock.return_value.body = '{"companyId": 42}'
+            companies_client.get(42)
+
+        acquire_mock.assert_called_once_with()
@@ -0,0 +1,165 @@
+import json
+import socket
+from unittest import mock
+
+from djhubspot.bulk import BulkExecutor
+from djhubspot.client import HubspotClient
+from djhubspot.errors import (
+    HubspotBadRequest,
+    HubspotRateLimited,
+    HubspotServerError,
+    HubspotTimeout,
+)
+from djhubspot.retry import RetryBudget, RetryPolicy
+from djhubspot.metrics import ClientMetrics
+
+from .base import TestCase
+
+
+def build_error(error_class, status, headers=None, body=''):
+    result = mock.Mock(status=status, reason='Error', body=body)
+    result.getheader.side_effect = lambda name, default=None: (headers or {}).get(name, default)
+    return error_class(result, {})
+
+
+class RetryPolicyTestCase(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.sleeps = []
+        self.policy = RetryPolicy(
+            max_retries=3, backoff=1, max_backoff=10, sleep=self.sleeps.append, jitter=lambda: 1,
+        )
+
+    def build_call(self, *errors, result='ok'):
+        call = mock.Mock(side_effect=[*errors, result])
+        return call, self.policy.wrap(call)
+
+    def test_backoff(self):
+        call, wrapped_call = self.build_call(
+            build_error(HubspotServerError, 502), HubspotTimeout(None, {}),
+        )
+
+        self.assertEqual(wrapped_call('companies/42', method='GET'), 'ok')
+        self.assertEqual(call.call_count, 3)
+        self.assertEqual(self.sleeps, [1, 2])
+
+    def test_socket_errors(self):
+        call, wrapped_call = self.build_call(
+            socket.timeout('timed out'), socket.gaierror('Name or service not known'),
+        )
+
+        self.assertEqual(wrapped_call('companies/42'), 'ok')
+        self.assertEqual(call.call_count, 3)
+
+    def test_jitter(self):
+        self.policy.jitter = lambda: 0.25
+        self.assertEqual(self.policy.get_delay(3), 2)
+        self.policy.jitter = lambda: 1
+        self.assertEqual(self.policy.get_delay(8), 10)
+
+    def test_max_retries(self):
+        error = build_error(HubspotServerError, 502)
+        call, wrapped_call = self.build_call(error, error, error, error)
+
+        with self.assertRaises(HubspotServerError):
+            wrapped_call('companies/42')
+        self.assertEqual(call.call_count, 4)
+
+    def test_retry_after(self):
+        call, wrapped_call = self.build_call(
+            build_error(HubspotRateLimited, 429, headers={'Retry-After': '7'}),
+        )
+        self.assertEqual(wrapped_call('companies/42'), 'ok')
+        self.assertEqual(self.sleeps, [7])
+
+        # Waiting longer than the maximum backoff is left to the caller.
+        call, wrapped_call = self.build_call(
+            build_error(HubspotRateLimited, 429, headers={'Retry-After': '60'}),
+        )
+        with self.assertRaises(HubspotRateLimited):
+            wrapped_call('companies/42')
+
+    def test_daily_limit(self):
+        call, wrapped_call = self.build_call(
+            build_error(HubspotRateLimited, 429, body=json.dumps({'policyName': 'DAILY'})),
+        )
+        with self.assertRaises(HubspotRateLimited):
+            wrapped_call('companies/42')
+        self.assertEqual(call.call_count, 1)
+
+    def test_idempotent_calls_only(self):
+        error = build_error(HubspotServerError, 502)
+
+        call, wrapped_call = self.build_call(error)
+        with self.assertRaises(HubspotServerError):
+            wrapped_call('companies', None, 'POST', data={})
+
+        call, wrapped_call = self.build_call(error)
+        self.assertEqual(wrapped_call('companies/batch/read', method='POST', data={}), 'ok')
+
+        # The caller knows better.
+        call, wrapped_call = self.build_call(error)
+        self.assertEqual(
+            wrapped_call('companies/batch/update', method='POST', data={}, idempotent=True), 'ok',
+        )
+        self.assertNotIn('idempotent', call.call_args.kwargs)
+
+        # Hubspot did not perform the calls rejected by the rate limit.
+        call, wrapped_call = self.build_call(build_error(HubspotRateLimited, 429))
+        self.assertEqual(wrapped_call('companies', method='POST', data={}), 'ok')
+        call, wrapped_call = self.build_call(
+            build_error(HubspotRateLimited, 429, body=json.dumps({'policyName': 'DAILY'})),
+        )
+        with self.assertRaises(HubspotRateLimited):
+            wrapped_call('companies', method='POST', data={})
+
+        self.policy.retry_non_idempotent = True
+        call, wrapped_call = self.build_call(error)
+        self.assertEqual(wrapped_call('companies', method='POST', data={}), 'ok')
+
+    def test_client_errors_are_not_retried(self):
+        call, wrapped_call = self.build_call(build_error(HubspotBadRequest, 400))
+        with self.assertRaises(HubspotBadRequest):
+            wrapped_call('companies/42')
+        self.assertEqual(call.call_count, 1)
+
+    def test_retries_are_counted(self):
+        metrics = ClientMetrics()
+        call = mock.Mock(side_effect=[build_error(HubspotServerError, 502), 'ok'])
+        self.policy.wrap(call, metrics=metrics)('companies/42')
+        self.assertEqual(metrics.get('retries'), 1)
+
+    def test_bulk_budget(self):
+        error = build_error(HubspotServerError, 502)
+        wrapped_call = self.policy.wrap(mock.Mock(side_effect=error))
+
+        summary = BulkExecutor(max_workers=2, retry_budget=RetryBudget(4)).map(
+            wrapped_call, ['companies/1', 'companies/2', 'companies/3'],
+        )
+
+        self.assertEqual(len(summary.failed), 3)
+        # Without the budget, each call would have been retried 3 times.
+        self.assertEqual(len(self.sleeps), 4)
+
+
+class HubspotClientRetryTestCase(TestCase):
+
+    def test_calls_are_retried(self):
+        sleeps = []
+        client = HubspotClient(
+            hubspot_api_key='__API_KEY__',
+            retry_policy=RetryPolicy(sleep=sleeps.append, jitter=lambda: 1),
+        )
+        companies_client = client.get_companies_client()
+        response = mock.Mock(body='{"companyId": 42}')
+
+        with mock.patch('hubspot3.base.BaseClient._create_request'), \
+                mock.patch('hubspot3.base.BaseClient._execute_request_raw') as execute_mock:
+            execute_mock.side_effect = [build_error(HubspotServerError, 502), response]
+            self.assertEqual(companies_client.get(42), {'companyId': 42})
+
+        self.assertEqual(execute_mock.call_count, 2)
+        self.assertEqual(sleeps, [0.5])
+        self.assertEqual(client.metrics.get('retries'), 1)
+        self.assertEqual(client.metrics.get('calls'), 2)
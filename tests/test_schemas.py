@@ -0,0 +1,115 @@
+from datetime import date, datetime
+from decimal import Decimal
+from unittest import mock
+
+import pytz
+
+from djhubspot import registries
+from djhubspot.client import CompaniesClient, HubspotClient, PropertiesClient
+from djhubspot.errors import HubspotValidationError
+from djhubspot.helpers import HubspotProperties
+
+from .base import TestCase
+
+
+COMPANY_PROPERTIES = [
+    {'name': 'name', 'type': 'string', 'fieldType': 'text'},
+    {'name': 'numberofemployees', 'type': 'number', 'fieldType': 'number'},
+    {'name': 'is_public', 'type': 'bool', 'fieldType': 'booleancheckbox'},
+    {'name': 'founded_on', 'type': 'date', 'fieldType': 'date'},
+    {'name': 'last_seen_at', 'type': 'datetime', 'fieldType': 'date'},
+    {
+        'name': 'industry', 'type': 'enumeration', 'fieldType': 'select',
+        'options': [{'value': 'RETAIL'}, {'value': 'BANKING'}],
+    },
+    {
+        'name': 'offices', 'type': 'enumeration', 'fieldType': 'checkbox',
+        'options': [{'value': 'paris'}, {'value': 'lyon'}],
+    },
+    {'name': 'hubspot_owner_id', 'type': 'enumeration', 'fieldType': 'select',
+     'externalOptions': True, 'options': []},
+    {'name': 'num_associated_deals', 'type': 'number', 'readOnlyValue': True},
+]
+
+
+class PropertySchemaTestCase(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        registries._registries.clear()
+        self.client = HubspotClient(hubspot_api_key='__API_KEY__')
+        patcher = mock.patch.object(PropertiesClient, 'get_all', return_value=COMPANY_PROPERTIES)
+        self.get_all = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_clean(self):
+        schema = self.client.get_property_schema('companies')
+        self.assertEqual(
+            schema.clean({
+                'name': 'ACME',
+                'numberofemployees': '12',
+                'is_public': False,
+                'founded_on': date(2019, 5, 7),
+                'last_seen_at': datetime(2019, 5, 7, 10, 30, tzinfo=pytz.utc),
+                'industry': 'RETAIL',
+                'offices': ['paris', 'lyon'],
+                'hubspot_owner_id': 123,
+            }),
+            {
+                'name': 'ACME',
+                'numberofemployees': '12',
+                'is_public': 'false',
+                'founded_on': 1557187200000,
+                'last_seen_at': 1557225000000,
+                'industry': 'RETAIL',
+                'offices': 'paris;lyon',
+                'hubspot_owner_id': '123',
+            },
+        )
+
+        with self.assertRaises(HubspotValidationError) as error:
+            schema.clean({
+                'numberofemployees': 'twelve',
+                'is_public': 'maybe',
+                'founded_on': 1557225000000,
+                'industry': 'MINING',
+                'num_associated_deals': 1,
+                'unknown': 'value',
+            })
+        self.assertEqual(
+            sorted(error.exception.errors),
+            [
+                'founded_on', 'industry', 'is_public', 'num_associated_deals',
+                'numberofemployees', 'unknown',
+            ],
+        )
+
+        # Decimals are sent as strings, single checkbox values as a list of one value.
+        self.assertEqual(
+            schema.clean({'numberofemployees': Decimal('12.50'), 'offices': 'paris'}),
+            {'numberofemployees': '12.50', 'offices': 'paris'},
+        )
+        with self.assertRaises(HubspotValidationError) as error:
+            schema.clean({'numberofemployees': Decimal('NaN'), 'offices': 1})
+        self.assertEqual(sorted(error.exception.errors), ['numberofemployees', 'offices'])
+
+        # The schema is loaded once per portal and object type.
+        self.assertEqual(
+            HubspotProperties('companies', hubspot_client=self.client).properties[0].name, 'name',
+        )
+        self.get_all.assert_called_once_with(object_type='companies')
+
+    def test_create_company(self):
+        with mock.patch.object(CompaniesClient, 'create') as create:
+            with self.assertRaises(HubspotValidationError):
+                self.client.create_company({'industry': 'MINING'}, validate=True)
+            create.assert_not_called()
+
+            self.client.create_company({'is_public': True}, validate=True)
+            # Validation is disabled by default.
+            self.client.create_company({'is_public': 'maybe'})
+
+        self.assertEqual(create.call_args_list, [
+            mock.call({'properties': [{'name': 'is_public', 'value': 'true'}]}),
+            mock.call({'properties': [{'name': 'is_public', 'value': 'maybe'}]}),
+        ])
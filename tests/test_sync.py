@@ -0,0 +1,107 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+
+from djhubspot.client import HubspotClient
+from djhubspot.sync import DeltaSync
+
+from .base import TestCase
+from .models import Company
+
+
+def api_company(company_id, name, employees, modified_at, is_deleted=False):
+    return {
+        'companyId': company_id,
+        'isDeleted': is_deleted,
+        'properties': {
+            'name': {'value': name},
+            'numberofemployees': {'value': str(employees)},
+            'hs_lastmodifieddate': {'value': str(modified_at)},
+        },
+    }
+
+
+@mock.patch('djhubspot.sync.now_as_hubspot_timestamp', return_value=1600000000000)
+class DeltaSyncTestCase(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = HubspotClient(hubspot_api_key='__API_KEY__')
+        self.client.iter_companies = mock.Mock(return_value=[
+            api_company(1, 'ACME', 10, 1500000000000),
+            api_company(2, 'Globex', 20, 1500000000000),
+        ])
+        self.client.iter_recently_modified_companies = mock.Mock(return_value=[
+            api_company(2, 'Globex Corporation', 25, 1600000100000),
+            api_company(3, 'Initech', 30, 1600000200000),
+            api_company(1, 'ACME', 10, 1600000300000, is_deleted=True),
+        ])
+        self.sync = DeltaSync(Company, hubspot_client=self.client)
+
+    def test_first_sync_crawls_the_portal(self, _now):
+        self.assertEqual(self.sync.run(), {'created': 2, 'updated': 0, 'unchanged': 0})
+
+        self.client.iter_companies.assert_called_once_with(
+            properties=['name', 'numberofemployees', 'founded_on', 'hs_lastmodifieddate'],
+        )
+        self.client.iter_recently_modified_companies.assert_not_called()
+        self.assertEqual(self.sync.get_watermark(), 1600000000000)
+        company = Company.objects.get(hubspot_id=2)
+        self.assertEqual((company.name, company.employees), ('Globex', 20))
+        # The synced values are up to date: there is nothing to send back.
+        self.assertEqual(company.get_hubspot_changes(), {})
+
+    def test_next_syncs_fetch_the_modified_objects(self, _now):
+        self.sync.run()
+
+        self.assertEqual(self.sync.run(), {'created': 1, 'updated': 1, 'unchanged': 0})
+        self.client.iter_recently_modified_companies.assert_called_once_with(
+            1600000000000,
+            properties=['name', 'numberofemployees', 'founded_on', 'hs_lastmodifieddate'],
+        )
+        self.assertEqual(
+            list(Company.objects.order_by('hubspot_id').values_list('name', 'employees')),
+            [('ACME', 10), ('Globex Corporation', 25), ('Initech', 30)],
+        )
+        self.assertEqual(self.sync.get_watermark(), 1600000200000)
+
+    def test_watermark_is_kept_when_the_sync_fails(self, _now):
+        self.sync.run()
+        self.client.iter_recently_modified_companies.side_effect = ValueError
+
+        with self.assertRaises(ValueError):
+            self.sync.run()
+        self.assertEqual(self.sync.get_watermark(), 1600000000000)
+
+    def test_command(self, _now):
+        with mock.patch('djhubspot.sync.DeltaSync.run', return_value={
+            'created': 1, 'updated': 2, 'unchanged': 3,
+        }) as run:
+            call_command('hubspot_delta_sync', 'tests.Company', '--full', stdout=StringIO())
+        run.assert_called_once_with(full=True)
+
+
+class RecentlyModifiedContactsTestCase(TestCase):
+
+    def test_iteration_stops_at_since(self):
+        client = HubspotClient(hubspot_api_key='__API_KEY__')
+        contacts_client = client.get_contacts_client()
+        contacts_client._call = mock.Mock(side_effect=[
+            {
+                'contacts': [{'vid': 3, 'addedAt': 300}, {'vid': 2, 'addedAt': 200}],
+                'has-more': True, 'vid-offset': 2, 'time-offset': 200,
+            },
+            {
+                'contacts': [{'vid': 1, 'addedAt': 100}, {'vid': 0, 'addedAt': 50}],
+                'has-more': True, 'vid-offset': 0, 'time-offset': 50,
+            },
+        ])
+
+        contacts = list(client.iter_recently_modified_contacts(100, properties=['email']))
+
+        self.assertEqual([contact['vid'] for contact in contacts], [3, 2, 1])
+        self.assertEqual(contacts_client._call.call_count, 2)
+        self.assertEqual(contacts_client._call.call_args[1]['params'], {
+            'count': 100, 'property': ['email'], 'vidOffset': 2, 'timeOffset': 200,
+        })
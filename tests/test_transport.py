@@ -0,0 +1,87 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import socket
+import threading
+
+from hubspot3.companies import CompaniesClient
+from hubspot3.error import HubspotError
+
+from djhubspot.transport import HubspotTransport
+
+from .base import TestCase
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.connections.append(self.connection)
+
+    def do_GET(self):
+        self.server.headers.append(dict(self.headers))
+        body = json.dumps({'companyId': 1}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.server.posts += 1
+        # The connection is closed before the response is sent.
+        self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # The connections closed by the tests.
+        pass
+
+
+class HubspotTransportTestCase(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.server = StubServer(('127.0.0.1', 0), StubHandler)
+        self.server.connections = []
+        self.server.headers = []
+        self.server.posts = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.transport = HubspotTransport(pool_size=2, timeout=5)
+        self.addCleanup(self.transport.close)
+        self.client = self.transport.install(CompaniesClient(
+            api_key='__API_KEY__', api_base=f'http://127.0.0.1:{self.server.server_port}',
+        ))
+
+    def test_connections_are_kept_alive(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get(1), {'companyId': 1})
+
+        self.assertEqual(len(self.server.connections), 1)
+        self.assertEqual(self.server.headers[0]['Accept-Encoding'], 'gzip')
+
+    def test_connections_closed_by_the_server_are_replaced(self):
+        self.client.get(1)
+        for connection in self.server.connections:
+            connection.shutdown(socket.SHUT_RDWR)
+
+        self.assertEqual(self.client.get(1), {'companyId': 1})
+        self.assertEqual(len(self.server.connections), 2)
+
+    def test_non_idempotent_requests_are_not_sent_again(self):
+        self.client.get(1)
+
+        # The server received the request before closing the kept alive connection.
+        with self.assertRaises(HubspotError):
+            self.client._call('companies', method='POST', data={'properties': []})
+        self.assertEqual(self.server.posts, 1)
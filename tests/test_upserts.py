@@ -0,0 +1,204 @@
+from unittest import mock
+
+from hubspot3.error import HubspotBadRequest, HubspotRateLimited, HubspotServerError
+
+from djhubspot.client import HubspotClient
+from djhubspot.retry import RetryPolicy
+
+from .base import TestCase
+
+
+class FakeCRMObjectsAPI:
+    """Serve the batch endpoints of the CRM objects API for contacts."""
+
+    def __init__(self, existing_emails=(), invalid_emails=(), failures=0):
+        self.contacts = {str(i): email for i, email in enumerate(existing_emails, start=1)}
+        self.invalid_emails = set(invalid_emails)
+        self.failures = failures
+        self.calls = []
+
+    def __call__(self, subpath, method, data):
+        operation = subpath.split('/')[-1]
+        self.calls.append((operation, len(data['inputs'])))
+
+        if self.failures:
+            self.failures -= 1
+            raise HubspotServerError(None, None)
+
+        if operation == 'read':
+            ids_by_email = {email: contact_id for contact_id, email in self.contacts.items()}
+            return {'results': [
+                {'id': ids_by_email[item['id']], 'properties': {'email': item['id']}}
+                for item in data['inputs'] if item['id'] in ids_by_email
+            ]}
+
+        emails = [item['properties']['email'] for item in data['inputs']]
+        if self.invalid_emails.intersection(emails):
+            # The whole batch is rejected.
+            raise HubspotBadRequest(None, None)
+
+        results = []
+        for item in data['inputs']:
+            contact_id = item.get('id') or str(len(self.contacts) + 1)
+            self.contacts[contact_id] = item['properties']['email']
+            results.append({'id': contact_id, 'properties': item['properties']})
+        # Hubspot does not guarantee the order of the results.
+        return {'results': results[::-1]}
+
+
+class UpsertTestCase(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = HubspotClient(hubspot_api_key='__API_KEY__')
+
+    def upsert_contacts(self, api, records):
+        with mock.patch.object(self.client.get_crm_objects_client(), '_call', side_effect=api):
+            return self.client.upsert_contacts(records)
+
+    def test_upsert_contacts(self):
+        api = FakeCRMObjectsAPI(existing_emails=['user-0@acme.com', 'user-1@acme.com'])
+        records = [{'email': f'User-{i}@acme.com', 'firstname': str(i)} for i in range(250)]
+
+        summary = self.upsert_contacts(api, records)
+
+        self.assertEqual(len(summary.succeeded), 250)
+        self.assertEqual([result.result for result in summary.results[:3]], ['1', '2', '3'])
+        self.assertIs(summary.results[0].item, records[0])
+        self.assertEqual(len(api.contacts), 250)
+        # A read, and an update and/or a create per batch of 100 records.
+        self.assertEqual(api.calls, [
+            ('read', 100), ('update', 2), ('create', 98),
+            ('read', 100), ('create', 100),
+            ('read', 50), ('create', 50),
+        ])
+
+    def test_only_failed_sub_batches_are_retried(self):
+        api = FakeCRMObjectsAPI(invalid_emails=['user-5@acme.com'])
+        records = [{'email': f'user-{i}@acme.com'} for i in range(8)]
+
+        summary = self.upsert_contacts(api, records)
+
+        self.assertEqual([result.item for result in summary.failed], [records[5]])
+        self.assertIsInstance(summary.errors[0], HubspotBadRequest)
+        self.assertEqual(len(summary.succeeded), 7)
+        self.assertEqual(api.calls, [
+            ('read', 8), ('create', 8),
+            ('create', 4), ('create', 4), ('create', 2), ('create', 1), ('create', 1),
+            ('create', 2),
+        ])
+
+    def test_created_objects_are_matched_on_their_properties(self):
+        records = [{'name': 'ACME', 'numberofemployees': 10.0}, {'name': 'Initech'}]
+
+        def create(subpath, method, data):
+            # The results are not in the order of the inputs.
+            return {'results': [
+                {'id': '2', 'properties': {'name': 'Initech', 'numberofemployees': None}},
+                {'id': '1', 'properties': {'name': 'ACME', 'numberofemployees': '10'}},
+            ]}
+
+        crm_objects_client = self.client.get_crm_objects_client()
+        with mock.patch.object(crm_objects_client, '_call', side_effect=create):
+            summary = self.client.upsert_companies(records)
+
+        self.assertEqual([result.result for result in summary.results], ['1', '2'])
+
+    def test_missing_created_objects(self):
+        records = [{'name': 'ACME'}, {'name': 'Initech'}]
+
+        def create(subpath, method, data):
+            # Ex: a multi-status response.
+            return {'results': [{'id': '2', 'properties': {'name': 'Initech'}}]}
+
+        crm_objects_client = self.client.get_crm_objects_client()
+        with mock.patch.object(crm_objects_client, '_call', side_effect=create):
+            summary = self.client.upsert_companies(records)
+
+        self.assertEqual([result.item for result in summary.failed], [records[0]])
+        self.assertIsInstance(summary.errors[0], ValueError)
+        self.assertEqual(summary.results[1].result, '2')
+
+    def test_transient_errors_are_left_to_the_retry_policy(self):
+        api = FakeCRMObjectsAPI(failures=1)
+        summary = self.upsert_contacts(api, [{'email': 'jane@acme.com'}])
+
+        self.assertIsInstance(summary.errors[0], HubspotServerError)
+        self.assertEqual(api.calls, [('read', 1)])
+
+    def upsert_through_retry_policy(self, responses, records, retry_policy=None, **kwargs):
+        """Upsert the contacts through a client retrying its calls, return the paths called."""
+        client = HubspotClient(
+            hubspot_api_key='__API_KEY__',
+            retry_policy=retry_policy or RetryPolicy(sleep=lambda delay: None),
+        )
+        with mock.patch('hubspot3.base.BaseClient._create_request') as request_mock, \
+                mock.patch('hubspot3.base.BaseClient._execute_request_raw') as execute_mock:
+            execute_mock.side_effect = responses
+            summary = client.upsert_contacts(records, **kwargs)
+
+        paths = [
+            call.args[2].rsplit('?')[0].rsplit('/', 1)[-1]
+            for call in request_mock.call_args_list
+        ]
+        return summary, paths
+
+    def test_failed_create_is_sent_once(self):
+        server_error = HubspotServerError(None, None)
+        summary, paths = self.upsert_through_retry_policy(
+            # The read is retried, the create is not: it could have been performed anyway.
+            [server_error, mock.Mock(body='{"results": []}'), server_error],
+            [{'email': 'jane@acme.com'}],
+        )
+
+        self.assertIsInstance(summary.errors[0], HubspotServerError)
+        self.assertEqual(paths, ['read', 'read', 'create'])
+
+    def test_rate_limited_create_is_retried(self):
+        result = mock.Mock(status=429, reason='Too Many Requests', body='')
+        result.getheader.return_value = None
+        summary, paths = self.upsert_through_retry_policy(
+            [
+                mock.Mock(body='{"results": []}'),
+                # Hubspot did not perform the create.
+                HubspotRateLimited(result, {}),
+                mock.Mock(
+                    body='{"results": [{"id": "1", "properties": {"email": "jane@acme.com"}}]}',
+                ),
+            ],
+            [{'email': 'jane@acme.com'}],
+        )
+
+        self.assertEqual(summary.results[0].result, '1')
+        self.assertEqual(paths, ['read', 'create', 'create'])
+
+    def test_retry_updates(self):
+        read_response = mock.Mock(
+            body='{"results": [{"id": "1", "properties": {"email": "jane@acme.com"}}]}',
+        )
+        server_error = HubspotServerError(None, None)
+
+        summary, paths = self.upsert_through_retry_policy(
+            [read_response, server_error], [{'email': 'jane@acme.com'}],
+        )
+        self.assertIsInstance(summary.errors[0], HubspotServerError)
+        self.assertEqual(paths, ['read', 'update'])
+
+        summary, paths = self.upsert_through_retry_policy(
+            [read_response, server_error, mock.Mock(body='{"results": []}')],
+            [{'email': 'jane@acme.com'}],
+            retry_updates=True,
+        )
+        self.assertEqual(summary.results[0].result, '1')
+        self.assertEqual(paths, ['read', 'update', 'update'])
+
+    def test_retries_share_a_budget(self):
+        server_error = HubspotServerError(None, None)
+        summary, paths = self.upsert_through_retry_policy(
+            [server_error] * 4,
+            [{'email': 'jane@acme.com'}],
+            retry_policy=RetryPolicy(sleep=lambda delay: None, bulk_budget=1),
+        )
+
+        self.assertIsInstance(summary.errors[0], HubspotServerError)
+        self.assertEqual(paths, ['read', 'read'])
@@ -3,7 +3,7 @@ from unittest import mock
 from django.test import RequestFactory
 
 from djhubspot import constants
-from djhubspot.events import HubspotEvent
+from djhubspot.events import EventDeduplicator, HubspotEvent
 from djhubspot.views import WebhookView
 
 from .base import TestCase
@@ -20,6 +20,25 @@ class WebhookViewTestCase(TestCase):
         super().setUp()
         self.request_factory = RequestFactory()
 
+    def test_event_deduplicator_per_view_class(self):
+        class DealWebhookView(WebhookView):
+            pass
+
+        class ContactWebhookView(WebhookView):
+            pass
+
+        class SharedDeduplicatorView(WebhookView):
+            event_deduplicator = EventDeduplicator()
+
+        deduplicator = DealWebhookView().get_event_deduplicator()
+        self.assertIs(DealWebhookView().get_event_deduplicator(), deduplicator)
+        self.assertIsNot(ContactWebhookView().get_event_deduplicator(), deduplicator)
+        self.assertIsNot(WebhookView().get_event_deduplicator(), deduplicator)
+        self.assertIs(
+            SharedDeduplicatorView().get_event_deduplicator(),
+            SharedDeduplicatorView.event_deduplicator,
+        )
+
     # FIXME: Tests below are currently commenter because `HUBSPOT_APP_SECRET` is `None` from the
     # FIXME: settings. Those tests are working with the real key. But we dont want to push it on
     # FIXME: the repository.